@@ -0,0 +1,204 @@
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+BLOB_REF_RE = re.compile(r"^blob://([0-9a-f]{32})$")
+
+
+def _is_ndarray(value: Any) -> bool:
+    # numpy is only imported by tools that use it; until then no value can be an array
+    np = sys.modules.get("numpy")
+    return np is not None and isinstance(value, np.ndarray)
+
+
+class BlobHandle:
+    """Reference to a value stored in a memory-mapped file. Small, picklable and safe to put in prompts."""
+
+    def __init__(self, blob_id: str, kind: str, path: str, type_name: str, size: int,
+                 dtype: str = None, shape: tuple = None, preview: str = ""):
+        self.blob_id = blob_id
+        self.kind = kind
+        self.path = path
+        self.type_name = type_name
+        self.size = size
+        self.dtype = dtype
+        self.shape = shape
+        self.preview = preview
+
+    @property
+    def ref(self) -> str:
+        return f"blob://{self.blob_id}"
+
+    def load(self) -> Any:
+        """Read the stored value back. Arrays are memory-mapped read-only, not copied; bytes come back as bytes."""
+        if self.kind == "ndarray":
+            import numpy as np
+            return np.load(self.path, mmap_mode="r", allow_pickle=False)
+        if self.kind == "bytes":
+            with open(self.path, "rb") as f:
+                return f.read()
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+    def describe(self) -> Dict[str, Any]:
+        info = {"ref": self.ref, "type": self.type_name, "bytes": self.size}
+        if self.shape is not None:
+            info["shape"] = list(self.shape)
+        if self.dtype:
+            info["dtype"] = self.dtype
+        if self.preview:
+            info["preview"] = self.preview
+        return info
+
+    def __repr__(self):
+        return f"<blob {self.ref} {self.type_name} {self.size}B>"
+
+
+def prompt_view(value: Any, max_chars: int = 1000, max_items: int = 20, depth: int = 0) -> Any:
+    """JSON-safe view of context/params for prompts: handles become descriptors, long values are cut."""
+    if isinstance(value, BlobHandle):
+        return value.describe()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"type": "bytes", "bytes": len(value), "preview": f"starts with {bytes(value[:16])!r}"}
+    if _is_ndarray(value):
+        return {"type": "ndarray", "shape": list(value.shape), "dtype": str(value.dtype)}
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + f"... ({len(value)} chars)"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if depth >= 6:
+        return repr(value)[:200]
+    if isinstance(value, dict):
+        return {str(k): prompt_view(v, max_chars, max_items, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        view = [prompt_view(v, max_chars, max_items, depth + 1) for v in items[:max_items]]
+        if len(items) > max_items:
+            view.append(f"... ({len(items) - max_items} more items)")
+        return view
+    return repr(value)[:max_chars]
+
+
+def load_blobs(value: Any, depth: int = 0) -> Any:
+    """Replace BlobHandles inside params with their values (arrays memory-mapped)."""
+    if isinstance(value, BlobHandle):
+        return value.load()
+    if depth >= 4:
+        return value
+    if isinstance(value, dict):
+        return {k: load_blobs(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, list):
+        return [load_blobs(v, depth + 1) for v in value]
+    return value
+
+
+class BlobStore:
+    """Keeps large or binary tool outputs out of the execution context.
+
+    Bytes, numpy arrays and large lists/strings are written to files under `directory`
+    and replaced by BlobHandles. Prompts see `prompt_view()` (handles plus a bounded
+    preview) and tools receive the mapped values through `load_blobs()`.
+    """
+
+    def __init__(self, directory: Optional[str] = None, threshold: int = None, max_items: int = None):
+        self._owns_directory = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix="agentrix-blobs-")
+        os.makedirs(self.directory, exist_ok=True)
+        self.threshold = threshold or int(os.getenv("AGENTRIX_BLOB_THRESHOLD", str(64 * 1024)))
+        self.max_items = max_items or int(os.getenv("AGENTRIX_BLOB_MAX_ITEMS", "1000"))
+        self._handles: Dict[str, BlobHandle] = {}
+        self._lock = threading.Lock()
+
+    # -- storing ---------------------------------------------------------
+
+    def _is_large(self, value: Any) -> bool:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return len(value) > 256
+        if _is_ndarray(value):
+            return value.nbytes > 256
+        if isinstance(value, str):
+            return len(value) > self.threshold
+        if isinstance(value, (list, tuple)):
+            if len(value) > self.max_items:
+                return True
+            sample = value[:20]
+            return bool(sample) and len(repr(sample)) / len(sample) * len(value) > self.threshold
+        return False
+
+    def put(self, value: Any) -> BlobHandle:
+        blob_id = uuid.uuid4().hex
+        path = os.path.join(self.directory, blob_id)
+        if _is_ndarray(value) and value.dtype != object:
+            import numpy as np
+            path += ".npy"
+            np.save(path, value, allow_pickle=False)
+            flat = value.reshape(-1)[:8].tolist()
+            handle = BlobHandle(blob_id, "ndarray", path, "ndarray", int(value.nbytes),
+                                dtype=str(value.dtype), shape=tuple(value.shape), preview=f"first values: {flat}")
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            data = bytes(value) if isinstance(value, memoryview) else value
+            with open(path, "wb") as f:
+                f.write(data)
+            handle = BlobHandle(blob_id, "bytes", path, "bytes", len(data), preview=f"starts with {bytes(data[:16])!r}")
+        else:
+            with open(path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if isinstance(value, str):
+                preview = value[:200]
+            else:
+                preview = repr(value[:5])[:200] + (f" ... ({len(value)} items)" if hasattr(value, "__len__") else "")
+            handle = BlobHandle(blob_id, "pickle", path, type(value).__name__, os.path.getsize(path), preview=preview)
+        self.adopt(handle)
+        return handle
+
+    def adopt(self, value: Any, depth: int = 0) -> Any:
+        """Register handles created elsewhere (e.g. by a sandbox worker) so their refs resolve here.
+
+        Looks as deep into dicts and lists as offload() and bind_refs() go.
+        """
+        if isinstance(value, BlobHandle):
+            with self._lock:
+                self._handles[value.blob_id] = value
+        elif depth < 4 and isinstance(value, dict):
+            for v in value.values():
+                self.adopt(v, depth + 1)
+        elif depth < 4 and isinstance(value, list):
+            for v in value:
+                self.adopt(v, depth + 1)
+        return value
+
+    def offload(self, value: Any, depth: int = 0) -> Any:
+        """Return `value` with large or binary parts replaced by handles (tool outputs are usually dicts)."""
+        if isinstance(value, BlobHandle):
+            return self.adopt(value)
+        if self._is_large(value):
+            return self.put(value)
+        if depth < 2 and isinstance(value, dict):
+            return {k: self.offload(v, depth + 1) for k, v in value.items()}
+        # Handles a sandbox worker placed in a list, or deeper than it is walked here
+        return self.adopt(value, depth)
+
+    # -- reading ---------------------------------------------------------
+
+    def bind_refs(self, value: Any, depth: int = 0) -> Any:
+        """Turn "blob://<id>" strings (as an LLM would copy them from a prompt) back into handles."""
+        if isinstance(value, str):
+            m = BLOB_REF_RE.match(value)
+            return self._handles.get(m.group(1), value) if m else value
+        if isinstance(value, dict) and depth < 4:
+            if set(value) >= {"ref"} and isinstance(value.get("ref"), str) and BLOB_REF_RE.match(value["ref"]):
+                return self.bind_refs(value["ref"])
+            return {k: self.bind_refs(v, depth + 1) for k, v in value.items()}
+        if isinstance(value, list) and depth < 4:
+            return [self.bind_refs(v, depth + 1) for v in value]
+        return value
+
+    def close(self):
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
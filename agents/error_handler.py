@@ -1,25 +1,46 @@
 import os
+import re
 import json
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, List, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
+from .llm import LLMClient
+from .blob_store import prompt_view
+from .error_triage import ErrorTriage
 
 class ErrorHandlerAgent:
-    def __init__(self, model_name: str = "xiaomi/mimo-v2-flash:free"):
-        self.llm = ChatOpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1",
-            model=model_name,
-        )
-
-    def analyze_error(self, tool_name: str, error_msg: str, params: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(self, model_name: Optional[str] = None, triage: Optional[ErrorTriage] = None):
+        self.llm = LLMClient("error_handler", model_name)
+        # Known errors are resolved locally; only unknown ones cost an LLM call
+        self.triage = triage or ErrorTriage()
+
+    def _triage(self, tool_name: str, error_msg: str, params: Dict[str, Any],
+                error_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        analysis = self.triage.classify(tool_name, error_msg, params, error_type)
+        if analysis:
+            print(f"[*] Error triaged locally ({analysis['source']}): {analysis['action']}")
+        return analysis
+
+    def record_outcome(self, error_msg: str, error_type: Optional[str], analysis: Dict[str, Any], succeeded: bool):
+        """Tell the triage whether the recovery action fixed the step, so it can handle the error locally next time."""
+        self.triage.record(error_type, error_msg, analysis, succeeded)
+        if not succeeded:
+            self.forget(analysis)
+
+    def forget(self, analysis: Dict[str, Any]):
+        """Evict an LLM analysis whose recovery failed, so the same failure is analyzed afresh next time."""
+        if analysis.get("cache_key"):
+            self.llm.forget(analysis["cache_key"])
+
+    def _messages(self, tool_name: str, error_msg: str, params: Dict[str, Any], context: Dict[str, Any],
+                  error_type: Optional[str] = None) -> List[Any]:
         system_prompt = f"""
         You are an ERROR HANDLING AGENT.
         A tool named '{tool_name}' failed with the following error:
         Error: {error_msg}
-        
-        Parameters passed: {json.dumps(params, indent=2)}
-        Previous Context: {json.dumps(context, indent=2)}
+        Error Type: {error_type or "unknown"}
+
+        Parameters passed: {json.dumps(prompt_view(params), indent=2)}
+        Previous Context: {json.dumps(prompt_view(context), indent=2)}
 
         Task: Analyze the error and determine the best recovery action.
         Possible actions:
@@ -28,6 +49,10 @@ class ErrorHandlerAgent:
         - "rebuild_tool": Suggest rebuilding the tool if the error seems to be a bug in the code (e.g., NameError, AttributeError, SyntaxError).
         - "abort": If the error is fatal (e.g., service down).
 
+        Error types "timeout", "memory_limit" and "cpu_limit" mean the sandbox stopped the tool: retry with smaller or
+        narrower parameters if that would help, rebuild if the code is inefficient (e.g., an endless loop), otherwise abort.
+        "crash" means the tool process died and usually calls for "rebuild_tool".
+
         Output ONLY a JSON object with:
         {{
             "action": "one of the above",
@@ -36,18 +61,44 @@ class ErrorHandlerAgent:
             "missing_info_name": "string" # only for request_user_input, e.g., 'openweathermap_api_key'
         }}
         """
-        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Analyze error for {tool_name}")
+        ]
+
+    def _parse(self, content: str) -> Dict[str, Any]:
+        content = content.strip()
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        return json.loads(content)
+
+    def analyze_error(self, tool_name: str, error_msg: str, params: Dict[str, Any], context: Dict[str, Any],
+                      error_type: Optional[str] = None) -> Dict[str, Any]:
+        local = self._triage(tool_name, error_msg, params, error_type)
+        if local:
+            return local
+        messages = self._messages(tool_name, error_msg, params, context, error_type)
+        try:
+            response = self.llm.invoke(messages)
+            return dict(self._parse(response.content), source="llm", cache_key=self.llm.cache_key(messages))
+        except Exception as e:
+            print(f"[-] ErrorHandlerAgent failed: {e}")
+            # An unparseable answer would otherwise come back from the cache on every retry
+            self.llm.forget(self.llm.cache_key(messages))
+            return {"action": "abort", "reason": str(e)}
+
+    async def aanalyze_error(self, tool_name: str, error_msg: str, params: Dict[str, Any], context: Dict[str, Any],
+                             error_type: Optional[str] = None) -> Dict[str, Any]:
+        local = self._triage(tool_name, error_msg, params, error_type)
+        if local:
+            return local
+        messages = self._messages(tool_name, error_msg, params, context, error_type)
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"Analyze error for {tool_name}")
-            ])
-            content = response.content.strip()
-            import re
-            match = re.search(r"\{.*\}", content, re.DOTALL)
-            if match:
-                return json.loads(match.group(0))
-            return json.loads(content)
+            response = await self.llm.ainvoke(messages)
+            return dict(self._parse(response.content), source="llm", cache_key=self.llm.cache_key(messages))
         except Exception as e:
             print(f"[-] ErrorHandlerAgent failed: {e}")
+            # An unparseable answer would otherwise come back from the cache on every retry
+            self.llm.forget(self.llm.cache_key(messages))
             return {"action": "abort", "reason": str(e)}
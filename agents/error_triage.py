@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Optional
+
+DEFAULT_OUTCOMES_FILE = os.path.join(".agentrix_cache", "error_outcomes.json")
+
+# Exception types that mean the generated code itself is broken
+_CODE_ERRORS = {"NameError", "SyntaxError", "IndentationError", "TabError", "AttributeError",
+                "ImportError", "ModuleNotFoundError", "UnboundLocalError", "crash"}
+_UNEXPECTED_KW_RE = re.compile(r"got an unexpected keyword argument '(\w+)'")
+_ENV_VAR_RE = re.compile(r"(?:environment variable|env(?:ironment)? var(?:iable)?|os\.environ)\W+([A-Z][A-Z0-9_]{2,})")
+_SECRET_NAME_RE = re.compile(r"\b([A-Z][A-Z0-9_]*(?:KEY|TOKEN|SECRET|PASSWORD|CREDENTIALS?))\b")
+_MISSING_SECRET_RE = re.compile(
+    r"(?:api[ _-]?key|access[ _-]?token|credentials?|secret)\W+(?:\w+\W+){0,3}?"
+    r"(?:is\s+)?(?:missing|not\s+(?:set|found|provided|configured)|required|invalid)"
+    r"|(?:missing|no|invalid)\s+(?:\w+\s+)?(?:api[ _-]?key|access[ _-]?token|credentials?)"
+    r"|\b401\b|\bunauthori[sz]ed\b|\b403\b|\bforbidden\b",
+    re.IGNORECASE,
+)
+# Actions whose outcome does not depend on the params of one particular call, so they can be learned
+_LEARNABLE = {"rebuild_tool", "request_user_input"}
+
+
+def error_signature(error_type: Optional[str], error_msg: str) -> str:
+    """Error type plus its message with paths, quoted values and numbers masked, so similar failures match."""
+    msg = re.sub(r"(?:[A-Za-z]:)?(?:[\w.~-]*[/\\])+[\w.~-]+", "<path>", error_msg or "")
+    msg = re.sub(r"(['\"]).*?\1", "<str>", msg)
+    msg = re.sub(r"\b0x[0-9a-fA-F]+\b|\b\d+(?:\.\d+)?\b", "<n>", msg)
+    msg = re.sub(r"\s+", " ", msg).strip()[:200]
+    return f"{error_type or 'unknown'}: {msg}"
+
+
+class ErrorTriage:
+    """Resolves common tool failures locally with the same action dict ErrorHandlerAgent returns.
+
+    Rules cover broken generated code, unexpected keyword arguments, missing files and
+    missing credentials. Recovery actions that later succeeded are remembered per error
+    signature in AGENTRIX_ERROR_OUTCOMES (default .agentrix_cache/error_outcomes.json), so
+    a failure the LLM has diagnosed once is handled locally the next time.
+    """
+
+    def __init__(self, outcomes_file: str = None):
+        self.outcomes_file = outcomes_file or os.getenv("AGENTRIX_ERROR_OUTCOMES", DEFAULT_OUTCOMES_FILE)
+        self._lock = threading.Lock()
+        self._outcomes: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # -- classification --------------------------------------------------
+
+    def classify(self, tool_name: str, error_msg: str, params: Dict[str, Any],
+                 error_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """An action dict ("source" is "rule" or "learned"), or None if the LLM should decide."""
+        analysis = self._rule(tool_name, error_msg or "", params or {}, error_type)
+        if analysis:
+            outcome = self._load().get(error_signature(error_type, error_msg))
+            # A rule that has mostly failed for this error is left to the LLM
+            if outcome and outcome["action"] == analysis["action"] and outcome["failures"] > outcome["successes"]:
+                return None
+            return analysis
+        return self._learned(error_type, error_msg)
+
+    def _rule(self, tool_name: str, error_msg: str, params: Dict[str, Any], error_type: Optional[str]):
+        kw = _UNEXPECTED_KW_RE.search(error_msg)
+        if kw and kw.group(1) in params:
+            suggested = {k: v for k, v in params.items() if k != kw.group(1)}
+            return {"action": "retry_with_params", "reason": f"Tool does not accept '{kw.group(1)}'",
+                    "suggested_params": suggested, "source": "rule"}
+
+        secret = self._missing_secret(tool_name, error_msg, error_type)
+        if secret:
+            return {"action": "request_user_input", "reason": "Tool is missing a credential or setting",
+                    "missing_info_name": secret, "source": "rule"}
+
+        if error_type in _CODE_ERRORS:
+            return {"action": "rebuild_tool", "reason": f"{error_type} in the tool code", "source": "rule"}
+
+        if error_type == "FileNotFoundError":
+            # Usually a file an earlier or parallel step is still producing; the retry limit stops a loop
+            return {"action": "retry_with_params", "reason": "File not found, retrying", "suggested_params": params,
+                    "source": "rule"}
+        return None
+
+    def _missing_secret(self, tool_name: str, error_msg: str, error_type: Optional[str]) -> Optional[str]:
+        env = _ENV_VAR_RE.search(error_msg)
+        if env:
+            return env.group(1).lower()
+        if error_type == "KeyError":
+            named = _SECRET_NAME_RE.search(error_msg)
+            if named:
+                return named.group(1).lower()
+        if _MISSING_SECRET_RE.search(error_msg):
+            named = _SECRET_NAME_RE.search(error_msg)
+            return named.group(1).lower() if named else f"{tool_name}_api_key"
+        return None
+
+    def _learned(self, error_type: Optional[str], error_msg: str):
+        outcome = self._load().get(error_signature(error_type, error_msg))
+        if not outcome or outcome["successes"] <= outcome["failures"]:
+            return None
+        analysis = {"action": outcome["action"], "reason": f"Recovered this way {outcome['successes']} time(s) before",
+                    "source": "learned"}
+        if outcome.get("missing_info_name"):
+            analysis["missing_info_name"] = outcome["missing_info_name"]
+        return analysis
+
+    # -- learning --------------------------------------------------------
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if self._outcomes is None:
+                try:
+                    with open(self.outcomes_file, "r", encoding="utf-8") as f:
+                        self._outcomes = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    self._outcomes = {}
+            return self._outcomes
+
+    def record(self, error_type: Optional[str], error_msg: str, analysis: Dict[str, Any], succeeded: bool):
+        """Remember whether `analysis` fixed this error. Only param-independent actions are kept."""
+        if analysis.get("action") not in _LEARNABLE:
+            return
+        from registry.backends import atomic_write, file_lock
+
+        signature = error_signature(error_type, error_msg)
+        os.makedirs(os.path.dirname(os.path.abspath(self.outcomes_file)), exist_ok=True)
+        with self._lock, file_lock(self.outcomes_file + ".lock"):
+            # Merge with what other processes recorded since we loaded
+            try:
+                with open(self.outcomes_file, "r", encoding="utf-8") as f:
+                    outcomes = json.load(f)
+            except (FileNotFoundError, ValueError):
+                outcomes = {}
+            outcome = outcomes.get(signature)
+            if outcome is not None and outcome["action"] != analysis["action"] and not succeeded:
+                # Keep the action that has worked before
+                return
+            if outcome is None or outcome["action"] != analysis["action"]:
+                outcome = {"action": analysis["action"], "successes": 0, "failures": 0}
+            outcome["successes" if succeeded else "failures"] += 1
+            if analysis.get("missing_info_name"):
+                outcome["missing_info_name"] = analysis["missing_info_name"]
+            outcomes[signature] = outcome
+            atomic_write(self.outcomes_file, json.dumps(outcomes, indent=2))
+            self._outcomes = outcomes
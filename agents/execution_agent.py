@@ -1,78 +1,194 @@
 import os
-import importlib.util
+import re
+import asyncio
+import time
 import json
 import logging
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 from registry.schema import ToolRegistryEntry
+from .llm import LLMClient
+from .module_cache import tool_module_cache
+from .param_binder import ParameterBinder
+from .sandbox import get_worker_pool
+from .blob_store import BlobStore, load_blobs, prompt_view
+from .tracing import tracer
+from .result_cache import result_cache, result_cache_enabled
+from .summarizer import ResultSummarizer
 
 class ExecutionAgent:
-    def __init__(self, model_name: str = "xiaomi/mimo-v2-flash:free"):
-        self.llm = ChatOpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1",
-            model=model_name,
-        )
-
-    def extract_parameters(self, user_request: str, tool_entry: ToolRegistryEntry, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        context_str = json.dumps(context, indent=2) if context else "None"
+    def __init__(self, model_name: Optional[str] = None, sandbox: Optional[bool] = None):
+        self.llm = LLMClient("execution_agent", model_name)
+        self.binder = ParameterBinder()
+        self.summarizer = ResultSummarizer(model_name)
+        # Run tools in the shared worker pool instead of this process (AGENTRIX_SANDBOX=1)
+        self.sandbox = sandbox if sandbox is not None else os.getenv("AGENTRIX_SANDBOX", "0") == "1"
+
+    def _parameter_messages(self, user_request: str, tool_entry: ToolRegistryEntry, context: Dict[str, Any] = None,
+                            only: Optional[List[str]] = None, bound: Optional[Dict[str, Any]] = None) -> List[Any]:
+        context_str = json.dumps(prompt_view(context), indent=2) if context else "None"
+        schema = {k: v for k, v in tool_entry.inputs.items() if k in only} if only is not None else tool_entry.inputs
+        bound_str = f"\n        Already Bound (do not repeat): {json.dumps(prompt_view(bound))}" if bound else ""
         system_prompt = f"""
         You are a PARAMETER EXTRACTION AGENT.
         User Request: {user_request}
-        Tool Schema: {tool_entry.inputs}
+        Tool Schema: {schema}{bound_str}
         Previous Outputs (Context): {context_str}
 
         Task: Extract parameters. If a parameter should come from a previous step, reference it from the context.
+        Large values appear in the context as {{"ref": "blob://..."}} descriptors; pass the "blob://..." string to use one.
         Output ONLY a JSON object.
         """
-        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Extract parameters for {tool_entry.tool_name}")
+        ]
+
+    def _parse_parameters(self, content: str) -> Dict[str, Any]:
+        content = content.strip()
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        return json.loads(content)
+
+    def extract_parameters(self, user_request: str, tool_entry: ToolRegistryEntry, context: Dict[str, Any] = None,
+                           only: Optional[List[str]] = None, bound: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"Extract parameters for {tool_entry.tool_name}")
-            ])
-            content = response.content.strip()
-            import re
-            match = re.search(r"\{.*\}", content, re.DOTALL)
-            if match:
-                return json.loads(match.group(0))
-            return json.loads(content)
+            response = self.llm.invoke(self._parameter_messages(user_request, tool_entry, context, only, bound))
+            return self._parse_parameters(response.content)
         except Exception as e:
             print(f"[-] Parameter Extraction Error: {e}")
             return {}
 
-    def execute_tool(self, tool_entry: ToolRegistryEntry, params: Dict[str, Any]) -> Any:
+    async def aextract_parameters(self, user_request: str, tool_entry: ToolRegistryEntry, context: Dict[str, Any] = None,
+                                  only: Optional[List[str]] = None, bound: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         try:
-            # Dynamic import
-            spec = importlib.util.spec_from_file_location(tool_entry.tool_name, tool_entry.file_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Get the function
-            tool_func = getattr(module, tool_entry.tool_name)
-            
-            # Execute
-            print(f"[*] Executing {tool_entry.tool_name} with params: {params}")
-            result = tool_func(**params)
-            return result
+            response = await self.llm.ainvoke(self._parameter_messages(user_request, tool_entry, context, only, bound))
+            return self._parse_parameters(response.content)
         except Exception as e:
-            print(f"[-] Execution Error: {e}")
-            return {"error": str(e)}
+            print(f"[-] Parameter Extraction Error: {e}")
+            return {}
 
-    def summarize_result(self, user_request: str, result: Any) -> str:
+    def _merge_bound(self, params: Dict[str, Any], unresolved: List[str], extracted: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        if not unresolved:
+            return params, "local"
+        source = "mixed" if params else "llm"
+        merged = dict(params)
+        merged.update({k: v for k, v in extracted.items() if k in unresolved})
+        return merged, source
+
+    def bind_parameters(self, user_request: str, tool_entry: ToolRegistryEntry, context: Dict[str, Any] = None) -> Tuple[Dict[str, Any], str]:
+        """Bind params locally where possible and ask the LLM only for the rest.
+
+        Returns the params and how they were bound: "local", "llm" or "mixed".
+        """
+        params, unresolved = self.binder.bind(user_request, tool_entry, context)
+        extracted = self.extract_parameters(user_request, tool_entry, context, only=unresolved, bound=params) if unresolved else {}
+        return self._merge_bound(params, unresolved, extracted)
+
+    async def abind_parameters(self, user_request: str, tool_entry: ToolRegistryEntry, context: Dict[str, Any] = None) -> Tuple[Dict[str, Any], str]:
+        params, unresolved = self.binder.bind(user_request, tool_entry, context)
+        extracted = await self.aextract_parameters(user_request, tool_entry, context, only=unresolved, bound=params) if unresolved else {}
+        return self._merge_bound(params, unresolved, extracted)
+
+    def _slot_messages(self, user_request: str, workflow: Dict[str, Any]) -> List[Any]:
         system_prompt = f"""
-        You are a RESULTS SUMMARIZER.
-        User Original Request: {user_request}
-        Tool Execution Result: {result}
+        You are a SLOT FILLING AGENT.
+        A saved workflow handles requests shaped like: {workflow["template"]}
+        Example request it was built from: {workflow["example_request"]}
+        Slots to fill: {workflow["slots"]}
+        New User Request: {user_request}
 
-        Task: Provide a natural language summary of the result that answers the user's request.
+        Task: Decide whether the new request asks for the same thing as the example, only with different slot values.
+        Output ONLY a JSON object: {{"matches": true/false, "slots": {{"slot_name": "value"}}}}
         """
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="Fill the workflow slots.")
+        ]
+
+    def _parse_slots(self, content: str, workflow: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        data = self._parse_parameters(content)
+        slots = data.get("slots") or {}
+        if not data.get("matches") or any(not slots.get(name) for name in workflow["slots"]):
+            return None
+        return {name: str(slots[name]) for name in workflow["slots"]}
+
+    def fill_slots(self, user_request: str, workflow: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """One LLM call that maps a request onto a saved workflow's slots. None if it doesn't fit."""
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content="Summarize the result.")
-            ])
-            return response.content
+            response = self.llm.invoke(self._slot_messages(user_request, workflow))
+            return self._parse_slots(response.content, workflow)
         except Exception as e:
-            return f"Raw Result: {result}"
+            print(f"[-] Slot Filling Error: {e}")
+            return None
+
+    async def afill_slots(self, user_request: str, workflow: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        try:
+            response = await self.llm.ainvoke(self._slot_messages(user_request, workflow))
+            return self._parse_slots(response.content, workflow)
+        except Exception as e:
+            print(f"[-] Slot Filling Error: {e}")
+            return None
+
+    def execute_tool(self, tool_entry: ToolRegistryEntry, params: Dict[str, Any], blobs: Optional[BlobStore] = None) -> Any:
+        """Run a tool. With a BlobStore, blob params are mapped in and large outputs come back as handles."""
+        with tracer.span(f"tool {tool_entry.tool_name}", kind="tool", tool=tool_entry.tool_name, sandbox=self.sandbox) as span:
+            # Pure tools are memoized by tool content and params
+            key = result_cache.key(tool_entry.tool_name, tool_entry.file_path, params) \
+                if tool_entry.pure and result_cache_enabled() else None
+            if key is not None:
+                hit, result = result_cache.get(key)
+                span.set(cache_hit=hit)
+                if hit:
+                    print(f"[*] Using cached result of {tool_entry.tool_name} for params: {params}")
+                    return blobs.offload(result) if blobs else result
+            result = self._execute_tool(tool_entry, params, blobs, span, cache_key=key)
+            if isinstance(result, dict) and result.get("error"):
+                span.set(error=result["error"], error_type=result.get("error_type"))
+            return result
+
+    def _execute_tool(self, tool_entry: ToolRegistryEntry, params: Dict[str, Any], blobs: Optional[BlobStore], span,
+                      cache_key=None) -> Any:
+        if self.sandbox:
+            print(f"[*] Executing {tool_entry.tool_name} in sandbox with params: {params}")
+            result = get_worker_pool().run(tool_entry.tool_name, tool_entry.file_path, params,
+                                           blob_dir=blobs.directory if blobs else None)
+            if cache_key is not None:
+                result_cache.put(cache_key, result, tool_entry.cache_ttl)
+            if blobs:
+                result = blobs.offload(result)
+            if isinstance(result, dict) and result.get("error_type"):
+                print(f"[-] Execution Error ({result['error_type']}): {result['error']}")
+            return result
+        try:
+            # Dynamic import (cached by file path + content hash)
+            start = time.perf_counter()
+            tool_func = tool_module_cache.load(tool_entry.tool_name, tool_entry.file_path)
+            loaded = time.perf_counter()
+
+            # Execute
+            print(f"[*] Executing {tool_entry.tool_name} with params: {params}")
+            result = tool_func(**load_blobs(params))
+            span.set(load_ms=round((loaded - start) * 1000, 3), exec_ms=round((time.perf_counter() - loaded) * 1000, 3))
+            if cache_key is not None:
+                result_cache.put(cache_key, result, tool_entry.cache_ttl)
+            return blobs.offload(result) if blobs else result
+        except Exception as e:
+            print(f"[-] Execution Error: {e}")
+            return {"error": str(e), "error_type": type(e).__name__}
+
+    async def aexecute_tool(self, tool_entry: ToolRegistryEntry, params: Dict[str, Any], blobs: Optional[BlobStore] = None) -> Any:
+        # Tools are plain sync functions; run them off the event loop
+        return await asyncio.to_thread(self.execute_tool, tool_entry, params, blobs)
+
+    def summarize_result(self, user_request: str, result: Any, schemas: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Final answer for the run's outputs; `schemas` (outputs by tool name) enables local templates."""
+        return self.summarizer.summarize(user_request, result, schemas)
+
+    def stream_summary(self, user_request: str, result: Any, schemas: Optional[Dict[str, Dict[str, Any]]] = None) -> Iterator[str]:
+        """Like summarize_result, but yields the summary text as it is produced."""
+        return self.summarizer.stream(user_request, result, schemas)
+
+    async def asummarize_result(self, user_request: str, result: Any, schemas: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        return await self.summarizer.asummarize(user_request, result, schemas)
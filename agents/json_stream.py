@@ -0,0 +1,75 @@
+import json
+from typing import Any, List
+
+
+class JSONArrayStream:
+    """Incremental parser for a JSON list of objects arriving in chunks (e.g. a streamed plan).
+
+    `feed()` returns each top-level object as soon as its closing brace arrives. The list
+    starts at the first `[` that opens a line (after a ```json fence or prose lines) and is
+    followed by `{` or `]`, so brackets inside prose ("Plan [1 step]:") are skipped, as is
+    everything after the closing `]`. `started` without `done` at the end of the input
+    means the list was cut off.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.count = 0
+        self.done = False
+        self._pos = 0
+        self._started = False
+        self._line_start = True
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        self.text += chunk
+        items = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif not self._started:
+                if c == "[" and self._line_start:
+                    j = i + 1
+                    while j < len(text) and text[j].isspace():
+                        j += 1
+                    if j == len(text):
+                        # Can't tell yet whether this bracket opens the list
+                        break
+                    self._started = text[j] in "{]"
+                if c == "\n":
+                    self._line_start = True
+                elif not c.isspace():
+                    self._line_start = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                if self._depth == 0 and c == "{":
+                    self._obj_start = i
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 0 and c == "]":
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0 and self._obj_start is not None:
+                        items.append(json.loads(text[self._obj_start:i + 1]))
+                        self._obj_start = None
+                        self.count += 1
+            i += 1
+        self._pos = i
+        return items
+
+    @property
+    def started(self) -> bool:
+        return self._started
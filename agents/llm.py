@@ -0,0 +1,205 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+from .llm_cache import get_response_cache, prompt_key
+from .llm_scheduler import AGENT_PRIORITIES, STEP, llm_scheduler
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+# httpx and langchain_openai (with openai) take about a second to import; they are loaded
+# on the first real model call so CLI startup, cached answers and tool-only runs skip them.
+
+DEFAULT_MODEL = "xiaomi/mimo-v2-flash:free"
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+def llm_settings() -> Dict[str, Any]:
+    """Model and endpoint settings shared by every agent, overridable from the environment."""
+    return {
+        "model": os.getenv("AGENTRIX_MODEL", DEFAULT_MODEL),
+        "base_url": os.getenv("AGENTRIX_BASE_URL", DEFAULT_BASE_URL),
+        "api_key": os.getenv("AGENTRIX_API_KEY") or os.getenv("OPENROUTER_API_KEY"),
+        "timeout": float(os.getenv("AGENTRIX_LLM_TIMEOUT", "120")),
+        "max_connections": int(os.getenv("AGENTRIX_MAX_CONNECTIONS", "32")),
+    }
+
+
+_lock = threading.Lock()
+_http_client: Optional["httpx.Client"] = None
+_models: Dict[Tuple[str, str], "ChatOpenAI"] = {}
+# An httpx.AsyncClient's pool is bound to the event loop that first uses it, so async clients (and the models
+# built on them) are kept per loop; a later asyncio.run() gets fresh ones and a closed loop's are dropped
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_async_models: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], ChatOpenAI]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _limits(settings: Dict[str, Any]):
+    import httpx
+    return httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_connections"],
+    )
+
+
+def _sync_http_client(settings: Dict[str, Any]) -> "httpx.Client":
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(limits=_limits(settings), timeout=settings["timeout"])
+    return _http_client
+
+
+def _new_model(key: Tuple[str, str], settings: Dict[str, Any], http_async_client=None) -> "ChatOpenAI":
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        api_key=settings["api_key"],
+        base_url=settings["base_url"],
+        model=key[0],
+        timeout=settings["timeout"],
+        http_client=_sync_http_client(settings),
+        http_async_client=http_async_client,
+        # Retries and backoff are done by llm_scheduler, across all callers
+        max_retries=0,
+    )
+
+
+def get_chat_model(model_name: Optional[str] = None) -> "ChatOpenAI":
+    """Return the process-wide ChatOpenAI for this model, for invoke() and stream(); all share one pooled HTTP client."""
+    settings = llm_settings()
+    key = (model_name or settings["model"], settings["base_url"])
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = _new_model(key, settings)
+        return model
+
+
+def get_async_chat_model(model_name: Optional[str] = None) -> "ChatOpenAI":
+    """ChatOpenAI for ainvoke() on the running event loop; models on one loop share one pooled async client."""
+    settings = llm_settings()
+    key = (model_name or settings["model"], settings["base_url"])
+    loop = asyncio.get_running_loop()
+    with _lock:
+        models = _async_models.setdefault(loop, {})
+        model = models.get(key)
+        if model is None:
+            http_async_client = _async_clients.get(loop)
+            if http_async_client is None:
+                import httpx
+                http_async_client = _async_clients[loop] = httpx.AsyncClient(limits=_limits(settings),
+                                                                             timeout=settings["timeout"])
+            model = models[key] = _new_model(key, settings, http_async_client)
+        return model
+
+
+class LLMClient:
+    """Per-agent handle on the shared chat model, with an optional response cache in front.
+
+    Agents that send side-effecting or non-repeatable prompts pass `use_cache=False`;
+    individual agents can also be excluded with AGENTRIX_LLM_CACHE_EXCLUDE=name,name.
+    Cache misses go through llm_scheduler at the agent's priority unless a call passes its own.
+    A response the caller finds unusable (code that fails validation, a plan whose run failed)
+    is evicted with `forget()`, so retrying the same prompt asks the model again.
+    """
+
+    def __init__(self, agent_name: str, model_name: Optional[str] = None, use_cache: bool = True,
+                 priority: Optional[int] = None):
+        self.agent_name = agent_name
+        self.model_name = model_name or llm_settings()["model"]
+        excluded = {a.strip() for a in os.getenv("AGENTRIX_LLM_CACHE_EXCLUDE", "").split(",") if a.strip()}
+        self.use_cache = use_cache and agent_name not in excluded
+        self.priority = priority if priority is not None else AGENT_PRIORITIES.get(agent_name, STEP)
+
+    @property
+    def model(self) -> "ChatOpenAI":
+        return get_chat_model(self.model_name)
+
+    @property
+    def async_model(self) -> "ChatOpenAI":
+        return get_async_chat_model(self.model_name)
+
+    def _cache(self, use_cache: bool):
+        return get_response_cache() if self.use_cache and use_cache else None
+
+    def _priority(self, priority: Optional[int]) -> int:
+        return self.priority if priority is None else priority
+
+    def cache_key(self, messages: List[Any]) -> str:
+        return prompt_key(self.model_name, messages)
+
+    def forget(self, key: str):
+        """Drop a cached response the caller rejected."""
+        cache = self._cache(True)
+        if cache:
+            cache.delete(key)
+
+    def _span(self):
+        return tracer.span(f"llm {self.agent_name}", kind="llm", agent=self.agent_name, model=self.model_name)
+
+    def _record(self, span, response, cache_hit: bool):
+        usage = getattr(response, "usage_metadata", None) or {}
+        span.set(cache_hit=cache_hit, prompt_tokens=usage.get("input_tokens"),
+                 completion_tokens=usage.get("output_tokens"), response_chars=len(response.content or ""))
+
+    def invoke(self, messages: List[Any], use_cache: bool = True, priority: Optional[int] = None):
+        with self._span() as span:
+            cache = self._cache(use_cache)
+            key = prompt_key(self.model_name, messages)
+            cached = cache.get(key) if cache else None
+            if cached is not None:
+                from langchain_core.messages import AIMessage
+                response = AIMessage(content=cached)
+            else:
+                response = llm_scheduler.call(self.model_name, self._priority(priority),
+                                              lambda: self.model.invoke(messages), key=key)
+                if cache and response.content:
+                    cache.put(key, response.content, self.agent_name)
+            self._record(span, response, cached is not None)
+            return response
+
+    async def ainvoke(self, messages: List[Any], use_cache: bool = True, priority: Optional[int] = None):
+        with self._span() as span:
+            cache = self._cache(use_cache)
+            key = prompt_key(self.model_name, messages)
+            cached = cache.get(key) if cache else None
+            if cached is not None:
+                from langchain_core.messages import AIMessage
+                response = AIMessage(content=cached)
+            else:
+                response = await llm_scheduler.acall(self.model_name, self._priority(priority),
+                                                     lambda: self.async_model.ainvoke(messages), key=key)
+                if cache and response.content:
+                    cache.put(key, response.content, self.agent_name)
+            self._record(span, response, cached is not None)
+            return response
+
+    def stream(self, messages: List[Any], use_cache: bool = True, priority: Optional[int] = None) -> Iterator[str]:
+        """Yield the response text as it arrives; a cached response comes in one piece."""
+        with self._span() as span:
+            cache = self._cache(use_cache)
+            key = prompt_key(self.model_name, messages) if cache else None
+            cached = cache.get(key) if cache else None
+            if cached is not None:
+                span.set(cache_hit=True, response_chars=len(cached))
+                yield cached
+                return
+            parts = []
+            usage = {}
+            for chunk in llm_scheduler.stream(self.model_name, self._priority(priority), lambda: self.model.stream(messages)):
+                if chunk.content:
+                    if not parts:
+                        span.set(first_token_ms=round(span.duration_ms, 3))
+                    parts.append(chunk.content)
+                    yield chunk.content
+                usage = getattr(chunk, "usage_metadata", None) or usage
+            content = "".join(parts)
+            if cache and content:
+                cache.put(key, content, self.agent_name)
+            span.set(cache_hit=False, prompt_tokens=usage.get("input_tokens"),
+                     completion_tokens=usage.get("output_tokens"), response_chars=len(content))
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+DEFAULT_CACHE_PATH = ".agentrix_cache/llm_cache.db"
+
+
+def _message_parts(message: Any):
+    if isinstance(message, (tuple, list)):
+        return str(message[0]), str(message[1])
+    return getattr(message, "type", type(message).__name__), str(message.content)
+
+
+def _normalize(content: str) -> str:
+    # Only trailing whitespace; indentation is meaningful in code prompts
+    return "\n".join(line.rstrip() for line in content.splitlines()).strip("\n")
+
+
+def prompt_key(model: str, messages: List[Any]) -> str:
+    """Hash of the model plus the messages with trailing whitespace removed from each line."""
+    normalized = [
+        [role, _normalize(content)]
+        for role, content in (_message_parts(m) for m in messages)
+    ]
+    payload = json.dumps([model, normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache shared by every process on the machine.
+
+    Entries expire after `ttl` seconds; once the table holds more than `max_entries`
+    the least recently used rows are evicted.
+    """
+
+    def __init__(self, path: str = None, ttl: float = None, max_entries: int = None):
+        self.path = path or os.getenv("AGENTRIX_LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.ttl = ttl if ttl is not None else float(os.getenv("AGENTRIX_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        self.max_entries = max_entries or int(os.getenv("AGENTRIX_LLM_CACHE_MAX_ENTRIES", "10000"))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, agent TEXT, content TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT content, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, content: str, agent: str = None):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, content, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, agent, content, now, now),
+            )
+            count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                # Evict a slice at once so we don't pay a DELETE on every insert at capacity
+                excess = count - self.max_entries + max(1, self.max_entries // 10)
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Process-wide cache, or None when AGENTRIX_LLM_CACHE=0."""
+    global _shared_cache
+    if os.getenv("AGENTRIX_LLM_CACHE", "1") == "0":
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache()
+        return _shared_cache
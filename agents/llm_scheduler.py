@@ -0,0 +1,317 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+from .tracing import current_span
+
+# Priority classes; when calls are queued the lowest number goes first
+PLANNING = 0
+STEP = 1
+SUMMARY = 2
+
+AGENT_PRIORITIES = {
+    "orchestrator": PLANNING,
+    "gap_analyzer": PLANNING,
+    "user_inquiry": PLANNING,
+    "execution_agent": STEP,
+    "error_handler": STEP,
+    "tool_builder": STEP,
+    "summarizer": SUMMARY,
+}
+
+# Exceptions (from openai/httpx) worth retrying even though they carry no HTTP status
+_TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ConnectTimeout", "ReadTimeout",
+                     "ReadError", "RemoteProtocolError", "PoolTimeout"}
+
+
+def _per_model(value: str, model: str, default: float) -> float:
+    """Setting for `model` from "30" or "model-a=20,model-b=60,30" (the bare number is the default)."""
+    result = default
+    for part in (p.strip() for p in (value or "").split(",") if p.strip()):
+        name, _, number = part.rpartition("=")
+        if not name:
+            result = float(number)
+        elif name == model:
+            return float(number)
+    return result
+
+
+class TokenBucket:
+    """`rate` requests per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Lane:
+    """Queue and limits of one model."""
+
+    def __init__(self, max_concurrent: int, bucket: Optional[TokenBucket]):
+        self.max_concurrent = max_concurrent
+        self.bucket = bucket
+        self.active = 0
+        self.queue = []
+        # Set from a 429's Retry-After (or backoff) so every caller pauses, not just the one that was throttled
+        self.cooldown_until = 0.0
+
+
+class LLMScheduler:
+    """Gate that every LLM request goes through.
+
+    Per model: at most AGENTRIX_LLM_MAX_CONCURRENCY requests in flight and, if
+    AGENTRIX_LLM_RPM is set, a token bucket of that many requests per minute (bursts of
+    AGENTRIX_LLM_BURST). Both take a number or "model=n,...,default". Waiting calls are
+    released in priority order (planning, then step work, then summaries). 429s, 5xx and
+    connection errors are retried up to AGENTRIX_LLM_MAX_RETRIES times with exponential
+    backoff and full jitter, and identical concurrent prompts share one request.
+    """
+
+    def __init__(self, max_retries: int = None, backoff_base: float = None, backoff_max: float = None):
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("AGENTRIX_LLM_MAX_RETRIES", "4"))
+        self.backoff_base = backoff_base or float(os.getenv("AGENTRIX_LLM_BACKOFF_BASE", "0.5"))
+        self.backoff_max = backoff_max or float(os.getenv("AGENTRIX_LLM_BACKOFF_MAX", "30"))
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, _Lane] = {}
+        self._seq = itertools.count()
+        self._inflight: Dict[str, Future] = {}
+        self._waits = deque(maxlen=1024)
+        self._priority_waits: Dict[int, list] = {}
+        self.requests = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.max_queued = 0
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            rpm = _per_model(os.getenv("AGENTRIX_LLM_RPM", ""), model, 0)
+            burst = _per_model(os.getenv("AGENTRIX_LLM_BURST", ""), model, min(rpm, 5))
+            max_concurrent = int(_per_model(os.getenv("AGENTRIX_LLM_MAX_CONCURRENCY", ""), model, 16))
+            lane = self._lanes[model] = _Lane(max_concurrent, TokenBucket(rpm / 60, burst) if rpm > 0 else None)
+        return lane
+
+    # -- admission -------------------------------------------------------
+
+    def _acquire(self, model: str, ticket: Tuple[int, int],
+                 cancelled: Optional[threading.Event] = None) -> Optional[Tuple[_Lane, float]]:
+        """Block until this call may start. Returns the lane and the seconds spent waiting.
+
+        Returns None, having left the queue, if `cancelled` is set (under the lock) before the call is admitted.
+        """
+        start = time.monotonic()
+        with self._cond:
+            lane = self._lane(model)
+            heapq.heappush(lane.queue, ticket)
+            self.max_queued = max(self.max_queued, sum(len(l.queue) for l in self._lanes.values()))
+            while True:
+                if cancelled is not None and cancelled.is_set():
+                    lane.queue.remove(ticket)
+                    heapq.heapify(lane.queue)
+                    self._cond.notify_all()
+                    return None
+                timeout = None
+                if lane.queue[0] == ticket and lane.active < lane.max_concurrent:
+                    now = time.monotonic()
+                    timeout = max(lane.cooldown_until - now, lane.bucket.delay(now) if lane.bucket else 0.0)
+                    if timeout <= 0:
+                        heapq.heappop(lane.queue)
+                        lane.active += 1
+                        if lane.bucket:
+                            lane.bucket.take()
+                        waited = time.monotonic() - start
+                        self.requests += 1
+                        self._waits.append(waited)
+                        totals = self._priority_waits.setdefault(ticket[0], [0, 0.0])
+                        totals[0] += 1
+                        totals[1] += waited
+                        # The next in line may be able to start too
+                        self._cond.notify_all()
+                        return lane, waited
+                self._cond.wait(timeout)
+
+    def _release(self, lane: _Lane):
+        with self._cond:
+            lane.active -= 1
+            self._cond.notify_all()
+
+    async def _aacquire(self, model: str, ticket: Tuple[int, int]) -> Tuple[_Lane, float]:
+        """_acquire() for a coroutine: waits in a thread, and a cancelled caller never keeps a slot."""
+        cancelled = threading.Event()
+        waiter = asyncio.ensure_future(asyncio.to_thread(self._acquire, model, ticket, cancelled))
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            with self._cond:
+                cancelled.set()
+                self._cond.notify_all()
+            # The thread now either leaves the queue (returns None) or was admitted just before; free that slot
+            def release_if_admitted(w):
+                if not w.cancelled() and w.exception() is None and w.result() is not None:
+                    self._release(w.result()[0])
+
+            waiter.add_done_callback(release_if_admitted)
+            raise
+
+    def _retry_delay(self, lane: _Lane, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is not transient or retries are used up."""
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        transient = status in (408, 409, 429) or (isinstance(status, int) and status >= 500) \
+            or type(error).__name__ in _TRANSIENT_ERRORS
+        if not transient or attempt >= self.max_retries:
+            return None
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        try:
+            delay = max(delay, float(response.headers.get("retry-after")))
+        except (AttributeError, TypeError, ValueError):
+            pass
+        if status == 429:
+            with self._cond:
+                lane.cooldown_until = max(lane.cooldown_until, time.monotonic() + delay)
+        with self._cond:
+            self.retries += 1
+        return delay
+
+    def _record(self, waited: float, attempt: int):
+        current_span().set(queue_ms=round(waited * 1000, 3), retries=attempt)
+
+    # -- calls -----------------------------------------------------------
+
+    def _join(self, key: Optional[str]) -> Tuple[Optional[Future], bool]:
+        """(future, leader) for a coalescing key; the leader makes the request, the others wait for it."""
+        if key is None:
+            return None, True
+        with self._cond:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _finish(self, key: Optional[str], future: Optional[Future], result: Any = None, error: BaseException = None):
+        if future is None:
+            return
+        with self._cond:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def call(self, model: str, priority: int, request: Callable[[], Any], key: Optional[str] = None) -> Any:
+        """Run `request()` (one LLM call) under the model's limits, retrying transient failures."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        ticket = (priority, next(self._seq))
+        waited = 0.0
+        try:
+            for attempt in itertools.count():
+                lane, wait = self._acquire(model, ticket)
+                waited += wait
+                try:
+                    result = request()
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(lane, e, attempt)
+                    if delay is None:
+                        raise
+                finally:
+                    self._release(lane)
+                time.sleep(delay)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._record(waited, attempt)
+        self._finish(key, future, result)
+        return result
+
+    async def acall(self, model: str, priority: int, request: Callable[[], Awaitable[Any]], key: Optional[str] = None) -> Any:
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        ticket = (priority, next(self._seq))
+        waited = 0.0
+        try:
+            for attempt in itertools.count():
+                lane, wait = await self._aacquire(model, ticket)
+                waited += wait
+                try:
+                    result = await request()
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(lane, e, attempt)
+                    if delay is None:
+                        raise
+                finally:
+                    self._release(lane)
+                await asyncio.sleep(delay)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._record(waited, attempt)
+        self._finish(key, future, result)
+        return result
+
+    def stream(self, model: str, priority: int, request: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """Like call() for a streamed response. Only failures before the first chunk are retried; no coalescing."""
+        ticket = (priority, next(self._seq))
+        waited = 0.0
+        for attempt in itertools.count():
+            lane, wait = self._acquire(model, ticket)
+            waited += wait
+            started = False
+            try:
+                for chunk in request():
+                    if not started:
+                        started = True
+                        self._record(waited, attempt)
+                    yield chunk
+                return
+            except Exception as e:
+                delay = None if started else self._retry_delay(lane, e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._release(lane)
+            time.sleep(delay)
+
+    # -- metrics ---------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                "queued": sum(len(l.queue) for l in self._lanes.values()),
+                "max_queued": self.max_queued,
+                "active": sum(l.active for l in self._lanes.values()),
+                "requests": self.requests,
+                "retries": self.retries,
+                "coalesced": self.coalesced,
+                "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 3) if waits else 0.0,
+                "wait_max_ms": round(waits[-1] * 1000, 3) if waits else 0.0,
+                "wait_mean_ms_by_priority": {p: round(t[1] / t[0] * 1000, 3) for p, t in sorted(self._priority_waits.items())},
+            }
+
+
+# Shared by every LLMClient in the process
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,92 @@
+import hashlib
+import importlib.util
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+
+class ToolModuleCache:
+    """Process-wide LRU cache of loaded tool functions, keyed by file path and content hash.
+
+    A file whose mtime/size are unchanged is served without being read. If the stat
+    changed, the file is re-hashed and only re-executed when its content differs.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, file_path: str) -> str:
+        return os.path.abspath(file_path)
+
+    def load(self, tool_name: str, file_path: str) -> Callable:
+        return self.load_entry(tool_name, file_path)["func"]
+
+    def load_entry(self, tool_name: str, file_path: str) -> Dict[str, Any]:
+        key = self._key(file_path)
+        st = os.stat(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["stamp"] == stamp and entry["tool_name"] == tool_name:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        with open(key, "rb") as f:
+            source = f.read()
+        content_hash = hashlib.sha256(source).hexdigest()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["hash"] == content_hash and entry["tool_name"] == tool_name:
+                entry["stamp"] = stamp
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        func = self._exec_module(tool_name, key, source)
+        entry = {"tool_name": tool_name, "stamp": stamp, "hash": content_hash, "func": func}
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def _exec_module(self, tool_name: str, file_path: str, source: bytes) -> Callable:
+        # Compile the exact bytes we hashed so the cached function matches the key
+        spec = importlib.util.spec_from_file_location(tool_name, file_path)
+        module = importlib.util.module_from_spec(spec)
+        exec(compile(source, file_path, "exec"), module.__dict__)
+        return getattr(module, tool_name)
+
+    def invalidate(self, file_path: str):
+        with self._lock:
+            self._entries.pop(self._key(file_path), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+tool_module_cache = ToolModuleCache(max_size=int(os.getenv("AGENTRIX_MODULE_CACHE_SIZE", "128")))
@@ -1,25 +1,25 @@
 import os
+import re
 import json
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any, Optional
 from .gap_analyzer import ToolGapAnalyzer
+from .json_stream import JSONArrayStream
+from .llm import LLMClient
 from registry.manager import RegistryManager
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
 class Orchestrator:
-    def __init__(self, model_name: str = "gpt-4o"):
-        self.llm = ChatOpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1",
-            model="xiaomi/mimo-v2-flash:free",
-        )
-        self.registry = RegistryManager()
-        self.gap_analyzer = ToolGapAnalyzer(model_name=model_name)
+    def __init__(self, model_name: Optional[str] = None, registry: Optional[RegistryManager] = None, top_k: Optional[int] = None):
+        self.llm = LLMClient("orchestrator", model_name)
+        self.registry = registry or RegistryManager()
+        # Only the top_k most relevant tools go into the planning prompt
+        self.top_k = top_k or int(os.getenv("AGENTRIX_TOOL_TOP_K", "25"))
+        self.gap_analyzer = ToolGapAnalyzer(model_name=model_name, registry=self.registry, top_k=self.top_k)
+        # Response cache key of each request's latest plan, until the run settles it
+        self._plan_keys: Dict[str, str] = {}
 
-    def process_request(self, user_request: str):
-        print(f"[*] Planning execution for: {user_request}")
-        
-        existing_tools = self.registry.list_tools()
+    def _messages(self, user_request: str) -> List[Any]:
+        existing_tools = self.registry.search(user_request, self.top_k)
         tools_str = "\n".join([f"- {t.tool_name}: {t.description}" for t in existing_tools]) if existing_tools else "None"
         
         system_prompt = f"""
@@ -37,29 +37,77 @@ class Orchestrator:
         1. 'tool_name': The tool to use (from the registry or a name for a NEW tool to be built).
         2. 'description': Why this tool is needed.
         3. 'is_new': Boolean, true if the tool does not exist in the registry.
+        4. 'depends_on': List of 'tool_name's of EARLIER steps whose output this step needs. Use [] if the step is independent, so it can run in parallel with other steps.
 
         Output MUST be a JSON list of objects.
         Example: [
-            {{"tool_name": "read_file", "description": "Read the input text", "is_new": false}},
-            {{"tool_name": "count_words", "description": "Count frequencies", "is_new": true}}
+            {{"tool_name": "get_weather", "description": "Fetch the weather", "is_new": false, "depends_on": []}},
+            {{"tool_name": "read_file", "description": "Read the input text", "is_new": false, "depends_on": []}},
+            {{"tool_name": "count_words", "description": "Count frequencies", "is_new": true, "depends_on": ["read_file"]}}
         ]
         """
-        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_request)
+        ]
+
+    def _parse_plan(self, content: str) -> Dict[str, Any]:
+        content = content.strip()
+        if "```" in content:
+            match = re.search(r"\[.*\]", content, re.DOTALL)
+            if match:
+                content = match.group(0)
+
+        plan = json.loads(content)
+        if not isinstance(plan, list) or not plan:
+            raise ValueError("The plan has no steps")
+        print(f"[+] Generated plan with {len(plan)} steps.")
+        return {"status": "plan_generated", "plan": plan}
+
+    def process_request(self, user_request: str):
+        print(f"[*] Planning execution for: {user_request}")
+        try:
+            response = self.llm.invoke(self._messages(user_request))
+            return self._parse_plan(response.content)
+        except Exception as e:
+            print(f"[-] Orchestration Error: {e}")
+            return {"status": "error", "message": str(e)}
+
+    def stream_plan(self, user_request: str) -> Iterator[Dict[str, Any]]:
+        """Yield plan steps as soon as each one is complete in the streamed response.
+
+        Errors (API failures, a response that is not a plan) are raised to the caller.
+        """
+        print(f"[*] Planning execution for: {user_request}")
+        parser = JSONArrayStream()
+        messages = self._messages(user_request)
+        self._plan_keys[user_request] = self.llm.cache_key(messages)
+        for chunk in self.llm.stream(messages):
+            for step in parser.feed(chunk):
+                print(f"[+] Plan step {parser.count}: {step.get('tool_name')}")
+                yield step
+        if not parser.started:
+            # No JSON list in the response; the non-streaming parser raises a proper error
+            yield from self._parse_plan(parser.text)["plan"]
+            return
+        if not parser.done:
+            raise ValueError(f"The plan was cut off after {parser.count} steps")
+        if parser.count == 0:
+            # Replayed as a success that did nothing, and saved as a workflow, if accepted
+            raise ValueError("The plan has no steps")
+        print(f"[+] Generated plan with {parser.count} steps.")
+
+    def settle_plan(self, user_request: str, accepted: bool):
+        """Called once the plan's run is over; a plan that failed is evicted from the response cache."""
+        key = self._plan_keys.pop(user_request, None)
+        if key and not accepted:
+            self.llm.forget(key)
+
+    async def aprocess_request(self, user_request: str):
+        print(f"[*] Planning execution for: {user_request}")
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_request)
-            ])
-            content = response.content.strip()
-            if "```" in content:
-                import re
-                match = re.search(r"\[.*\]", content, re.DOTALL)
-                if match:
-                    content = match.group(0)
-            
-            plan = json.loads(content)
-            print(f"[+] Generated plan with {len(plan)} steps.")
-            return {"status": "plan_generated", "plan": plan}
+            response = await self.llm.ainvoke(self._messages(user_request))
+            return self._parse_plan(response.content)
         except Exception as e:
             print(f"[-] Orchestration Error: {e}")
             return {"status": "error", "message": str(e)}
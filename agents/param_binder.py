@@ -0,0 +1,136 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from registry.schema import ToolRegistryEntry
+from .blob_store import BlobHandle
+
+_URL_RE = re.compile(r"https?://[^\s'\"<>]+")
+_PATH_RE = re.compile(r"(?:[\w.~-]*[/\\])*[\w.~-]+\.[A-Za-z0-9]{1,5}\b")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_QUOTED_RE = re.compile(r"[\"'`]([^\"'`]+)[\"'`]")
+
+_TYPE_WORDS = [
+    ("bool", ("bool", "boolean")),
+    ("int", ("int", "integer")),
+    ("float", ("float", "number", "double")),
+    ("list", ("list", "array")),
+    ("dict", ("dict", "object", "mapping")),
+    ("str", ("str", "string", "text")),
+]
+
+
+def _norm(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def schema_type(details: Any) -> Optional[str]:
+    """Best-effort base type from a registry inputs value such as "int", "Optional[str]" or {"type": "string"}."""
+    if isinstance(details, dict):
+        details = details.get("type", "")
+    words = set(re.findall(r"[a-z]+", str(details).lower()))
+    for base, aliases in _TYPE_WORDS:
+        if words & set(aliases):
+            return base
+    return None
+
+
+def is_optional(details: Any) -> bool:
+    if isinstance(details, dict):
+        return "default" in details or not details.get("required", True)
+    text = str(details).lower()
+    return "optional" in text or "default" in text
+
+
+def type_matches(value: Any, base: Optional[str]) -> bool:
+    if base is None:
+        return value is not None
+    if isinstance(value, BlobHandle):
+        return base == {"ndarray": "list", "tuple": "list"}.get(value.type_name, value.type_name)
+    if base == "int":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if base == "float":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, {"bool": bool, "list": list, "dict": dict, "str": str}[base])
+
+
+class ParameterBinder:
+    """Fills tool inputs locally from context and unambiguous literals in the request.
+
+    Anything ambiguous is left unresolved so the ExecutionAgent can ask the LLM for just those.
+    """
+
+    def bind(self, user_request: str, tool_entry: ToolRegistryEntry, context: Dict[str, Any] = None) -> Tuple[Dict[str, Any], List[str]]:
+        context = context or {}
+        params: Dict[str, Any] = {}
+        unresolved: List[str] = []
+        literals = self._literals(user_request)
+
+        for name, details in tool_entry.inputs.items():
+            if name in ("kwargs", "**kwargs", "args", "*args"):
+                continue
+            base = schema_type(details)
+            # A URL or path the user wrote for this input wins over values left in the context, and
+            # an exact-name context value over a literal that only matches by type (the sole number)
+            found, value = self._named_literal(name, base, literals)
+            if not found:
+                found, value = self._from_context(name, base, context)
+            if not found:
+                found, value = self._from_request(name, base, literals, tool_entry.inputs)
+            if found:
+                params[name] = value
+            elif not is_optional(details) or set(re.findall(r"[a-z]+", name.lower())) & set(re.findall(r"[a-z]+", user_request.lower())):
+                # Optional inputs the request never mentions keep the tool's default
+                unresolved.append(name)
+        return params, unresolved
+
+    def _from_context(self, name: str, base: Optional[str], context: Dict[str, Any]):
+        key = _norm(name)
+        # Values the user supplied and scalar step outputs, under exactly this name. Similar names
+        # ('openweathermap_api_key' for 'key', 'read_file' for 'file') are left to the LLM, so an
+        # answer (possibly a secret) never reaches a parameter it wasn't given for.
+        for ctx_key, value in context.items():
+            if isinstance(value, dict):
+                continue
+            if _norm(ctx_key) == key and type_matches(value, base):
+                return True, value
+        # Fields of earlier step outputs, latest step first
+        for value in reversed(list(context.values())):
+            if not isinstance(value, dict):
+                continue
+            for out_key, out_value in value.items():
+                if _norm(out_key) == key and type_matches(out_value, base):
+                    return True, out_value
+        return False, None
+
+    def _literals(self, user_request: str) -> Dict[str, List[str]]:
+        urls = _URL_RE.findall(user_request)
+        without_urls = _URL_RE.sub(" ", user_request)
+        return {
+            "url": urls,
+            "path": [p for p in _PATH_RE.findall(without_urls) if not _NUMBER_RE.fullmatch(p)],
+            "number": _NUMBER_RE.findall(without_urls),
+            "quoted": _QUOTED_RE.findall(user_request),
+        }
+
+    def _named_literal(self, name: str, base: Optional[str], literals: Dict[str, List[str]]):
+        lowered = name.lower()
+        if any(w in lowered for w in ("url", "link", "href")) and len(literals["url"]) == 1:
+            return True, literals["url"][0]
+        if any(w in lowered for w in ("path", "file")) and len(literals["path"]) == 1 and base in (None, "str"):
+            return True, literals["path"][0]
+        return False, None
+
+    def _from_request(self, name: str, base: Optional[str], literals: Dict[str, List[str]], inputs: Dict[str, Any]):
+        if base in ("int", "float") and len(literals["number"]) == 1:
+            # Only bind when this is the sole numeric input; otherwise the mapping is ambiguous
+            numeric_inputs = [k for k, d in inputs.items() if schema_type(d) in ("int", "float")]
+            if numeric_inputs == [name]:
+                text = literals["number"][0]
+                if base == "int" and "." not in text:
+                    return True, int(text)
+                if base == "float":
+                    return True, float(text)
+        if base == "str" and len(literals["quoted"]) == 1:
+            string_inputs = [k for k, d in inputs.items() if schema_type(d) == "str"]
+            if string_inputs == [name]:
+                return True, literals["quoted"][0]
+        return False, None
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def canonical_params(params: Dict[str, Any]) -> Optional[str]:
+    """Order-independent JSON form of the params, or None if they are not plain JSON values."""
+    try:
+        return json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultCache:
+    """Bounded LRU cache of results of pure tools, keyed by tool content hash and canonical params.
+
+    Only JSON-serializable results are stored (as JSON, so every hit returns a fresh copy).
+    An entry expires after the tool's `cache_ttl` seconds, or when the tool file changes,
+    since a rebuilt tool has a different content hash.
+    """
+
+    def __init__(self, max_entries: int = None, max_result_bytes: int = None):
+        self.max_entries = max_entries or int(os.getenv("AGENTRIX_RESULT_CACHE_SIZE", "512"))
+        self.max_result_bytes = max_result_bytes or int(os.getenv("AGENTRIX_RESULT_CACHE_MAX_BYTES", str(256 * 1024)))
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[str, Optional[float]]]" = OrderedDict()
+        self._hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _content_hash(self, file_path: str) -> str:
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._hashes.get(path)
+            if cached and cached[0] == stamp:
+                return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self._lock:
+            self._hashes[path] = (stamp, digest)
+        return digest
+
+    def key(self, tool_name: str, file_path: str, params: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+        """Cache key for this call, or None if it can't be cached (unhashable params, missing file)."""
+        canonical = canonical_params(params)
+        if canonical is None or not file_path:
+            return None
+        try:
+            return tool_name, self._content_hash(file_path), canonical
+        except OSError:
+            return None
+
+    def get(self, key: Tuple[str, str, str]) -> Tuple[bool, Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and (item[1] is None or item[1] > time.time()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, json.loads(item[0])
+            if item is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple[str, str, str], result: Any, ttl: Optional[float] = None):
+        if isinstance(result, dict) and result.get("error"):
+            return
+        try:
+            data = json.dumps(result, allow_nan=False)
+        except (TypeError, ValueError):
+            return
+        if len(data) > self.max_result_bytes:
+            return
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (data, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tool(self, tool_name: str):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == tool_name]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hashes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+# Shared by every ExecutionAgent in the process; AGENTRIX_RESULT_CACHE=0 turns memoization off
+result_cache = ResultCache()
+
+
+def result_cache_enabled() -> bool:
+    return os.getenv("AGENTRIX_RESULT_CACHE", "1") != "0"
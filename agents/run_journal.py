@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+DEFAULT_RUNS_DIR = "runs"
+
+
+def journal_enabled() -> bool:
+    return os.getenv("AGENTRIX_JOURNAL", "1") != "0"
+
+
+def runs_dir() -> str:
+    return os.getenv("AGENTRIX_RUNS_DIR", DEFAULT_RUNS_DIR)
+
+
+class RunJournal:
+    """Append-only JSONL record of one run in AGENTRIX_RUNS_DIR (default runs/<run_id>.jsonl).
+
+    Events: the request (and replayed workflow), answers given up front, each plan step
+    as it arrives, the end of the plan, each finished step with its params, output,
+    status and context updates (user answers), and the final status. A line is one write() on a file kept open for
+    the run, so a checkpoint costs microseconds; AGENTRIX_JOURNAL_FSYNC=1 also fsyncs
+    each line. Reopening a journal replays it into `plan`, `completed` and `inputs`, so
+    `main.py --resume <run_id>` can skip the steps that already succeeded.
+
+    The journal holds user answers (which may be API keys), so it is created 0600.
+    A journal without a path (AGENTRIX_JOURNAL=0) records nothing.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, path: Optional[str] = None):
+        self.run_id = run_id
+        self.path = path
+        self.request: Optional[str] = None
+        self.workflow_id: Optional[str] = None
+        self.slots: Optional[Dict[str, Any]] = None
+        self.plan: List[Dict[str, Any]] = []
+        self.plan_complete = False
+        self.completed: Dict[int, Dict[str, Any]] = {}
+        self.inputs: Dict[str, Any] = {}
+        self.status: Optional[str] = None
+        self.resumed = False
+        self.fsync = os.getenv("AGENTRIX_JOURNAL_FSYNC", "0") == "1"
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, user_request: str) -> "RunJournal":
+        if not journal_enabled():
+            return cls()
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        journal = cls(run_id, os.path.join(runs_dir(), f"{run_id}.jsonl"))
+        os.makedirs(runs_dir(), exist_ok=True)
+        fd = os.open(journal.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        journal._file = os.fdopen(fd, "a", encoding="utf-8")
+        journal.request = user_request
+        journal._write({"event": "start", "run_id": run_id, "request": user_request})
+        return journal
+
+    @classmethod
+    def open(cls, run_id: str) -> Optional["RunJournal"]:
+        """Load a journal to resume it, or None if there is no such run."""
+        path = os.path.join(runs_dir(), f"{run_id}.jsonl")
+        if not os.path.exists(path):
+            return None
+        journal = cls(run_id, path)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    journal._apply(json.loads(line))
+                except ValueError:
+                    # A line cut short when the process died
+                    continue
+        journal.resumed = True
+        journal._file = open(path, "a", encoding="utf-8")
+        journal._write({"event": "resume"})
+        return journal
+
+    def _apply(self, record: Dict[str, Any]):
+        event = record.get("event")
+        if event == "start":
+            self.request = record["request"]
+        elif event == "workflow":
+            self.workflow_id, self.slots = record["workflow"], record.get("slots")
+        elif event == "plan_step" and record["index"] == len(self.plan):
+            self.plan.append(record["step"])
+        elif event == "input":
+            self.inputs.update(record["updates"])
+        elif event == "plan_done":
+            self.plan_complete = True
+        elif event == "replan":
+            self.plan, self.plan_complete = [], False
+        elif event == "step":
+            self.inputs.update(record.get("updates") or {})
+            if record["success"] and record.get("resumable", True):
+                self.completed[record["index"]] = record
+            else:
+                self.completed.pop(record["index"], None)
+        elif event == "finish":
+            self.status = record["status"]
+
+    def _write(self, record: Dict[str, Any], **dumps_args):
+        if self._file is None:
+            return
+        record["t"] = round(time.time(), 3)
+        line = json.dumps(record, ensure_ascii=False, **dumps_args) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    # -- events ----------------------------------------------------------
+
+    def workflow(self, workflow_id: str, slots: Dict[str, Any]):
+        self.workflow_id, self.slots = workflow_id, slots
+        self._write({"event": "workflow", "workflow": workflow_id, "slots": slots})
+
+    def add_input(self, name: str, value: Any):
+        """Record an answer given outside a step (e.g. through the HTTP service)."""
+        self.inputs[name] = value
+        self._write({"event": "input", "updates": {name: value}})
+
+    def replan(self):
+        """Forget a partial plan before planning again on resume."""
+        self.plan, self.plan_complete = [], False
+        self._write({"event": "replan"})
+
+    def plan_step(self, index: int, step: Dict[str, Any]):
+        # Steps replayed from the journal on resume are already recorded
+        if index < len(self.plan):
+            return
+        self.plan.append(step)
+        self._write({"event": "plan_step", "index": index, "step": step})
+
+    def plan_done(self):
+        if not self.plan_complete:
+            self.plan_complete = True
+            self._write({"event": "plan_done", "steps": len(self.plan)})
+
+    def step(self, index: int, tool_name: str, success: bool, output: Any, updates: Dict[str, Any],
+             log: Optional[Dict[str, Any]]):
+        record = {"event": "step", "index": index, "tool_name": tool_name, "success": success,
+                  "output": output, "updates": updates, "log": log}
+        try:
+            json.dumps(output, allow_nan=False)
+        except (TypeError, ValueError):
+            # Out-of-band (blob) or non-JSON outputs can't be restored; the step re-runs on resume
+            record.update(output=None, resumable=False)
+        # Params in the log (and updates) may hold blob handles; they are informational, so repr() does
+        self._write(record, default=repr)
+
+    def completed_step(self, index: int, tool_name: str) -> Optional[Dict[str, Any]]:
+        record = self.completed.get(index)
+        return record if record and record["tool_name"] == tool_name else None
+
+    def finish(self, status: str):
+        self.status = status
+        self._write({"event": "finish", "status": status})
+
+    def close(self, remove: bool = False):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if remove:
+            os.remove(self.path)
@@ -0,0 +1,230 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Any, Dict, Optional
+from .module_cache import ToolModuleCache
+from .blob_store import BlobStore, load_blobs
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, timeouts still apply
+    resource = None
+
+
+# Default CPU budget per call, as a share of the wall timeout
+CPU_SHARE = 0.75
+
+
+def _limit_memory(memory_mb: Optional[int]):
+    if resource and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _limit_cpu(cpu_seconds: Optional[float]):
+    # RLIMIT_CPU counts the whole process lifetime, so move the soft limit forward for each call
+    if resource and cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = usage.ru_utime + usage.ru_stime
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(used + cpu_seconds) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, memory_mb: Optional[int], cpu_seconds: Optional[float]):
+    """Worker loop: load tools through a private module cache and run one call per message."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _limit_memory(memory_mb)
+    cache = ToolModuleCache()
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        tool_name, file_path, params, blob_dir = message
+        try:
+            _limit_cpu(cpu_seconds)
+            func = cache.load(tool_name, file_path)
+            result = func(**load_blobs(params))
+            # Large outputs go to the caller's blob directory instead of through the pipe
+            reply = ("ok", BlobStore(blob_dir).offload(result) if blob_dir else result)
+        except MemoryError:
+            reply = ("error", {"error": f"Tool exceeded the memory limit of {memory_mb} MB", "error_type": "memory_limit"})
+        except Exception as e:
+            reply = ("error", {"error": str(e), "error_type": type(e).__name__})
+        try:
+            conn.send(reply)
+        except Exception as e:
+            conn.send(("error", {"error": f"Tool result could not be sent back: {e}", "error_type": "unpicklable_result"}))
+
+
+class _Worker:
+    def __init__(self, ctx, memory_mb, cpu_seconds):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_mb, cpu_seconds), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.calls = 0
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.kill()
+
+
+class ToolWorkerPool:
+    """Pool of warm worker processes that run tools with a timeout, memory limit and CPU limit.
+
+    Workers keep the tool modules they have loaded. A worker is replaced after
+    `max_calls` calls, on timeout, or when it dies; a replacement that fails to start is
+    retried a few times with backoff. Failures come back as {"error": ..., "error_type":
+    "timeout" | "memory_limit" | "cpu_limit" | "crash" | "sandbox_unavailable" | <exception name>}.
+    """
+
+    spawn_attempts = 3
+
+    def __init__(self, size: int = None, timeout: float = None, memory_mb: int = None,
+                 cpu_seconds: float = None, max_calls: int = None):
+        # A memory or CPU limit of 0 disables that limit; the CPU limit defaults to CPU_SHARE of the timeout
+        self.size = size or int(os.getenv("AGENTRIX_SANDBOX_WORKERS", "4"))
+        self.timeout = timeout or float(os.getenv("AGENTRIX_SANDBOX_TIMEOUT", "60"))
+        self.memory_mb = memory_mb if memory_mb is not None else int(os.getenv("AGENTRIX_SANDBOX_MEMORY_MB", "2048"))
+        if cpu_seconds is None and os.getenv("AGENTRIX_SANDBOX_CPU_SECONDS"):
+            cpu_seconds = float(os.getenv("AGENTRIX_SANDBOX_CPU_SECONDS"))
+        if cpu_seconds is None:
+            cpu_seconds = self.timeout * CPU_SHARE
+        elif cpu_seconds and cpu_seconds + 1 >= self.timeout:
+            # RLIMIT_CPU counts whole seconds and a busy tool burns about one CPU second per second, so a
+            # budget that isn't below the wall timeout never fires and spin loops are reported as "timeout"
+            print(f"[-] Sandbox CPU limit {cpu_seconds}s is not below the {self.timeout}s timeout; "
+                  f"using {self.timeout * CPU_SHARE}s")
+            cpu_seconds = self.timeout * CPU_SHARE
+        self.cpu_seconds = cpu_seconds
+        self.max_calls = max_calls or int(os.getenv("AGENTRIX_SANDBOX_MAX_CALLS", "100"))
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if "forkserver" in methods:
+            self._ctx.set_forkserver_preload(["agents.sandbox"])
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._closed = False
+        # Workers idle, busy or being replaced; lowered when a replacement can't be started
+        self._live = self.size
+        self._spawn_error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.memory_mb, self.cpu_seconds)
+
+    def _replace(self, worker: _Worker):
+        worker.kill()
+        if not self._closed:
+            # Start the replacement off the caller's path
+            threading.Thread(target=self._respawn, daemon=True).start()
+
+    def _respawn(self):
+        for attempt in range(self.spawn_attempts):
+            try:
+                self._idle.put(self._spawn())
+                return
+            except Exception as e:
+                error = e
+                time.sleep(0.5 * 2 ** attempt)
+        print(f"[-] Sandbox worker could not be restarted: {error}")
+        with self._lock:
+            self._live -= 1
+            self._spawn_error = error
+
+    def _acquire(self) -> Optional[_Worker]:
+        """An idle worker, or None once no worker is left and a fresh one can't be started."""
+        while True:
+            try:
+                return self._idle.get(timeout=1.0)
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._live > 0:
+                    continue
+                # Every replacement failed; try once more in case the cause was transient
+                try:
+                    worker = self._spawn()
+                except Exception as e:
+                    self._spawn_error = e
+                    return None
+                self._live += 1
+                return worker
+
+    def _death_error(self, worker: _Worker) -> Dict[str, Any]:
+        worker.process.join(timeout=1)
+        code = worker.process.exitcode
+        if code is not None and code < 0 and -code == getattr(signal, "SIGXCPU", None):
+            return {"error": f"Tool exceeded the CPU limit of {self.cpu_seconds}s", "error_type": "cpu_limit"}
+        if code is not None and code < 0 and -code == signal.SIGKILL:
+            return {"error": "Tool worker was killed (likely out of memory)", "error_type": "memory_limit"}
+        return {"error": f"Tool worker crashed (exit code {code})", "error_type": "crash"}
+
+    def run(self, tool_name: str, file_path: str, params: Dict[str, Any], blob_dir: Optional[str] = None) -> Any:
+        worker = self._acquire()
+        if worker is None:
+            return {"error": f"No sandbox worker could be started: {self._spawn_error}",
+                    "error_type": "sandbox_unavailable"}
+        healthy = True
+        try:
+            worker.calls += 1
+            try:
+                worker.conn.send((tool_name, os.path.abspath(file_path), params, blob_dir))
+            except (TypeError, AttributeError, ValueError) as e:
+                return {"error": f"Tool params could not be sent to the sandbox: {e}", "error_type": "unpicklable_params"}
+            if not worker.conn.poll(self.timeout):
+                healthy = False
+                return {"error": f"Tool timed out after {self.timeout}s", "error_type": "timeout"}
+            status, payload = worker.conn.recv()
+            return payload
+        except (EOFError, OSError):
+            healthy = False
+            return self._death_error(worker)
+        finally:
+            if healthy and worker.process.is_alive() and worker.calls < self.max_calls:
+                self._idle.put(worker)
+            else:
+                self._replace(worker)
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[ToolWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> ToolWorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ToolWorkerPool()
+            atexit.register(_pool.shutdown)
+        return _pool
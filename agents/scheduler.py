@@ -0,0 +1,153 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# run_step(step, step_context) -> (success, output, context_updates)
+StepRunner = Callable[[Dict[str, Any], Dict[str, Any]], Tuple[bool, Any, Dict[str, Any]]]
+
+# Returned by next() when a streamed plan is exhausted
+_END = object()
+
+
+class PlanScheduler:
+    """Runs plan steps as a dependency DAG on a bounded thread pool.
+
+    A step may declare `depends_on` as a list of earlier tool names or step indices.
+    Steps without the field depend on the step before them, so plans from older
+    prompts keep running sequentially.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or int(os.getenv("AGENTRIX_MAX_PARALLEL_STEPS", "4"))
+
+    def resolve_dependencies(self, plan: List[Dict[str, Any]]) -> List[Set[int]]:
+        return [self._dependencies(plan, i) for i in range(len(plan))]
+
+    def _dependencies(self, plan: List[Dict[str, Any]], i: int) -> Set[int]:
+        # Only looks at earlier steps, so it works while later steps are still arriving
+        step = plan[i]
+        if "depends_on" not in step or step["depends_on"] is None:
+            return {i - 1} if i > 0 else set()
+        resolved = set()
+        for ref in step["depends_on"]:
+            idx = self._resolve_ref(plan, i, ref)
+            if idx is None:
+                print(f"[-] Step '{step['tool_name']}' depends on unknown earlier step {ref!r}; ignoring.")
+            else:
+                resolved.add(idx)
+        return resolved
+
+    def _resolve_ref(self, plan: List[Dict[str, Any]], i: int, ref: Any):
+        if isinstance(ref, int) and not isinstance(ref, bool):
+            return ref if 0 <= ref < i else None
+        # Latest earlier step with that tool name
+        for j in range(i - 1, -1, -1):
+            if plan[j]["tool_name"] == ref:
+                return j
+        return None
+
+    def _ancestors(self, deps: List[Set[int]]) -> List[List[int]]:
+        closure = []
+        for direct in deps:
+            closure.append(self._closure(direct, closure))
+        return closure
+
+    def _closure(self, direct: Set[int], closure: List[List[int]]) -> List[int]:
+        seen = set()
+        for d in direct:
+            seen.add(d)
+            seen.update(closure[d])
+        return sorted(seen)
+
+    def _step_context(self, plan, i, ancestors, outputs, context) -> Dict[str, Any]:
+        # Shared values (e.g. user answers) plus outputs of this step's dependencies, in plan order
+        step_context = dict(context)
+        for j in ancestors[i]:
+            step_context[plan[j]["tool_name"]] = outputs[j]
+        return step_context
+
+    def run(self, plan: Iterable[Dict[str, Any]], run_step: StepRunner, context: Dict[str, Any],
+            on_step: Optional[Callable[[Dict[str, Any]], None]] = None) -> bool:
+        """Execute the plan, merging outputs into `context` in plan order. Returns True if every step succeeded.
+
+        `plan` may also be an iterator that is still producing steps (a plan streamed from
+        the LLM): each step is scheduled as soon as it arrives and its dependencies have
+        succeeded, and `on_step` is called with it first. After a step fails no more steps
+        are pulled. An exception raised by the iterator is re-raised once running steps finish.
+        """
+        steps: List[Dict[str, Any]] = []
+        deps: List[Set[int]] = []
+        ancestors: List[List[int]] = []
+        outputs: Dict[int, Any] = {}
+        status: Dict[int, bool] = {}
+        pending = set()
+        running = {}
+        failed = False
+        plan_error = None
+
+        def add(step):
+            if on_step:
+                on_step(step)
+            steps.append(step)
+            deps.append(self._dependencies(steps, len(steps) - 1))
+            ancestors.append(self._closure(deps[-1], ancestors))
+            pending.add(len(steps) - 1)
+
+        source = None
+        if isinstance(plan, list):
+            for step in plan:
+                add(step)
+        else:
+            source = iter(plan)
+            # One context for every pull, so spans opened inside the iterator are closed where they were opened
+            source_context = contextvars.copy_context()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="plan-stream") as feeder:
+            fetch = feeder.submit(source_context.run, next, source, _END) if source else None
+            while pending or running or fetch:
+                if not failed:
+                    for i in sorted(pending):
+                        if all(status.get(d) is True for d in deps[i]):
+                            pending.discard(i)
+                            step_context = self._step_context(steps, i, ancestors, outputs, context)
+                            # Carry the caller's context (e.g. the open trace span) into the worker thread
+                            running[pool.submit(contextvars.copy_context().run, run_step, steps[i], step_context)] = i
+                if not running and not fetch:
+                    break
+
+                done, _ = wait(list(running) + ([fetch] if fetch else []), return_when=FIRST_COMPLETED)
+                if fetch in done:
+                    try:
+                        step = fetch.result()
+                    except Exception as e:
+                        print(f"[-] Planning Error: {e}")
+                        plan_error, step, failed = e, _END, True
+                    fetch = None
+                    if step is not _END and not failed:
+                        add(step)
+                        fetch = feeder.submit(source_context.run, next, source, _END)
+                for future in sorted((f for f in done if f in running), key=running.get):
+                    i = running.pop(future)
+                    try:
+                        success, output, updates = future.result()
+                    except Exception as e:
+                        print(f"[-] Execution Error during step '{steps[i]['tool_name']}': {e}")
+                        success, output, updates = False, None, {}
+                    status[i] = success
+                    context.update(updates or {})
+                    if success:
+                        outputs[i] = output
+                    else:
+                        failed = True
+            if source is not None and hasattr(source, "close"):
+                # Stop a stream that was abandoned after a failure
+                feeder.submit(source_context.run, source.close).result()
+
+        for i in range(len(steps)):
+            if i in outputs:
+                context[steps[i]["tool_name"]] = outputs[i]
+        if plan_error is not None:
+            raise plan_error
+        return not failed and len(outputs) == len(steps)
@@ -0,0 +1,337 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+from .blob_store import prompt_view
+from .llm import LLMClient
+
+# Characters per token, the usual rough estimate for English and JSON
+CHARS_PER_TOKEN = 4
+# Room left in each prompt for the instructions and the request
+PROMPT_OVERHEAD_TOKENS = 400
+# Merge rounds before the remaining partial summaries are cut to fit one prompt
+MAX_REDUCE_ROUNDS = 4
+
+_SCALAR_TYPES = {
+    "str": (str,), "string": (str,), "int": (int,), "integer": (int,), "float": (int, float),
+    "number": (int, float), "bool": (bool,), "boolean": (bool,),
+}
+
+
+def _declared_type(details: Any) -> str:
+    if isinstance(details, dict):
+        details = details.get("type", "Any")
+    return str(details).strip().lower()
+
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _type_ok(value: Any, declared: str) -> bool:
+    if declared in ("any", ""):
+        return True
+    if declared.startswith("optional[") and value is None:
+        return True
+    expected = _SCALAR_TYPES.get(declared.replace("optional[", "").rstrip("]"))
+    if expected is None:
+        return False
+    # bool is an int subclass but not a number here
+    return isinstance(value, expected) and not (isinstance(value, bool) and bool not in expected)
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    if value is None:
+        return "none"
+    return str(value)
+
+
+class SummaryCache:
+    """Bounded LRU of summaries keyed by the request and the exact result."""
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or int(os.getenv("AGENTRIX_SUMMARY_CACHE_SIZE", "256"))
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return summary
+
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+summary_cache = SummaryCache()
+
+
+class ResultSummarizer:
+    """Turns a run's tool outputs into the final answer, as cheaply as the result allows.
+
+    - Small results whose fields all match the tool's `outputs` schema are rendered
+      locally from a template, without an LLM call (AGENTRIX_SUMMARY_LOCAL=0 disables this).
+    - Results that fit in AGENTRIX_SUMMARY_TOKEN_BUDGET tokens are summarized in one call.
+    - Larger results are split into chunks that are summarized in parallel (up to
+      AGENTRIX_SUMMARY_PARALLEL at once) and the partial summaries merged.
+
+    LLM summaries are cached per request and result.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, token_budget: int = None, cache: SummaryCache = None):
+        self.llm = LLMClient("summarizer", model_name)
+        self.token_budget = token_budget or int(os.getenv("AGENTRIX_SUMMARY_TOKEN_BUDGET", "6000"))
+        self.parallel = int(os.getenv("AGENTRIX_SUMMARY_PARALLEL", "4"))
+        self.max_chunks = int(os.getenv("AGENTRIX_SUMMARY_MAX_CHUNKS", "32"))
+        self.local_enabled = os.getenv("AGENTRIX_SUMMARY_LOCAL", "1") != "0"
+        self.local_max_chars = int(os.getenv("AGENTRIX_SUMMARY_LOCAL_MAX_CHARS", "400"))
+        self.cache = cache or summary_cache
+
+    # -- local templates -------------------------------------------------
+
+    def render_local(self, result: Dict[str, Any], schemas: Optional[Dict[str, Dict[str, Any]]]) -> Optional[str]:
+        """Template summary of small, schema-conforming outputs, or None if the LLM is needed."""
+        if not self.local_enabled or not schemas or not isinstance(result, dict) or not result:
+            return None
+        lines = []
+        for tool_name, output in result.items():
+            schema = schemas.get(tool_name)
+            line = self._render_output(tool_name, output, schema) if schema is not None else None
+            if line is None:
+                return None
+            lines.append(line)
+        text = "\n".join(lines)
+        return text if len(text) <= self.local_max_chars else None
+
+    def _render_output(self, tool_name: str, output: Any, schema: Dict[str, Any]) -> Optional[str]:
+        label = tool_name.replace("_", " ").strip().capitalize()
+        if _is_scalar(output):
+            if len(schema) > 1 or (schema and not _type_ok(output, _declared_type(next(iter(schema.values()))))):
+                return None
+            return f"{label}: {_format(output)}."
+        if not isinstance(output, dict) or not output or output.get("error"):
+            return None
+        fields = []
+        # Schema order first, so related tools read consistently
+        for key in list(schema) + [k for k in output if k not in schema]:
+            if key not in output:
+                continue
+            value = output[key]
+            if key not in schema or not _is_scalar(value) or not _type_ok(value, _declared_type(schema[key])):
+                return None
+            if isinstance(value, str) and (len(value) > 160 or "\n" in value):
+                return None
+            fields.append((key, value))
+        message = next((v for k, v in fields if k in ("message", "summary", "result") and isinstance(v, str)), None)
+        if message and len(fields) <= 2:
+            return f"{label}: {message}"
+        return f"{label}: " + ", ".join(f"{k.replace('_', ' ')} is {_format(v)}" for k, v in fields) + "."
+
+    # -- prompts ---------------------------------------------------------
+
+    def _view(self, result: Any) -> str:
+        # Chunking bounds the prompt size, so values are cut far less than in other prompts
+        chunk_chars = self._chunk_chars()
+        view = prompt_view(result, max_chars=chunk_chars * self.max_chunks, max_items=1000)
+        return json.dumps(view, indent=2, ensure_ascii=False, default=str)
+
+    def _chunk_chars(self) -> int:
+        return max(1000, (self.token_budget - PROMPT_OVERHEAD_TOKENS) * CHARS_PER_TOKEN)
+
+    def _messages(self, user_request: str, result_text: str) -> List[Any]:
+        from langchain_core.messages import HumanMessage, SystemMessage
+        system_prompt = f"""
+        You are a RESULTS SUMMARIZER.
+        User Original Request: {user_request}
+        Tool Execution Result: {result_text}
+
+        Task: Provide a natural language summary of the result that answers the user's request.
+        """
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="Summarize the result.")
+        ]
+
+    def _chunk_messages(self, user_request: str, chunk: str, index: int, total: int) -> List[Any]:
+        from langchain_core.messages import HumanMessage, SystemMessage
+        system_prompt = f"""
+        You are a RESULTS SUMMARIZER.
+        User Original Request: {user_request}
+        Part {index} of {total} of the Tool Execution Result (JSON, cut at arbitrary points):
+        {chunk}
+
+        Task: Summarize only the facts in this part that are relevant to the user's request. Keep numbers,
+        names and identifiers exact. Be brief; the parts are merged afterwards.
+        """
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="Summarize this part.")
+        ]
+
+    def _merge_messages(self, user_request: str, partials: List[str]) -> List[Any]:
+        from langchain_core.messages import HumanMessage, SystemMessage
+        parts = "\n".join(f"- Part {i}: {p.strip()}" for i, p in enumerate(partials, 1))
+        system_prompt = f"""
+        You are a RESULTS SUMMARIZER.
+        User Original Request: {user_request}
+        Summaries of consecutive parts of the Tool Execution Result:
+        {parts}
+
+        Task: Merge these into one natural language summary that answers the user's request.
+        """
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="Summarize the result.")
+        ]
+
+    def _chunks(self, text: str) -> List[str]:
+        size = self._chunk_chars()
+        chunks, current = [], ""
+        for line in text.splitlines(keepends=True):
+            while len(line) > size:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line[:size])
+                line = line[size:]
+            if len(current) + len(line) > size:
+                chunks.append(current)
+                current = ""
+            current += line
+        if current:
+            chunks.append(current)
+        if len(chunks) > self.max_chunks:
+            dropped = len(chunks) - self.max_chunks
+            chunks = chunks[:self.max_chunks]
+            chunks[-1] += f"\n... ({dropped} more parts of the result not shown)"
+        return chunks
+
+    def _fits(self, text: str) -> bool:
+        return len(text) // CHARS_PER_TOKEN + PROMPT_OVERHEAD_TOKENS <= self.token_budget
+
+    def _key(self, user_request: str, text: str) -> str:
+        return hashlib.sha256(f"{user_request.strip()}\0{text}".encode("utf-8")).hexdigest()
+
+    # -- map-reduce ------------------------------------------------------
+
+    def _map(self, user_request: str, chunks: List[str]) -> List[str]:
+        def summarize(i):
+            return self.llm.invoke(self._chunk_messages(user_request, chunks[i], i + 1, len(chunks))).content
+
+        return self._parallel(summarize, range(len(chunks)))
+
+    def _parallel(self, fn, items) -> List[str]:
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.parallel, len(items)))) as pool:
+            # Each call keeps the caller's trace span as its parent
+            futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+            return [f.result() for f in futures]
+
+    def _reduce_groups(self, partials: List[str]) -> List[List[str]]:
+        # Consecutive partials grouped so each merge prompt fits the budget
+        groups, current, size = [], [], 0
+        limit = self._chunk_chars()
+        for partial in partials:
+            if current and size + len(partial) > limit:
+                groups.append(current)
+                current, size = [], 0
+            current.append(partial)
+            size += len(partial) + 16
+        groups.append(current)
+        return groups
+
+    def _partials(self, user_request: str, text: str) -> List[str]:
+        """Partial summaries small enough to merge in a single prompt."""
+        partials = self._map(user_request, self._chunks(text))
+        for _ in range(MAX_REDUCE_ROUNDS):
+            groups = self._reduce_groups(partials)
+            if len(groups) == 1:
+                return partials
+            if len(groups) == len(partials):
+                # Every partial fills a prompt on its own, so merging would not shrink the list
+                break
+            partials = self._parallel(lambda group: self.llm.invoke(self._merge_messages(user_request, group)).content,
+                                      groups)
+        share = max(200, self._chunk_chars() // len(partials))
+        return [p if len(p) <= share else p[:share] + " ..." for p in partials]
+
+    # -- entry points ----------------------------------------------------
+
+    def summarize(self, user_request: str, result: Any, schemas: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        return "".join(self.stream(user_request, result, schemas))
+
+    def stream(self, user_request: str, result: Any, schemas: Optional[Dict[str, Dict[str, Any]]] = None) -> Iterator[str]:
+        """Yield the summary as it is produced. Errors fall back to the raw result."""
+        local = self.render_local(result, schemas)
+        if local is not None:
+            yield local
+            return
+        text = self._view(result)
+        key = self._key(user_request, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        try:
+            if self._fits(text):
+                messages = self._messages(user_request, text)
+            else:
+                messages = self._merge_messages(user_request, self._partials(user_request, text))
+            for chunk in self.llm.stream(messages):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            if not parts:
+                yield f"Raw Result: {result}"
+            else:
+                # Part of the summary is already out; end it there and don't cache it
+                print(f"\n[-] Summary interrupted: {e}")
+            return
+        if parts:
+            self.cache.put(key, "".join(parts))
+
+    async def asummarize(self, user_request: str, result: Any, schemas: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        local = self.render_local(result, schemas)
+        if local is not None:
+            return local
+        text = self._view(result)
+        key = self._key(user_request, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            if self._fits(text):
+                response = await self.llm.ainvoke(self._messages(user_request, text))
+            else:
+                partials = await asyncio.to_thread(self._partials, user_request, text)
+                response = await self.llm.ainvoke(self._merge_messages(user_request, partials))
+        except Exception:
+            return f"Raw Result: {result}"
+        if response.content:
+            self.cache.put(key, response.content)
+        return response.content
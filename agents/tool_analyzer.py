@@ -0,0 +1,576 @@
+import ast
+import builtins
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+# Calls that run shell commands or replace/kill processes, by fully resolved name
+BLOCKED_CALLS = {
+    "os.system", "os.popen", "os.kill", "os.killpg", "os.fork", "os.forkpty",
+    "os.execl", "os.execle", "os.execlp", "os.execlpe", "os.execv", "os.execve", "os.execvp", "os.execvpe",
+    "os.spawnl", "os.spawnle", "os.spawnlp", "os.spawnlpe", "os.spawnv", "os.spawnve", "os.spawnvp", "os.spawnvpe",
+    "os.posix_spawn", "os.posix_spawnp", "shutil.rmtree", "subprocess.getoutput", "subprocess.getstatusoutput",
+    "pty.spawn", "subprocess.call",
+}
+# subprocess may only start one of LAUNCHERS (opening a file, URL or app), named by a literal, without a shell;
+# subprocess.call stays banned outright, as it always was
+SUBPROCESS_CALLS = {"subprocess.run", "subprocess.Popen", "subprocess.check_call", "subprocess.check_output"}
+LAUNCHERS = {"open", "xdg-open", "gio", "start", "explorer", "explorer.exe"}
+BLOCKED_MODULES = {"ctypes", "pty", "marshal"}
+DYNAMIC_CALLS = {"eval", "exec", "compile", "__import__"}
+
+# Purity is proven, not assumed: a tool is pure only if every call it makes is listed below (or is one of its
+# own helpers). Anything else -- third-party modules, methods of objects we can't trace -- counts as a side effect.
+PURE_BUILTINS = {
+    "abs", "all", "any", "ascii", "bin", "bool", "bytearray", "bytes", "callable", "chr", "complex", "dict",
+    "divmod", "enumerate", "filter", "float", "format", "frozenset", "getattr", "hasattr", "hash", "hex", "int",
+    "isinstance", "issubclass", "iter", "len", "list", "map", "max", "min", "next", "object", "oct", "ord", "pow",
+    "range", "repr", "reversed", "round", "set", "slice", "sorted", "str", "sum", "super", "tuple", "type", "zip",
+    "property", "staticmethod", "classmethod",
+}
+# Whole modules, and single names, whose functions depend only on their arguments
+PURE_MODULES = {
+    "math", "cmath", "statistics", "re", "json", "string", "textwrap", "itertools", "functools", "operator",
+    "collections", "heapq", "bisect", "decimal", "fractions", "hashlib", "hmac", "base64", "binascii",
+    "unicodedata", "urllib.parse", "html", "copy", "dataclasses", "typing", "enum", "numbers", "difflib",
+    "calendar", "struct", "zlib", "colorsys", "ipaddress", "shlex", "fnmatch", "keyword", "platform",
+}
+PURE_CALLS = {
+    "datetime.datetime", "datetime.date", "datetime.time", "datetime.timedelta", "datetime.timezone",
+    "time.strptime", "time.mktime", "os.path.join", "os.path.basename", "os.path.dirname", "os.path.splitext",
+    "os.path.split", "os.path.normpath", "os.path.normcase", "os.path.isabs", "os.path.commonpath",
+    "pathlib.Path", "pathlib.PurePath", "pathlib.PurePosixPath", "pathlib.PureWindowsPath",
+}
+PURE_CONSTANTS = {"os.sep", "os.linesep", "os.pathsep", "os.name", "os.path.sep", "sys.maxsize", "sys.platform",
+                  "sys.version", "sys.version_info", "sys.float_info"}
+# Reads whose result changes over time: the tool stays pure but its results expire
+TIME_CALLS = {
+    "time.time", "time.time_ns", "time.monotonic", "time.perf_counter", "time.localtime", "time.gmtime",
+    "time.ctime", "time.asctime", "time.strftime", "datetime.datetime.now", "datetime.datetime.utcnow",
+    "datetime.datetime.today", "datetime.date.today",
+}
+FS_READ_CALLS = {
+    "os.listdir", "os.scandir", "os.walk", "os.stat", "os.getcwd", "os.path.exists", "os.path.isfile",
+    "os.path.isdir", "os.path.islink", "os.path.getsize", "os.path.getmtime", "os.path.getctime",
+    "os.path.getatime", "os.path.abspath", "os.path.realpath", "os.path.expanduser", "glob.glob", "glob.iglob",
+    "shutil.disk_usage", "shutil.which", "pathlib.Path.cwd", "pathlib.Path.home",
+}
+# Methods of str/list/dict/set, dates, regex matches, hashes and HTTP responses that only compute on the object
+PURE_METHODS = {
+    "capitalize", "casefold", "center", "count", "encode", "decode", "endswith", "expandtabs", "find", "format",
+    "format_map", "index", "isalnum", "isalpha", "isascii", "isdecimal", "isdigit", "isidentifier", "islower",
+    "isnumeric", "isprintable", "isspace", "istitle", "isupper", "join", "ljust", "lower", "lstrip", "maketrans",
+    "partition", "removeprefix", "removesuffix", "replace", "rfind", "rindex", "rjust", "rpartition", "rsplit",
+    "rstrip", "split", "splitlines", "startswith", "strip", "swapcase", "title", "translate", "upper", "zfill",
+    "hex", "fromhex", "append", "extend", "insert", "pop", "remove", "clear", "copy", "sort", "reverse", "get",
+    "items", "keys", "values", "setdefault", "update", "fromkeys", "popitem", "add", "discard", "union",
+    "intersection", "difference", "symmetric_difference", "issubset", "issuperset", "isdisjoint", "most_common",
+    "elements", "group", "groups", "groupdict", "span", "start", "end", "match", "search", "fullmatch", "findall",
+    "finditer", "sub", "subn", "strftime", "isoformat", "timestamp", "date", "time", "weekday", "isoweekday",
+    "isocalendar", "total_seconds", "astimezone", "is_integer", "as_integer_ratio", "bit_length", "conjugate",
+    "quantize", "normalize", "hexdigest", "digest", "with_suffix", "with_name", "with_stem", "joinpath",
+    "as_posix", "relative_to", "is_absolute", "json", "raise_for_status",
+}
+FS_READ_METHODS = {"read", "readline", "readlines", "read_text", "read_bytes", "exists", "is_file", "is_dir",
+                   "is_symlink", "iterdir", "glob", "rglob", "stat", "lstat", "resolve", "absolute", "expanduser"}
+NETWORK_PREFIXES = ("requests.", "httpx.", "urllib.request.", "aiohttp.", "http.client.", "socket.")
+# Network calls that only read, so a tool using nothing else is pure up to a TTL
+NETWORK_READ_CALLS = {"requests.get", "requests.head", "httpx.get", "httpx.head", "urllib.request.urlopen",
+                      "urllib.request.Request"}
+# Process state a tool may read but that a cached result would not follow
+IMPURE_READS = {"os.environ", "sys.argv", "sys.stdin"}
+
+_BUILTINS = set(dir(builtins)) | {"__file__", "__name__", "__doc__", "__builtins__", "__spec__", "__loader__"}
+
+
+def _source(code: str, node: Optional[ast.AST]) -> Optional[str]:
+    if node is None:
+        return None
+    if hasattr(ast, "unparse"):
+        return ast.unparse(node)
+    return ast.get_source_segment(code, node)
+
+
+def _literal(node: ast.AST) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+class _Names(ast.NodeVisitor):
+    """Resolves local aliases (import x as y, from x import y, z = x.y) to dotted module paths."""
+
+    def __init__(self):
+        self.aliases: Dict[str, str] = {}
+        self.bound: Set[str] = set()
+        self.imports: List[str] = []
+        # Top-level modules the code imports, to tell module paths from attribute chains on local values
+        self.modules: Set[str] = set()
+        self.star_import = False
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append(alias.name)
+            self.modules.add(alias.name.split(".")[0])
+            local = alias.asname or alias.name.split(".")[0]
+            self.aliases[local] = alias.name if alias.asname else local
+            self.bound.add(local)
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ""
+        if node.level == 0:
+            self.imports.append(module)
+            self.modules.add(module.split(".")[0])
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_import = True
+                continue
+            local = alias.asname or alias.name
+            self.aliases[local] = f"{module}.{alias.name}" if module else alias.name
+            self.bound.add(local)
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        for target in node.targets:
+            self._bind_target(target)
+        # sh = os.system
+        if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            resolved = self.resolve(node.value)
+            if resolved and "." in resolved:
+                self.aliases[node.targets[0].id] = resolved
+
+    def visit_AnnAssign(self, node):
+        self.generic_visit(node)
+        self._bind_target(node.target)
+
+    def visit_AugAssign(self, node):
+        self.generic_visit(node)
+        self._bind_target(node.target)
+
+    def visit_NamedExpr(self, node):
+        self.generic_visit(node)
+        self._bind_target(node.target)
+
+    def visit_For(self, node):
+        self._bind_target(node.target)
+        self.generic_visit(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_comprehension(self, node):
+        self._bind_target(node.target)
+        self.generic_visit(node)
+
+    def visit_withitem(self, node):
+        if node.optional_vars is not None:
+            self._bind_target(node.optional_vars)
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.bound.update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def _visit_function(self, node):
+        self.bound.add(node.name)
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [a for a in (args.vararg, args.kwarg) if a]:
+            self.bound.add(arg.arg)
+        self.generic_visit(node)
+
+    visit_FunctionDef = visit_AsyncFunctionDef = _visit_function
+
+    def visit_Lambda(self, node):
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [a for a in (args.vararg, args.kwarg) if a]:
+            self.bound.add(arg.arg)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node):
+        self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def _bind_target(self, target):
+        for node in ast.walk(target):
+            if isinstance(node, ast.Name):
+                self.bound.add(node.id)
+
+    def is_module(self, node: ast.AST) -> bool:
+        """Whether a Name/Attribute chain starts at an imported module (os.path, sqrt) rather than a local value."""
+        while isinstance(node, ast.Attribute):
+            node = node.value
+        return isinstance(node, ast.Name) and node.id in self.aliases \
+            and self.aliases[node.id].split(".")[0] in self.modules
+
+    def resolve(self, node: ast.AST) -> Optional[str]:
+        """Dotted name of a Name/Attribute chain with aliases expanded, e.g. `o.path.join` -> `os.path.join`."""
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "__import__" \
+                and node.args and isinstance(_literal(node.args[0]), str):
+            base = _literal(node.args[0])
+        elif isinstance(node, ast.Name):
+            base = self.aliases.get(node.id, node.id)
+        else:
+            return None
+        return ".".join([base] + list(reversed(parts)))
+
+
+class ToolAnalyzer:
+    """Static analysis of generated tool code: safety verdict plus registry metadata, without an LLM.
+
+    Verdicts are cached by code hash (and expected tool name), so validating and
+    registering the same code twice parses it once.
+    """
+
+    def __init__(self, max_entries: int = 256, network_ttl: int = None, volatile_ttl: int = None):
+        self.max_entries = max_entries
+        # cache_ttl given to pure tools that read from the network
+        self.network_ttl = network_ttl or int(os.getenv("AGENTRIX_NETWORK_RESULT_TTL", "300"))
+        # cache_ttl given to pure tools that read the clock or the filesystem
+        self.volatile_ttl = volatile_ttl or int(os.getenv("AGENTRIX_VOLATILE_RESULT_TTL", "30"))
+        self._verdicts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, code: str, tool_name: Optional[str] = None) -> Dict[str, Any]:
+        """{"ok", "errors", "warnings", "function", "metadata"}; metadata fits ToolRegistryEntry.
+
+        The description in metadata is the docstring's first paragraph, empty if there is none.
+        """
+        key = hashlib.sha256(f"{tool_name}\0{code}".encode("utf-8")).hexdigest()
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self._verdicts.move_to_end(key)
+                return verdict
+        verdict = self._analyze(code, tool_name)
+        with self._lock:
+            self._verdicts[key] = verdict
+            while len(self._verdicts) > self.max_entries:
+                self._verdicts.popitem(last=False)
+        return verdict
+
+    def _analyze(self, code: str, tool_name: Optional[str]) -> Dict[str, Any]:
+        errors: List[str] = []
+        warnings: List[str] = []
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            return {"ok": False, "errors": [f"Syntax error: {e}"], "warnings": [], "function": None, "metadata": None}
+
+        names = _Names()
+        names.visit(tree)
+        func = self._pick_function(tree, tool_name)
+        if func is None:
+            errors.append(f"No function named '{tool_name}' defined" if tool_name else "No function defined")
+
+        errors.extend(self._safety(tree, names))
+        errors.extend(self._undefined_names(tree, names))
+        errors.extend(self._missing_modules(names))
+        if func is not None and func.args.kwarg is None:
+            warnings.append(f"'{func.name}' does not accept **kwargs")
+
+        metadata = self._metadata(code, tree, func, names) if func is not None else None
+        return {"ok": not errors, "errors": errors, "warnings": warnings,
+                "function": func.name if func is not None else None, "metadata": metadata}
+
+    # -- safety ----------------------------------------------------------
+
+    def _safety(self, tree: ast.AST, names: _Names) -> List[str]:
+        errors = []
+        for module in names.imports:
+            if module.split(".")[0] in BLOCKED_MODULES:
+                errors.append(f"Disallowed import '{module}'")
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            resolved = names.resolve(node.func)
+            if resolved is None:
+                continue
+            if resolved in BLOCKED_CALLS:
+                errors.append(f"Disallowed call '{resolved}' (line {node.lineno})")
+            elif resolved in SUBPROCESS_CALLS and not self._is_launch(node):
+                errors.append(f"'{resolved}' may only start one of {sorted(LAUNCHERS)}, named by a literal and "
+                              f"without shell=True (line {node.lineno})")
+            elif resolved in DYNAMIC_CALLS and resolved not in names.bound:
+                if resolved == "__import__" and node.args and isinstance(_literal(node.args[0]), str):
+                    module = _literal(node.args[0])
+                    if module.split(".")[0] in BLOCKED_MODULES:
+                        errors.append(f"Disallowed import '{module}' (line {node.lineno})")
+                    continue
+                errors.append(f"Dynamic code execution '{resolved}()' (line {node.lineno})")
+            elif resolved == "getattr" and len(node.args) >= 2:
+                # getattr(os, "system")
+                base, attr = names.resolve(node.args[0]), _literal(node.args[1])
+                if base and isinstance(attr, str) and f"{base}.{attr}" in BLOCKED_CALLS:
+                    errors.append(f"Disallowed call '{base}.{attr}' via getattr (line {node.lineno})")
+        return errors
+
+    def _is_launch(self, node: ast.Call) -> bool:
+        """subprocess.run(["xdg-open", path]) and the like: a literal launcher program, no shell."""
+        if any(kw.arg == "shell" and _literal(kw.value) is not False for kw in node.keywords):
+            return False
+        command = node.args[0] if node.args else next((kw.value for kw in node.keywords if kw.arg == "args"), None)
+        if isinstance(command, (ast.List, ast.Tuple)) and command.elts:
+            command = command.elts[0]
+        program = _literal(command) if command is not None else None
+        return isinstance(program, str) and program.replace("\\", "/").rsplit("/", 1)[-1].lower() in LAUNCHERS
+
+    def _undefined_names(self, tree: ast.AST, names: _Names) -> List[str]:
+        if names.star_import:
+            return []
+        # Scope-insensitive: catches forgotten imports and typos, the common NameErrors in generated code
+        missing = sorted({node.id for node in ast.walk(tree)
+                          if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+                          and node.id not in names.bound and node.id not in _BUILTINS})
+        return [f"Undefined name '{name}'" for name in missing]
+
+    def _missing_modules(self, names: _Names) -> List[str]:
+        errors = []
+        for module in sorted({m.split(".")[0] for m in names.imports if m}):
+            if module in sys.builtin_module_names:
+                continue
+            try:
+                found = importlib.util.find_spec(module) is not None
+            except (ImportError, ValueError):
+                found = False
+            if not found:
+                errors.append(f"Module '{module}' is not installed")
+        return errors
+
+    # -- metadata --------------------------------------------------------
+
+    def _pick_function(self, tree: ast.Module, tool_name: Optional[str]):
+        funcs = [n for n in tree.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        if tool_name:
+            return next((f for f in funcs if f.name == tool_name), None)
+        public = [f for f in funcs if not f.name.startswith("_")] or funcs
+        # The builder is told to accept **kwargs; helpers usually don't
+        with_kwargs = [f for f in public if f.args.kwarg is not None]
+        return (with_kwargs or public or [None])[-1]
+
+    def _metadata(self, code: str, tree: ast.Module, func, names: _Names) -> Dict[str, Any]:
+        args = func.args
+        positional = args.posonlyargs + args.args
+        defaults = dict(zip([a.arg for a in positional[len(positional) - len(args.defaults):]], args.defaults))
+        defaults.update({a.arg: d for a, d in zip(args.kwonlyargs, args.kw_defaults) if d is not None})
+
+        inputs: Dict[str, Any] = {}
+        annotations: Dict[str, str] = {}
+        for arg in positional + args.kwonlyargs:
+            if arg.arg in ("self", "cls"):
+                continue
+            type_name = _source(code, arg.annotation) or "Any"
+            annotations[arg.arg] = type_name
+            if arg.arg in defaults:
+                inputs[arg.arg] = {"type": type_name, "default": _literal(defaults[arg.arg])}
+            else:
+                inputs[arg.arg] = type_name
+
+        doc = ast.get_docstring(func) or ""
+        description = doc.strip().split("\n\n")[0].replace("\n", " ").strip()
+        example_args = ", ".join(f"{name}={self._example_value(t)!r}" for name, t in inputs.items()
+                                 if not isinstance(t, dict))
+        effects = self._effects(tree, func, names)
+        pure = "side_effect" not in effects
+        # Read-only network, clock and filesystem tools are pure, but their results go stale
+        ttls = [ttl for effect, ttl in (("network_read", self.network_ttl), ("time", self.volatile_ttl),
+                                        ("fs_read", self.volatile_ttl)) if effect in effects]
+        return {
+            "tool_name": func.name,
+            "description": description,
+            "inputs": inputs,
+            "outputs": self._outputs(code, func, annotations),
+            "usage_example": f"{func.name}({example_args})",
+            "pure": pure,
+            "cache_ttl": min(ttls) if pure and ttls else None,
+        }
+
+    def _outputs(self, code: str, func, annotations: Dict[str, str]) -> Dict[str, Any]:
+        outputs: Dict[str, Any] = {}
+        returns = [n for n in self._own_nodes(func) if isinstance(n, ast.Return) and n.value is not None]
+        for ret in returns:
+            if isinstance(ret.value, ast.Dict):
+                for k, v in zip(ret.value.keys, ret.value.values):
+                    if isinstance(k, ast.Constant) and isinstance(k.value, str):
+                        inferred = self._value_type(v, annotations)
+                        if outputs.get(k.value) in (None, "Any"):
+                            outputs[k.value] = inferred
+        if not outputs:
+            annotation = _source(code, func.returns)
+            if annotation or returns:
+                outputs["result"] = annotation or "Any"
+        return outputs
+
+    def _own_nodes(self, func):
+        # Nodes of this function, not of nested functions or classes
+        stack = list(func.body)
+        while stack:
+            node = stack.pop()
+            yield node
+            for child in ast.iter_child_nodes(node):
+                if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                    stack.append(child)
+
+    def _value_type(self, node: ast.AST, annotations: Dict[str, str]) -> str:
+        if isinstance(node, ast.Constant):
+            return "None" if node.value is None else type(node.value).__name__
+        if isinstance(node, ast.JoinedStr):
+            return "str"
+        if isinstance(node, (ast.List, ast.ListComp)):
+            return "list"
+        if isinstance(node, (ast.Dict, ast.DictComp)):
+            return "dict"
+        if isinstance(node, (ast.Tuple,)):
+            return "tuple"
+        if isinstance(node, (ast.Set, ast.SetComp)):
+            return "set"
+        if isinstance(node, ast.Compare) or (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not)):
+            return "bool"
+        if isinstance(node, ast.Name) and node.id in annotations:
+            return annotations[node.id]
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            if node.func.id in ("str", "int", "float", "bool", "list", "dict", "tuple", "set", "sorted", "len", "round", "repr"):
+                return {"sorted": "list", "len": "int", "round": "float", "repr": "str"}.get(node.func.id, node.func.id)
+        return "Any"
+
+    def _example_value(self, type_name: str) -> Any:
+        base = type_name.lower()
+        for word, value in (("int", 1), ("float", 1.0), ("bool", True), ("list", []), ("dict", {})):
+            if word in base:
+                return value
+        return "..."
+
+    def _helpers(self, tree: ast.Module) -> Dict[str, List[ast.AST]]:
+        """Module-level functions, classes and lambdas by name; a name bound twice keeps every definition."""
+        helpers: Dict[str, List[ast.AST]] = {}
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                helpers.setdefault(node.name, []).append(node)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        helpers.setdefault(target.id, []).append(node.value)
+        return helpers
+
+    def _effects(self, tree: ast.Module, func, names: _Names) -> Set[str]:
+        """Effects of calling `func`, following calls into module-level helpers.
+
+        A subset of {"side_effect", "network_read", "time", "fs_read"}; empty means pure.
+        """
+        helpers = self._helpers(tree)
+        own_methods = {n.name for defs in helpers.values() for d in defs if isinstance(d, ast.ClassDef)
+                       for n in d.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        effects: Set[str] = set()
+        pending, seen = [func], set()
+        while pending:
+            scope = pending.pop()
+            if id(scope) in seen:
+                continue
+            seen.add(id(scope))
+            # Functions and lambdas defined inside the scope are walked along with it
+            local_funcs = {n.name for n in ast.walk(scope) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+            local_funcs.update(t.id for n in ast.walk(scope) if isinstance(n, ast.Assign)
+                               and isinstance(n.value, ast.Lambda) for t in n.targets if isinstance(t, ast.Name))
+            for node in ast.walk(scope):
+                if isinstance(node, (ast.Name, ast.Attribute)) and isinstance(node.ctx, ast.Load):
+                    if isinstance(node, ast.Name) and node.id in helpers:
+                        # Called, passed on or stored: whatever it does may happen when the tool runs
+                        pending.extend(helpers[node.id])
+                    if names.resolve(node) in IMPURE_READS:
+                        effects.add("side_effect")
+                if not isinstance(node, ast.Call):
+                    continue
+                effects.add(self._call_effect(node, names, helpers, local_funcs, own_methods))
+                # Functions handed to map/sorted/Thread run too
+                for arg in node.args + [kw.value for kw in node.keywords]:
+                    effects.add(self._reference_effect(arg, names))
+        effects.discard("pure")
+        return effects
+
+    def _call_effect(self, node: ast.Call, names: _Names, helpers, local_funcs: Set[str], own_methods: Set[str]) -> str:
+        target = node.func
+        if isinstance(target, ast.Name) and not names.is_module(target):
+            name = target.id
+            if name in helpers or name in local_funcs or name in PURE_BUILTINS:
+                return "pure"
+            if name.endswith(("Error", "Exception", "Warning")) and name in _BUILTINS:
+                return "pure"
+            if name == "open":
+                mode = _literal(node.args[1]) if len(node.args) > 1 else next(
+                    (_literal(kw.value) for kw in node.keywords if kw.arg == "mode"), "r")
+                return "fs_read" if isinstance(mode, str) and not any(c in mode for c in "wax+") else "side_effect"
+            # print, input, a parameter or local holding some callable
+            return "side_effect"
+        if isinstance(target, ast.Lambda):
+            return "pure"
+        if names.is_module(target):
+            return self._module_effect(names.resolve(target), node)
+        if not isinstance(target, ast.Attribute):
+            return "side_effect"
+        # A method of a local value, a literal or a call result: judged by the method name alone
+        method = target.attr
+        if method in own_methods:
+            return "pure"
+        if method == "replace":
+            # str.replace(old, new) and date.replace(year=...) compute; Path.replace(target) moves a file
+            return "side_effect" if len(node.args) == 1 else "pure"
+        if method in PURE_METHODS:
+            return "pure"
+        if method in FS_READ_METHODS:
+            return "fs_read"
+        return "side_effect"
+
+    def _module_effect(self, resolved: str, node: Optional[ast.Call] = None) -> str:
+        if resolved in NETWORK_READ_CALLS and not (node is not None and self._sends_data(node)):
+            return "network_read"
+        if resolved.startswith(NETWORK_PREFIXES):
+            return "side_effect"
+        if resolved in TIME_CALLS:
+            return "time"
+        if resolved in FS_READ_CALLS:
+            return "fs_read"
+        if resolved in PURE_CALLS or resolved in PURE_CONSTANTS:
+            return "pure"
+        if any(resolved.startswith(module + ".") for module in PURE_MODULES | PURE_CALLS):
+            # Functions of a pure module, or class attributes like datetime.timezone.utc
+            return "pure"
+        return "side_effect"
+
+    def _reference_effect(self, node: ast.AST, names: _Names) -> str:
+        """Effect of a function passed as an argument (map(os.remove, files)); values are "pure"."""
+        if isinstance(node, ast.Name) and not names.is_module(node):
+            if node.id in _BUILTINS and node.id not in PURE_BUILTINS and not node.id[:1].isupper():
+                return "side_effect"
+            return "pure"
+        if not names.is_module(node):
+            return "pure"
+        resolved = names.resolve(node)
+        if resolved.rsplit(".", 1)[-1].endswith(("Error", "Exception")):
+            return "pure"
+        return self._module_effect(resolved)
+
+    def _sends_data(self, node: ast.AST) -> bool:
+        # urlopen(url, data) and Request(url, data, method="POST") send a body
+        if not isinstance(node, ast.Call) or not isinstance(node.func, (ast.Name, ast.Attribute)):
+            return False
+        name = node.func.id if isinstance(node.func, ast.Name) else node.func.attr
+        if name not in ("urlopen", "Request"):
+            return False
+        return len(node.args) > 1 or any(kw.arg in ("data", "method") for kw in node.keywords)
+
+
+tool_analyzer = ToolAnalyzer()
@@ -1,18 +1,17 @@
 import os
-from langchain_openai import ChatOpenAI
+import re
+from typing import Any, List, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from registry.schema import ToolRegistryEntry
+from .llm import LLMClient
+from .tool_analyzer import tool_analyzer
 import json
 
 class ToolBuilder:
-    def __init__(self, model_name: str = "gpt-4o"):
-        self.llm = ChatOpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1",
-            model="xiaomi/mimo-v2-flash:free",
-        )
-
-    def build_tool(self, capability: str) -> str:
+    def __init__(self, model_name: Optional[str] = None):
+        self.llm = LLMClient("tool_builder", model_name)
+
+    def _build_messages(self, capability: str) -> List[Any]:
         system_prompt = f"""
         You are a TOOL BUILDER.
         Capability to implement: {capability}
@@ -28,49 +27,100 @@ class ToolBuilder:
 
         Output ONLY the Python code. No markdown formatting, no explanation.
         """
-        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Build a tool for: {capability}")
+        ]
+
+    def _parse_code(self, content: str) -> str:
+        code = content.strip()
+        if code.startswith("```python"):
+            code = code.replace("```python", "").replace("```", "").strip()
+        return code
+
+    def build_tool(self, capability: str, use_cache: bool = True) -> str:
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"Build a tool for: {capability}")
-            ])
+            response = self.llm.invoke(self._build_messages(capability), use_cache=use_cache)
         except Exception as e:
             print(f"[-] API Error in ToolBuilder (Code Gen): {e}")
             return ""
-        
-        code = response.content.strip()
-        if code.startswith("```python"):
-            code = code.replace("```python", "").replace("```", "").strip()
-        return code
+        return self._parse_code(response.content)
+
+    def forget_build(self, capability: str):
+        """Evict the cached code for `capability` after it failed validation or had to be rebuilt."""
+        self.llm.forget(self.llm.cache_key(self._build_messages(capability)))
 
-    def create_registry_entry(self, capability: str, code: str) -> ToolRegistryEntry:
+    async def abuild_tool(self, capability: str, use_cache: bool = True) -> str:
+        try:
+            response = await self.llm.ainvoke(self._build_messages(capability), use_cache=use_cache)
+        except Exception as e:
+            print(f"[-] API Error in ToolBuilder (Code Gen): {e}")
+            return ""
+        return self._parse_code(response.content)
+
+    def _registry_messages(self, capability: str, code: str) -> List[Any]:
         system_prompt = """
         You are a TOOL REGISTRY MANAGER.
         Based on the code provided, generate a JSON object matching the ToolRegistryEntry schema.
-        Schema fields: tool_name, description, inputs (key:type_or_details), outputs (key:type_or_details), usage_example.
-        
+        Schema fields: tool_name, description, inputs (key:type_or_details), outputs (key:type_or_details), usage_example,
+        pure, cache_ttl.
+        - pure: true ONLY if the tool has no side effects (does not open apps/browsers, send, write, delete, click or play
+          anything) and the same inputs give the same result, e.g. calculations, parsing, formatting, reading data.
+        - cache_ttl: for pure tools whose result can go stale (e.g. weather, prices, web pages), how many seconds a result
+          stays valid; null if it never goes stale. Use null for tools that are not pure.
+
         CRITICAL: Output MUST be a PURE JSON object.
         """
-        
-        try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"Code:\n{code}\n\nCapability: {capability}")
-            ])
-        except Exception as e:
-            print(f"[-] API Error in ToolBuilder (Registry): {e}")
-            return None
-        
-        content = response.content.strip()
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Code:\n{code}\n\nCapability: {capability}")
+        ]
+
+    def _parse_registry_entry(self, content: str) -> Optional[ToolRegistryEntry]:
+        content = content.strip()
         print(f"[*] Debug: ToolBuilder Registry raw output: {content}")
-        
-        import re
+
         match = re.search(r"\{.*\}", content, re.DOTALL)
         if match:
             content = match.group(0)
-        
+
         try:
             return ToolRegistryEntry(**json.loads(content))
         except Exception as e:
             print(f"[-] Failed to parse ToolRegistryEntry: {e}")
             return None
+
+    def _static_registry_entry(self, capability: str, code: str, tool_name: Optional[str]) -> Optional[ToolRegistryEntry]:
+        """Entry derived from the code's AST (signature, docstring, returned dict keys), or None to ask the LLM."""
+        metadata = tool_analyzer.analyze(code, tool_name)["metadata"]
+        if not metadata:
+            return None
+        if not metadata["description"]:
+            metadata = dict(metadata, description=capability)
+        try:
+            return ToolRegistryEntry(**metadata)
+        except Exception as e:
+            print(f"[-] Static registry entry rejected: {e}")
+            return None
+
+    def create_registry_entry(self, capability: str, code: str, tool_name: Optional[str] = None) -> ToolRegistryEntry:
+        entry = self._static_registry_entry(capability, code, tool_name)
+        if entry:
+            return entry
+        try:
+            response = self.llm.invoke(self._registry_messages(capability, code))
+        except Exception as e:
+            print(f"[-] API Error in ToolBuilder (Registry): {e}")
+            return None
+        return self._parse_registry_entry(response.content)
+
+    async def acreate_registry_entry(self, capability: str, code: str, tool_name: Optional[str] = None) -> ToolRegistryEntry:
+        entry = self._static_registry_entry(capability, code, tool_name)
+        if entry:
+            return entry
+        try:
+            response = await self.llm.ainvoke(self._registry_messages(capability, code))
+        except Exception as e:
+            print(f"[-] API Error in ToolBuilder (Registry): {e}")
+            return None
+        return self._parse_registry_entry(response.content)
@@ -0,0 +1,48 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# build(step) -> registered entry, or None if generation/validation/registration failed
+ToolBuild = Callable[[Dict[str, Any]], Optional[Any]]
+
+
+class ToolFactory:
+    """Builds missing tools on a background pool so they are ready by the time their step runs.
+
+    Concurrent requests for the same tool name share one in-flight build. Builds are
+    speculative: a build that finishes after its plan failed still registers the tool.
+    """
+
+    def __init__(self, build: ToolBuild, max_workers: int = None):
+        self._build = build
+        self.max_workers = max_workers or int(os.getenv("AGENTRIX_MAX_PARALLEL_BUILDS", "4"))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool-build")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, step: Dict[str, Any]) -> Future:
+        """Future for the entry of `step`'s tool, joining a build already in flight for that name."""
+        name = step["tool_name"]
+        with self._lock:
+            future = self._inflight.get(name)
+            if future is None:
+                # Keep the caller's context (e.g. the open trace span) in the build thread
+                future = self._pool.submit(contextvars.copy_context().run, self._run, step)
+                self._inflight[name] = future
+            return future
+
+    def _run(self, step: Dict[str, Any]):
+        try:
+            return self._build(step)
+        finally:
+            with self._lock:
+                self._inflight.pop(step["tool_name"], None)
+
+    def prefetch(self, steps: Iterable[Dict[str, Any]]) -> Dict[str, Future]:
+        """Start builds for all given steps at once; returns futures by tool name."""
+        return {step["tool_name"]: self.submit(step) for step in steps}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -1,27 +1,15 @@
-import subprocess
-import os
+from typing import Optional
+from .tool_analyzer import tool_analyzer
 
 class ToolValidator:
-    def validate_tool(self, code: str) -> bool:
-        # 1. Syntax check
-        try:
-            compile(code, "<string>", "exec")
-        except SyntaxError as e:
-            print(f"[-] Validation failed: Syntax error - {e}")
-            return False
-
-        # 2. Safety check (simple heuristic for now)
-        forbidden_keywords = ["os.system", "shutil.rmtree", "subprocess.call", "__import__('os').system"]
-        for kw in forbidden_keywords:
-            if kw in code:
-                print(f"[-] Validation failed: Unsafe keyword '{kw}' detected.")
-                return False
-
-        # 3. Dry run (mock execution)
-        # In a real scenario, we'd use a restricted sandbox.
-        # For this demo, we'll just check if it defines a function.
-        if "def " not in code:
-            print("[-] Validation failed: No function defined.")
+    def validate_tool(self, code: str, tool_name: Optional[str] = None) -> bool:
+        # Syntax, safety (disallowed imports/calls, with aliases resolved), undefined names,
+        # missing modules and, if given, that `tool_name` is defined. Verdicts are cached by code hash.
+        verdict = tool_analyzer.analyze(code, tool_name)
+        for warning in verdict["warnings"]:
+            print(f"[!] Validation warning: {warning}")
+        if not verdict["ok"]:
+            print(f"[-] Validation failed: {'; '.join(verdict['errors'])}")
             return False
 
         print("[+] Tool validation passed.")
@@ -0,0 +1,192 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+_current = contextvars.ContextVar("agentrix_span", default=None)
+
+
+class Span:
+    """One timed operation. Attributes can be added while it runs with `set()`."""
+
+    __slots__ = ("tracer", "name", "kind", "span_id", "trace_id", "parent_id", "attrs",
+                 "start", "end", "thread_id", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attrs = attrs
+        self.start = self.end = None
+        self.thread_id = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "thread_id": self.thread_id,
+            "attrs": self.attrs,
+        }
+
+
+class _NullSpan:
+    """Stand-in when tracing is off: every call is a no-op."""
+
+    __slots__ = ()
+    trace_id = None
+    duration_ms = 0.0
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects spans per trace (one trace per user request) and writes them out when the request ends.
+
+    Enabled with AGENTRIX_TRACE=1. Each finished request produces `<dir>/<trace_id>.jsonl`
+    (one span per line) and `<dir>/<trace_id>.trace.json` (Chrome trace-event format, open in
+    chrome://tracing or Perfetto) under AGENTRIX_TRACE_DIR (default "traces").
+    """
+
+    def __init__(self, enabled: bool = None, directory: str = None):
+        if enabled is None:
+            enabled = os.getenv("AGENTRIX_TRACE", "0").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self.directory = directory or os.getenv("AGENTRIX_TRACE_DIR", "traces")
+        # Traces whose root span has started and that haven't been popped, oldest first
+        self.max_traces = int(os.getenv("AGENTRIX_TRACE_MAX_OPEN", "256"))
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, kind: str = "internal", **attrs):
+        if not self.enabled:
+            return _NULL_SPAN
+        parent = _current.get()
+        span = Span(self, name, kind, parent, attrs)
+        if parent is None:
+            with self._lock:
+                self._traces[span.trace_id] = []
+                # Roots that are never reported must not pile up in a long-running process
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+        return span
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            # A speculative build can outlive its request; its trace has been written already
+            if spans is not None:
+                spans.append(span)
+
+    def pop_trace(self, trace_id: str) -> List[Span]:
+        with self._lock:
+            return sorted(self._traces.pop(trace_id, []), key=lambda s: s.start)
+
+    # -- export ----------------------------------------------------------
+
+    def export_jsonl(self, spans: List[Span], path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def export_chrome(self, spans: List[Span], path: str):
+        pid = os.getpid()
+        events = [{
+            "name": span.name,
+            "cat": span.kind,
+            "ph": "X",
+            "ts": round(span.start * 1e6, 1),
+            "dur": round(span.duration_ms * 1000, 1),
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": span.attrs,
+        } for span in spans]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+    def summary(self, spans: List[Span]) -> str:
+        """Table of count/total/mean/max latency per span kind and name, with LLM token totals."""
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        for span in spans:
+            name = span.attrs.get("agent", span.name) if span.kind == "llm" else span.name
+            row = rows.setdefault((span.kind, name), {"count": 0, "total": 0.0, "max": 0.0, "tokens_in": 0,
+                                                      "tokens_out": 0, "cache_hits": 0, "errors": 0})
+            row["count"] += 1
+            row["total"] += span.duration_ms
+            row["max"] = max(row["max"], span.duration_ms)
+            row["tokens_in"] += span.attrs.get("prompt_tokens") or 0
+            row["tokens_out"] += span.attrs.get("completion_tokens") or 0
+            row["cache_hits"] += 1 if span.attrs.get("cache_hit") else 0
+            row["errors"] += 1 if span.attrs.get("error") else 0
+
+        header = f"{'kind':<8} {'name':<32} {'n':>4} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'tok in':>8} {'tok out':>8} {'hits':>5} {'err':>4}"
+        lines = [header, "-" * len(header)]
+        for (kind, name), row in sorted(rows.items(), key=lambda item: -item[1]["total"]):
+            lines.append(f"{kind:<8} {name[:32]:<32} {row['count']:>4} {row['total']:>10.1f} "
+                         f"{row['total'] / row['count']:>9.1f} {row['max']:>9.1f} {row['tokens_in']:>8} "
+                         f"{row['tokens_out']:>8} {row['cache_hits']:>5} {row['errors']:>4}")
+        return "\n".join(lines)
+
+    def report(self, root: Span) -> Optional[str]:
+        """Write the finished request's trace files and print its summary. Returns the JSONL path."""
+        if not self.enabled or not isinstance(root, Span):
+            return None
+        spans = self.pop_trace(root.trace_id)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{root.trace_id}.jsonl")
+        self.export_jsonl(spans, path)
+        self.export_chrome(spans, os.path.join(self.directory, f"{root.trace_id}.trace.json"))
+        print(f"\n[*] Trace {root.trace_id} ({root.duration_ms:.0f} ms) written to {path}")
+        print(self.summary(spans))
+        return path
+
+
+def current_span():
+    """The innermost open span in this thread/task, or a no-op span."""
+    return _current.get() or _NULL_SPAN
+
+
+tracer = Tracer()
@@ -1,18 +1,25 @@
 import os
 import json
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+import asyncio
+from typing import Dict, Any, List, Optional
+from .llm import LLMClient
+
+class UserInputRequired(Exception):
+    """Raised by a non-interactive UserInquiryAgent instead of blocking on input()."""
+
+    def __init__(self, missing_info: str, instructions: str):
+        super().__init__(f"User input required: {missing_info}")
+        self.missing_info = missing_info
+        self.instructions = instructions
 
 class UserInquiryAgent:
-    def __init__(self, model_name: str = "xiaomi/mimo-v2-flash:free"):
-        self.llm = ChatOpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1",
-            model=model_name,
-        )
+    def __init__(self, model_name: Optional[str] = None, interactive: bool = True):
+        self.llm = LLMClient("user_inquiry", model_name)
+        self.interactive = interactive
 
-    def generate_instructions(self, missing_info: str, tool_name: str) -> str:
+    def _messages(self, missing_info: str, tool_name: str) -> List[Any]:
+        # Imported here so main can import UserInputRequired without loading langchain
+        from langchain_core.messages import HumanMessage, SystemMessage
         system_prompt = f"""
         You are a USER ASSISTANCE AGENT.
         A tool named '{tool_name}' requires missing information: {missing_info}
@@ -21,17 +28,28 @@ class UserInquiryAgent:
         If it's an API key (e.g., OpenWeatherMap, Serper, etc.), tell them which website to visit and where to find the key.
         Keep the instructions concise and helpful.
         """
-        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"How can I get {missing_info} for {tool_name}?")
+        ]
+
+    def generate_instructions(self, missing_info: str, tool_name: str) -> str:
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"How can I get {missing_info} for {tool_name}?")
-            ])
+            response = self.llm.invoke(self._messages(missing_info, tool_name))
+            return response.content.strip()
+        except Exception as e:
+            return f"Error generating instructions: {e}. Please provide {missing_info} manually."
+
+    async def agenerate_instructions(self, missing_info: str, tool_name: str) -> str:
+        try:
+            response = await self.llm.ainvoke(self._messages(missing_info, tool_name))
             return response.content.strip()
         except Exception as e:
             return f"Error generating instructions: {e}. Please provide {missing_info} manually."
 
     def ask_user(self, missing_info: str, instructions: str) -> str:
+        if not self.interactive:
+            raise UserInputRequired(missing_info, instructions)
         print("\n" + "="*50)
         print(f"[*] ACTION REQUIRED: {missing_info}")
         print("-"*50)
@@ -40,3 +58,6 @@ class UserInquiryAgent:
         
         user_input = input(f"\nPlease enter {missing_info}: ")
         return user_input.strip()
+
+    async def aask_user(self, missing_info: str, instructions: str) -> str:
+        return await asyncio.to_thread(self.ask_user, missing_info, instructions)
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from main import Agents, run_query
+
+QUERY_FIELDS = ("query", "request", "prompt", "text", "body")
+
+
+def read_requests(stream):
+    """Yield (request_id, query) from JSONL lines; plain-text lines are taken as the query itself."""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield str(line_no), line
+            continue
+        if isinstance(record, str):
+            yield str(line_no), record
+            continue
+        query = next((record[f] for f in QUERY_FIELDS if record.get(f)), None)
+        request_id = str(record.get("request_id") or record.get("id") or line_no)
+        yield request_id, query
+
+
+def run_batch(input_stream, output_stream, concurrency: int):
+    # One warm set of agents (registry, module cache, LLM client) shared by every worker
+    agents = Agents(interactive=False)
+    write_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(concurrency)
+    counts = {}
+
+    def process(request_id, query):
+        start = time.perf_counter()
+        try:
+            if not query:
+                result = {"status": "invalid", "error": "No query field in request", "summary": None, "steps": {}}
+            else:
+                result = run_query(agents, query)
+        except Exception as e:
+            result = {"status": "error", "error": str(e), "summary": None, "steps": {}}
+        finally:
+            slots.release()
+        record = {"request_id": request_id, "query": query, "elapsed_s": round(time.perf_counter() - start, 3)}
+        record.update(result)
+        with write_lock:
+            output_stream.write(json.dumps(record, default=str) + "\n")
+            output_stream.flush()
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for request_id, query in read_requests(input_stream):
+            # Bound in-flight requests so huge inputs are streamed, not queued in memory
+            slots.acquire()
+            pool.submit(process, request_id, query)
+    return counts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queries from a JSONL file through the Agentrix pipeline.")
+    parser.add_argument("input", help="JSONL file of requests, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for results, or - for stdout (default)")
+    parser.add_argument("-c", "--concurrency", type=int, default=int(os.getenv("AGENTRIX_BATCH_CONCURRENCY", "4")))
+    parser.add_argument("-q", "--quiet", action="store_true", help="suppress per-step pipeline output")
+    args = parser.parse_args()
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    if args.quiet or args.output == "-":
+        # Pipeline progress goes to stderr (or nowhere) so stdout stays valid JSONL
+        sys.stdout = open(os.devnull, "w") if args.quiet else sys.stderr
+
+    try:
+        counts, elapsed = run_batch(input_stream, output_stream, args.concurrency)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.__stdout__:
+            output_stream.close()
+
+    total = sum(counts.values())
+    print(f"[+] Processed {total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.2f} req/s): {counts}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
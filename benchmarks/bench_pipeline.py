@@ -0,0 +1,319 @@
+"""End-to-end pipeline benchmark against a local fake LLM endpoint.
+
+Runs run_query() for each scenario at every registry size and concurrency level and
+reports throughput, p50/p99 latency and peak resident memory. No network access or API key
+is needed: benchmarks/fake_llm_server.py answers every agent with scripted responses
+after --latency seconds, so the numbers show the pipeline's own overhead.
+
+Scenarios:
+    plan      plan, bind parameters (LLM), execute, summarize
+    chain     two dependent steps, the second bound locally from the first's output
+    build     plan a new tool, generate, validate, register and execute it
+    build3    plan three new independent tools, built concurrently
+    recovery  tool fails, error handler suggests new params, retry succeeds
+    replay    compiled workflow replay (no planning or parameter extraction)
+
+Results are saved to benchmarks/results/<commit>.json. Compare two runs with --compare:
+
+    python benchmarks/bench_pipeline.py [--scenarios plan,chain] [--sizes 10,1000] [--concurrency 1,8]
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_tool_retrieval import synthetic_tools
+from fake_llm_server import FakeLLMServer
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+BENCH_TOOLS = {
+    "bench_add": ("def bench_add(a: int, b: int, **kwargs) -> dict:\n    return {\"sum\": a + b}\n",
+                  {"a": "int", "b": "int"}, {"sum": "int"}),
+    "bench_square": ("def bench_square(sum: int, **kwargs) -> dict:\n    return {\"square\": sum * sum}\n",
+                     {"sum": "int"}, {"square": "int"}),
+    "bench_divide": ("def bench_divide(a: int, b: int, **kwargs) -> dict:\n    return {\"quotient\": a / b}\n",
+                     {"a": "int", "b": "int"}, {"quotient": "float"}),
+    "bench_secret": ("def bench_secret(bench_api_key: str = \"\", **kwargs) -> dict:\n"
+                     "    if not bench_api_key:\n"
+                     "        raise ValueError(\"API key BENCH_API_KEY is missing\")\n"
+                     "    return {\"authorized\": True}\n",
+                     {"bench_api_key": "str"}, {"authorized": "bool"}),
+}
+
+_ids = itertools.count()
+
+SCENARIOS = {
+    "plan": lambda i: f"bench add {i} and {i + 1}",
+    "chain": lambda i: f"bench add {i} and {i + 1} then square",
+    "build": lambda i: f"bench build cube {next(_ids)}",
+    "build3": lambda i: f"bench build cubes {next(_ids)}",
+    "recovery": lambda i: f"bench divide {i} by zero",
+    "replay": lambda i: f"bench add {i + 10} and {i + 11}",
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def rss_mb() -> float:
+    """Current resident set size; falls back to the lifetime peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class PeakMemory:
+    """Samples RSS on a background thread while the block runs (tracemalloc would distort latencies)."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def make_workspace(directory: str, registry_size: int):
+    """Registry with the bench tools plus synthetic padding entries, in `directory`."""
+    from registry.manager import RegistryManager
+    from registry.schema import ToolRegistryEntry
+
+    os.makedirs(os.path.join(directory, "registry", "tools"), exist_ok=True)
+    registry = RegistryManager(os.path.join(directory, "registry", "tool_registry.db"))
+    registry.backend.put_many(synthetic_tools(max(0, registry_size - len(BENCH_TOOLS))))
+    for name, (code, inputs, outputs) in BENCH_TOOLS.items():
+        file_path = f"registry/tools/{name}.py"
+        with open(os.path.join(directory, file_path), "w", encoding="utf-8") as f:
+            f.write(code)
+        registry.register_tool(ToolRegistryEntry(tool_name=name, description=f"Benchmark tool {name}.", inputs=inputs,
+                                                 outputs=outputs, usage_example=f"{name}()", file_path=file_path))
+
+
+def run_cell(agents, scenario: str, requests: int, concurrency: int, server: FakeLLMServer):
+    from main import run_query
+
+    make_request = SCENARIOS[scenario]
+    latencies, statuses = [], []
+    calls_before = sum(server.calls.values())
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            status = run_query(agents, make_request(i))["status"]
+        except Exception as e:
+            status = f"error: {e}"
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with PeakMemory() as memory, contextlib.redirect_stdout(open(os.devnull, "w")), \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, status in pool.map(one, range(requests)):
+            latencies.append(elapsed * 1000)
+            statuses.append(status)
+    wall = time.perf_counter() - start
+
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "concurrency": concurrency,
+        "throughput_rps": round(requests / wall, 3),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "peak_mb": round(memory.peak, 2),
+        "errors": sum(1 for s in statuses if s != "ok"),
+        "llm_calls_per_request": round((sum(server.calls.values()) - calls_before) / requests, 2),
+    }
+
+
+def run(scenarios, sizes, concurrency_levels, requests, latency, llm_cache, chunk_delay=0.0, error_rate=0.0):
+    results = []
+    with FakeLLMServer(latency=latency, chunk_delay=chunk_delay, error_rate=error_rate) as server, tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "AGENTRIX_BASE_URL": server.url,
+            "AGENTRIX_API_KEY": "bench",
+            "AGENTRIX_LLM_CACHE": "1" if llm_cache else "0",
+            "AGENTRIX_TRACE": "0",
+        })
+        # Retries against the fake server need not wait as long as against a real provider
+        os.environ.setdefault("AGENTRIX_LLM_BACKOFF_BASE", "0.05")
+        from main import Agents, run_query
+        from registry.workflows import WorkflowStore
+
+        cwd = os.getcwd()
+        try:
+            for size in sizes:
+                workspace = os.path.join(tmp, f"registry-{size}")
+                make_workspace(workspace, size)
+                # Tools are written and loaded relative to the working directory
+                os.chdir(workspace)
+                os.environ["AGENTRIX_REGISTRY"] = os.path.join(workspace, "registry", "tool_registry.db")
+                os.environ["AGENTRIX_WORKFLOWS"] = os.path.join(workspace, "registry", "workflows.json")
+                agents = Agents(interactive=False)
+                for scenario in scenarios:
+                    if os.path.exists(agents.workflows.workflow_file):
+                        os.remove(agents.workflows.workflow_file)
+                    if scenario == "replay":
+                        with contextlib.redirect_stdout(open(os.devnull, "w")):
+                            run_query(agents, SCENARIOS["replay"](0))
+                    else:
+                        agents.workflows = _NoWorkflows(agents.workflows.workflow_file)
+                    for concurrency in concurrency_levels:
+                        row = run_cell(agents, scenario, requests, concurrency, server)
+                        row["registry_size"] = size
+                        results.append(row)
+                        print_row(row)
+                    agents.workflows = WorkflowStore(agents.workflows.workflow_file)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+class _NoWorkflows:
+    """Workflow store that never matches or saves, so every request goes through planning."""
+
+    def __init__(self, workflow_file):
+        self.workflow_file = workflow_file
+
+    def match(self, user_request):
+        return None, None
+
+    def compile(self, *args, **kwargs):
+        return {"template": ""}
+
+    def save(self, workflow):
+        pass
+
+    def invalidate_tool(self, tool_name):
+        pass
+
+
+HEADER = f"{'scenario':<9} {'tools':>6} {'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>8} {'llm/req':>8} {'err':>4}"
+
+
+def print_row(row):
+    print(f"{row['scenario']:<9} {row['registry_size']:>6} {row['concurrency']:>5} {row['throughput_rps']:>8.2f} "
+          f"{row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['peak_mb']:>8.2f} {row['llm_calls_per_request']:>8.2f} "
+          f"{row['errors']:>4}", flush=True)
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> bool:
+    """Print per-cell changes between two result files. Returns False if any cell regressed beyond `threshold`."""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    key = lambda r: (r["scenario"], r["registry_size"], r["concurrency"])
+    baseline = {key(r): r for r in old["results"]}
+    print(f"{old['commit']} -> {new['commit']}")
+    print(f"{'scenario':<9} {'tools':>6} {'conc':>5} {'req/s':>16} {'p50 ms':>18} {'p99 ms':>18} {'peak MB':>14}")
+    ok = True
+    for row in new["results"]:
+        base = baseline.get(key(row))
+        if not base:
+            continue
+        changes = {m: (row[m] - base[m]) / base[m] if base[m] else 0.0
+                   for m in ("throughput_rps", "p50_ms", "p99_ms", "peak_mb")}
+        regressed = changes["throughput_rps"] < -threshold or changes["p50_ms"] > threshold or changes["p99_ms"] > 2 * threshold
+        ok = ok and not regressed
+        print(f"{row['scenario']:<9} {row['registry_size']:>6} {row['concurrency']:>5} "
+              f"{row['throughput_rps']:>8.2f} ({changes['throughput_rps']:+.0%}) {row['p50_ms']:>9.1f} ({changes['p50_ms']:+.0%}) "
+              f"{row['p99_ms']:>9.1f} ({changes['p99_ms']:+.0%}) {row['peak_mb']:>6.2f} ({changes['peak_mb']:+.0%})"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--sizes", default="10,1000", help="registry sizes")
+    parser.add_argument("--concurrency", default="1,8", help="concurrent requests")
+    parser.add_argument("--requests", type=int, default=24, help="requests per scenario/size/concurrency cell")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM latency in seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.0,
+                        help="seconds between streamed response chunks (plans and summaries are streamed)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of LLM requests the fake server rejects with 429 (retried by the scheduler)")
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files and exit")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(*args.compare, args.threshold) else 1)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    print(HEADER)
+    results = run(scenarios, [int(s) for s in args.sizes.split(",")], [int(c) for c in args.concurrency.split(",")],
+                  args.requests, args.latency, args.llm_cache, args.chunk_delay, args.error_rate)
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {"latency": args.latency, "requests": args.requests, "llm_cache": args.llm_cache,
+                       "chunk_delay": args.chunk_delay, "error_rate": args.error_rate},
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Startup budget check: import time of main, time-to-prompt, and heavy modules loaded before the prompt.
+
+Each measurement runs in a fresh interpreter and the median of --runs is compared with
+its budget. Exits non-zero if a budget is exceeded or if langchain/openai/httpx/pydantic
+or numpy are imported before the user is prompted, so it can gate CI or a pre-commit hook.
+
+    python benchmarks/bench_startup.py [--runs 5] [--import-budget 0.25] [--prompt-budget 0.4]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("langchain_core", "langchain_openai", "openai", "httpx", "pydantic", "numpy")
+
+
+def _python(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+
+def import_time() -> float:
+    """Seconds to import main, net of interpreter startup."""
+    code = "import time; s = time.perf_counter(); import main; print(time.perf_counter() - s)"
+    return float(_python(code).strip().splitlines()[-1])
+
+
+def time_to_prompt() -> float:
+    """Wall time from launching `python main.py` until the query prompt is printed."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", "main.py"], cwd=ROOT, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    seen = ""
+    while "Enter your query" not in seen:
+        char = proc.stdout.read(1)
+        if not char:
+            break
+        seen += char
+    elapsed = time.perf_counter() - start
+    # An empty query exits immediately
+    proc.communicate("\n", timeout=30)
+    if "Enter your query" not in seen:
+        raise RuntimeError(f"main.py exited before prompting: {seen!r}")
+    return elapsed
+
+
+def heavy_modules_at_prompt():
+    code = (
+        "import builtins, sys\n"
+        "def fake_input(prompt=''):\n"
+        f"    print('heavy:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules)); raise SystemExit\n"
+        "builtins.input = fake_input\n"
+        "import main; main.main()\n"
+    )
+    line = next(l for l in _python(code).splitlines() if l.startswith("heavy:"))
+    return [m for m in line[len("heavy:"):].split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=0.25, help="seconds to import main")
+    parser.add_argument("--prompt-budget", type=float, default=0.4, help="seconds from launch to the query prompt")
+    args = parser.parse_args()
+
+    imports = statistics.median(import_time() for _ in range(args.runs))
+    prompt = statistics.median(time_to_prompt() for _ in range(args.runs))
+    heavy = heavy_modules_at_prompt()
+
+    failures = []
+    print(f"import main      {imports * 1000:8.1f} ms  (budget {args.import_budget * 1000:.0f} ms)")
+    print(f"time to prompt   {prompt * 1000:8.1f} ms  (budget {args.prompt_budget * 1000:.0f} ms)")
+    print(f"heavy at prompt  {', '.join(heavy) or 'none'}")
+    if imports > args.import_budget:
+        failures.append("import time over budget")
+    if prompt > args.prompt_budget:
+        failures.append("time to prompt over budget")
+    if heavy:
+        failures.append(f"imported before the prompt: {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
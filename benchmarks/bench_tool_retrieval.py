@@ -0,0 +1,90 @@
+"""Prompt size and planning latency of the Orchestrator at different registry sizes.
+
+Compares the full-registry prompt with the top-k retrieval prompt at 10, 1k and 10k
+synthetic tools. With --llm, also times Orchestrator.process_request against the
+endpoint configured through AGENTRIX_BASE_URL.
+
+    python benchmarks/bench_tool_retrieval.py [--sizes 10,1000,10000] [--top-k 25] [--llm]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from registry.backends import SqliteBackend
+from registry.manager import RegistryManager
+from registry.schema import ToolRegistryEntry
+
+VERBS = ["get", "fetch", "read", "write", "send", "open", "parse", "convert", "calculate", "search", "play", "resize"]
+NOUNS = ["weather", "csv", "email", "image", "video", "price", "stock", "song", "file", "pdf", "message", "chart",
+         "temperature", "column", "average", "url", "frame", "camera", "invoice", "calendar"]
+QUERIES = [
+    "What is the weather in Paris?",
+    "Read data.csv and calculate the average of the Price column",
+    "Take a selfie with the camera and save the frame",
+    "Send a message to Salman on WhatsApp",
+]
+
+
+def synthetic_tools(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(n):
+        verb, noun, other = rng.choice(VERBS), rng.choice(NOUNS), rng.choice(NOUNS)
+        yield ToolRegistryEntry(
+            tool_name=f"{verb}_{noun}_{i}",
+            description=f"{verb.capitalize()} the {noun} using the {other} source and return the result.",
+            inputs={noun: "str", "options": "dict"},
+            outputs={"result": "dict", other: "str"},
+            usage_example=f"{verb}_{noun}_{i}({noun}='...')",
+            file_path=f"registry/tools/{verb}_{noun}_{i}.py",
+        )
+
+
+def run(sizes, top_k, with_llm):
+    from agents.orchestrator import Orchestrator
+
+    print(f"{'tools':>7} {'full prompt':>12} {'top-k prompt':>13} {'index build':>12} {'add 1 tool':>11} {'prompt build':>13} {'plan (LLM)':>11}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = RegistryManager(backend=SqliteBackend(os.path.join(tmp, "tools.db")))
+            registry.backend.put_many(synthetic_tools(n))
+
+            full = Orchestrator(registry=registry, top_k=n + 1)
+            retrieval = Orchestrator(registry=registry, top_k=top_k)
+            full_chars = len(full._messages(QUERIES[0])[0].content)
+
+            start = time.perf_counter()
+            retrieval._messages(QUERIES[0])  # first search builds the index
+            build_ms = (time.perf_counter() - start) * 1000
+
+            extra = next(synthetic_tools(1, seed=n))
+            extra.tool_name = "bench_extra_tool"
+            start = time.perf_counter()
+            registry.register_tool(extra)
+            add_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            sizes_k = [len(retrieval._messages(q)[0].content) for q in QUERIES]
+            prompt_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+            plan_ms = "-"
+            if with_llm:
+                start = time.perf_counter()
+                for q in QUERIES:
+                    retrieval.process_request(q)
+                plan_ms = f"{(time.perf_counter() - start) * 1000 / len(QUERIES):.1f}ms"
+
+            print(f"{n:>7} {full_chars:>11}c {max(sizes_k):>12}c {build_ms:>10.1f}ms {add_ms:>9.2f}ms {prompt_ms:>11.2f}ms {plan_ms:>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,10000")
+    parser.add_argument("--top-k", type=int, default=25)
+    parser.add_argument("--llm", action="store_true", help="also time planning calls against AGENTRIX_BASE_URL")
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.top_k, args.llm)
@@ -0,0 +1,54 @@
+"""Sandbox limit check: a CPU-bound loop, a sleeping tool and a plain call, each through ToolWorkerPool.
+
+The pool uses its default CPU budget for the given wall timeout, so this checks that a
+busy tool is stopped as `cpu_limit` before the timeout fires, an idle one as `timeout`,
+and a normal call still returns. Exits non-zero on any other outcome (POSIX only; Windows
+has no CPU rlimit).
+
+    python benchmarks/check_sandbox.py [--timeout 6]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TOOLS = {
+    "spin": "def spin(**kwargs):\n    n = 0\n    while True:\n        n += 1\n",
+    "nap": "import time\n\ndef nap(**kwargs):\n    time.sleep(3600)\n",
+    "double": "def double(x: int, **kwargs):\n    return {\"result\": x * 2}\n",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timeout", type=float, default=6.0, help="wall-clock seconds per call")
+    args = parser.parse_args()
+
+    from agents.sandbox import ToolWorkerPool
+    pool = ToolWorkerPool(size=1, timeout=args.timeout)
+    expected = {"spin": "cpu_limit", "nap": "timeout", "double": None}
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            for name, code in TOOLS.items():
+                path = os.path.join(directory, f"{name}.py")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(code)
+                result = pool.run(name, path, {"x": 21} if name == "double" else {})
+                outcome = result.get("error_type") if isinstance(result, dict) else None
+                print(f"{name:<8} {outcome or 'ok':<14} (expected {expected[name] or 'ok'})")
+                if outcome != expected[name]:
+                    failures.append(f"{name}: {result}")
+        finally:
+            pool.shutdown()
+    print(f"cpu budget {pool.cpu_seconds:.1f}s, timeout {pool.timeout:.1f}s")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
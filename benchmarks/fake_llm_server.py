@@ -0,0 +1,224 @@
+"""Local OpenAI-compatible chat completions server with scripted responses.
+
+Answers POST /v1/chat/completions (streaming and non-streaming) after a configurable
+latency. Each rule is a regex searched in the concatenated message contents; the first
+match's response is returned, either a fixed string or a callable(messages, match) -> str.
+The default script drives the `bench_*` scenarios of benchmarks/bench_pipeline.py.
+
+    python benchmarks/fake_llm_server.py [--port 8765] [--latency 0.05] [--jitter 0.01] [--script rules.json]
+
+A JSON script is a list of {"match": "<regex>", "response": "<text>"} objects.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+Response = Union[str, Callable[[List[Dict[str, Any]], "re.Match"], str]]
+
+
+def _field(pattern: str, text: str, default: str = "") -> str:
+    match = re.search(pattern, text)
+    return match.group(1) if match else default
+
+
+def _plan(messages, match) -> str:
+    request = messages[-1]["content"]
+    if request.startswith("bench build cubes"):
+        n = _field(r"cubes (\d+)", request, "0")
+        return json.dumps([{"tool_name": f"bench_cube_{n}_{k}", "description": f"cube {n}", "is_new": True, "depends_on": []}
+                           for k in range(3)])
+    if request.startswith("bench build cube"):
+        n = _field(r"cube (\d+)", request, "0")
+        return json.dumps([{"tool_name": f"bench_cube_{n}", "description": f"cube {n}", "is_new": True, "depends_on": []}])
+    if request.startswith("bench secret"):
+        return json.dumps([{"tool_name": "bench_secret", "description": "call a keyed API", "is_new": False, "depends_on": []}])
+    if request.startswith("bench divide"):
+        return json.dumps([{"tool_name": "bench_divide", "description": "divide", "is_new": False, "depends_on": []}])
+    steps = [{"tool_name": "bench_add", "description": "add two numbers", "is_new": False, "depends_on": []}]
+    if "then square" in request:
+        steps.append({"tool_name": "bench_square", "description": "square the sum", "is_new": False, "depends_on": ["bench_add"]})
+    return json.dumps(steps)
+
+
+def _parameters(messages, match) -> str:
+    system, human = messages[0]["content"], messages[-1]["content"]
+    request = _field(r"User Request: (.*)", system)
+    if "bench_divide" in human:
+        return json.dumps({"a": int(_field(r"divide (\d+)", request, "1")), "b": 0})
+    numbers = [int(n) for n in re.findall(r"\d+", request)]
+    return json.dumps({"a": numbers[0] if numbers else 0, "b": numbers[1] if len(numbers) > 1 else 0})
+
+
+def _tool_code(messages, match) -> str:
+    name = _field(r"Tool Name: (\w+)", messages[-1]["content"], "bench_tool")
+    return (f"def {name}(x: int, **kwargs) -> dict:\n"
+            f"    \"\"\"Cube a number.\"\"\"\n"
+            f"    return {{\"cube\": x ** 3}}\n")
+
+
+def _registry_entry(messages, match) -> str:
+    name = _field(r"def (\w+)\(", messages[-1]["content"], "bench_tool")
+    return json.dumps({"tool_name": name, "description": "Cube a number.", "inputs": {"x": "int"},
+                       "outputs": {"cube": "int"}, "usage_example": f"{name}(x=3)"})
+
+
+def _recovery(messages, match) -> str:
+    a = int(_field(r'"a": (-?\d+)', messages[0]["content"], "1"))
+    return json.dumps({"action": "retry_with_params", "reason": "division by zero", "suggested_params": {"a": a, "b": 1}})
+
+
+DEFAULT_SCRIPT: List[Tuple[str, Response]] = [
+    (r"MULTI-AGENT ORCHESTRATOR", _plan),
+    (r"TOOL GAP ANALYZER", "[]"),
+    (r"PARAMETER EXTRACTION AGENT", _parameters),
+    (r"SLOT FILLING AGENT", json.dumps({"matches": False, "slots": {}})),
+    (r"TOOL BUILDER\.", _tool_code),
+    (r"TOOL REGISTRY MANAGER", _registry_entry),
+    (r"ERROR HANDLING AGENT", _recovery),
+    (r"USER ASSISTANCE AGENT", "Set the value in your environment."),
+    (r"RESULTS SUMMARIZER", "The task completed successfully."),
+    (r".", "OK"),
+]
+
+
+class FakeLLMServer:
+    """Threaded fake endpoint. Use as a context manager or call start()/stop(); `url` is the base URL."""
+
+    def __init__(self, script: Optional[List[Tuple[str, Response]]] = None, latency: float = 0.05,
+                 jitter: float = 0.0, port: int = 0, chunk_delay: float = 0.0, error_rate: float = 0.0):
+        self.script = [(re.compile(p, re.DOTALL), r) for p, r in (script or DEFAULT_SCRIPT)]
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        # Fraction of requests answered with 429 Too Many Requests, to exercise retry/backoff
+        self.error_rate = error_rate
+        self.throttled = 0
+        self.calls: Dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def respond(self, messages: List[Dict[str, Any]]) -> str:
+        text = "\n".join(str(m.get("content", "")) for m in messages)
+        for pattern, response in self.script:
+            match = pattern.search(text)
+            if match:
+                with self._calls_lock:
+                    self.calls[pattern.pattern] = self.calls.get(pattern.pattern, 0) + 1
+                return response(messages, match) if callable(response) else response
+        return ""
+
+    def _delay(self):
+        delay = self.latency + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, b'{"error": {"message": "not found"}}')
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server._delay()
+                if server.error_rate and random.random() < server.error_rate:
+                    with server._calls_lock:
+                        server.throttled += 1
+                    self._send(429, b'{"error": {"message": "rate limited", "code": 429}}')
+                    return
+                content = server.respond(body.get("messages", []))
+                usage = {"prompt_tokens": sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages", [])),
+                         "completion_tokens": len(content) // 4}
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": body.get("model", "fake")}
+                if body.get("stream"):
+                    self._stream(base, content, usage)
+                    return
+                reply = dict(base, object="chat.completion", usage=usage, choices=[
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}])
+                self._send(200, json.dumps(reply).encode("utf-8"))
+
+            def _stream(self, base, content, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                pieces = re.findall(r"\S+\s*|\s+", content) or [""]
+                for i, piece in enumerate(pieces):
+                    delta = {"role": "assistant", "content": piece} if i == 0 else {"content": piece}
+                    chunk = dict(base, object="chat.completion.chunk",
+                                 choices=[{"index": 0, "delta": delta, "finish_reason": None}])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                final = dict(base, object="chat.completion.chunk", usage=usage,
+                             choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def load_script(path: str) -> List[Tuple[str, Response]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [(rule["match"], rule["response"]) for rule in json.load(f)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random extra latency")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--script", help="JSON list of {match, response} rules (default: bench script)")
+    args = parser.parse_args()
+    server = FakeLLMServer(load_script(args.script) if args.script else None, args.latency, args.jitter,
+                           args.port, args.chunk_delay, args.error_rate)
+    print(f"Fake LLM server listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
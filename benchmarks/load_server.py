@@ -0,0 +1,179 @@
+"""Load test for server.py against the local fake LLM.
+
+Starts benchmarks/fake_llm_server.py in-process and `server.py` as a subprocess in a
+temporary workspace with the bench tools registered. Checks the "input required" flow
+once, then drives the API from N concurrent clients. Each client has its own session
+and sends queries back to back with `"wait": true`. Reports throughput and p50/p95/p99
+latency per concurrency level. `--cold N` also times N one-query runs of a fresh
+`batch.py` process, which is what every query cost before the service existed.
+
+    python benchmarks/load_server.py --concurrency 1,8,32 --requests 200 --latency 0.02
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import make_workspace, percentile
+from fake_llm_server import FakeLLMServer
+
+QUERIES = [
+    lambda i: f"bench add {i} and {i + 1}",
+    lambda i: f"bench add {i} and {i + 2} then square",
+]
+
+
+class Client:
+    """Keep-alive JSON client for one simulated user."""
+
+    def __init__(self, port: int):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+
+    def call(self, method: str, path: str, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        self.conn.request(method, path, body=data, headers=headers)
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server.py exited with code {process.returncode}")
+        try:
+            status, _ = Client(port).call("GET", "/health")
+            if status == 200:
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server.py did not become ready")
+
+
+def check_input_flow(port: int):
+    """A query that needs an API key stops with input_required and finishes once the key is given."""
+    client = Client(port)
+    _, session = client.call("POST", "/sessions")
+    base = f"/sessions/{session['session_id']}/queries"
+    _, first = client.call("POST", base, {"query": "bench secret", "wait": True})
+    assert first["status"] == "input_required", first
+    name = first["input_required"]["name"]
+    _, second = client.call("POST", f"{base}/{first['query_id']}/input", {"name": name, "value": "k", "wait": True})
+    assert second["status"] == "ok", second
+    # Later queries in the session reuse the answer
+    _, third = client.call("POST", base, {"query": "bench secret again", "wait": True})
+    assert third["status"] == "ok", third
+    print(f"input flow: ok ({name} asked once, resumed run {first.get('run_id')})")
+
+
+def run_level(port: int, concurrency: int, requests: int):
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def user(_):
+        client = Client(port)
+        _, session = client.call("POST", "/sessions")
+        path = f"/sessions/{session['session_id']}/queries"
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            try:
+                status, result = client.call("POST", path, {"query": QUERIES[i % len(QUERIES)](i + 10), "wait": True})
+                ok = status == 200 and result.get("status") == "ok"
+            except Exception as e:
+                ok, result = False, {"error": str(e)}
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors.append(result.get("error") or result.get("status"))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(user, range(concurrency)))
+    wall = time.perf_counter() - start
+    return {"concurrency": concurrency, "requests": requests, "throughput_rps": round(requests / wall, 2),
+            "p50_ms": round(percentile(latencies, 50), 1), "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1), "errors": len(errors)}
+
+
+def run_cold(workspace: str, env, n: int):
+    times = []
+    for i in range(n):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "batch.py"), "-", "-q"], input=QUERIES[0](i + 10),
+                       text=True, cwd=workspace, env=env, capture_output=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return {"mode": "process per query", "requests": n, "p50_ms": round(percentile(times, 50), 1),
+            "max_ms": round(max(times), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,8,32", help="concurrent clients per level")
+    parser.add_argument("--requests", type=int, default=200, help="queries per level")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM latency in seconds")
+    parser.add_argument("--workers", type=int, default=16, help="server query workers")
+    parser.add_argument("--registry-size", type=int, default=100)
+    parser.add_argument("--cold", type=int, default=3, help="also time this many fresh batch.py processes (0 to skip)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    with FakeLLMServer(latency=args.latency) as llm, tempfile.TemporaryDirectory() as workspace:
+        make_workspace(workspace, args.registry_size)
+        env = dict(os.environ, AGENTRIX_BASE_URL=llm.url, AGENTRIX_API_KEY="bench", AGENTRIX_LLM_CACHE="0",
+                   AGENTRIX_TRACE="0", AGENTRIX_REGISTRY=os.path.join(workspace, "registry", "tool_registry.db"),
+                   AGENTRIX_WORKFLOWS=os.path.join(workspace, "registry", "workflows.json"),
+                   AGENTRIX_ERROR_OUTCOMES=os.path.join(workspace, "error_outcomes.json"))
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", str(port), "--quiet",
+                                  "--workers", str(args.workers)], cwd=workspace, env=env)
+        try:
+            wait_ready(port, server)
+            check_input_flow(port)
+            results = []
+            print(f"{'clients':>7} {'req':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>4}")
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                row = run_level(port, concurrency, args.requests)
+                results.append(row)
+                print(f"{row['concurrency']:>7} {row['requests']:>6} {row['throughput_rps']:>8.2f} {row['p50_ms']:>9.1f} "
+                      f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['errors']:>4}")
+            _, health = Client(port).call("GET", "/health")
+            print(f"server: {health['completed']} queries, LLM scheduler {health['llm_scheduler']}")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+        cold = run_cold(workspace, env, args.cold) if args.cold else None
+        if cold:
+            print(f"cold: one fresh process per query, p50 {cold['p50_ms']:.1f} ms over {cold['requests']} runs")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "levels": results, "cold": cold}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,140 +1,498 @@
 import os
-from agents.orchestrator import Orchestrator
-from agents.tool_builder import ToolBuilder
-from agents.tool_validator import ToolValidator
-from registry.manager import RegistryManager
-from agents.execution_agent import ExecutionAgent
-from agents.error_handler import ErrorHandlerAgent
-from agents.user_inquiry import UserInquiryAgent
+import threading
+from agents.user_inquiry import UserInputRequired
+from agents.module_cache import tool_module_cache
+from agents.result_cache import result_cache
+from agents.llm_cache import get_response_cache
+from agents.llm_scheduler import llm_scheduler
+from agents.summarizer import summary_cache
+from agents.scheduler import PlanScheduler
+from agents.tool_factory import ToolFactory
+from agents.blob_store import BlobStore
+from agents.run_journal import RunJournal, runs_dir
+from agents.tracing import tracer, current_span
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class locked_cached_property:
+    """functools.cached_property whose first computation holds the owner's `init_lock`.
+
+    Since Python 3.12 cached_property has no lock, so threads sharing one Agents (batch.py,
+    server.py) could each build their own ToolFactory and defeat build coalescing.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        # After the first access the instance attribute shadows this descriptor, so no lock is taken
+        with instance.init_lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.func(instance)
+            return instance.__dict__[self.name]
+
+class Agents:
+    """The agents and stores a run needs, each created (and its module imported) on first use.
+
+    A run that only uses existing tools never loads ToolBuilder, ErrorHandlerAgent or
+    UserInquiryAgent, and nothing heavy is imported before the user is prompted. Each one
+    is created once even when several threads ask for it at the same time.
+    """
+
+    def __init__(self, interactive: bool = True):
+        self.interactive = interactive
+        # Only one step at a time may prompt the user
+        self.input_lock = threading.Lock()
+        # Reentrant: creating the orchestrator creates the registry
+        self.init_lock = threading.RLock()
+
+    @locked_cached_property
+    def registry(self):
+        from registry.manager import RegistryManager
+        return RegistryManager()
+
+    @locked_cached_property
+    def orchestrator(self):
+        from agents.orchestrator import Orchestrator
+        return Orchestrator(registry=self.registry)
+
+    @locked_cached_property
+    def builder(self):
+        from agents.tool_builder import ToolBuilder
+        return ToolBuilder()
+
+    @locked_cached_property
+    def validator(self):
+        from agents.tool_validator import ToolValidator
+        return ToolValidator()
+
+    @locked_cached_property
+    def executor(self):
+        from agents.execution_agent import ExecutionAgent
+        return ExecutionAgent()
+
+    @locked_cached_property
+    def error_handler(self):
+        from agents.error_handler import ErrorHandlerAgent
+        return ErrorHandlerAgent()
+
+    @locked_cached_property
+    def user_inquiry(self):
+        from agents.user_inquiry import UserInquiryAgent
+        return UserInquiryAgent(interactive=self.interactive)
+
+    @locked_cached_property
+    def scheduler(self):
+        return PlanScheduler()
+
+    @locked_cached_property
+    def tool_factory(self):
+        return ToolFactory(lambda step: build_step_tool(self, step))
+
+    @locked_cached_property
+    def workflows(self):
+        from registry.workflows import WorkflowStore
+        return WorkflowStore()
+
+def build_capability(step):
+    return f"Capability: {step['description']} (Tool Name: {step['tool_name']})"
+
+def build_step_tool(agents: Agents, step):
+    tool_name = step["tool_name"]
+    print(f"[*] Building new tool: {tool_name}")
+    capability = build_capability(step)
+    code = agents.builder.build_tool(capability)
+
+    if not code:
+        print(f"[-] Failed to generate code for {tool_name}. Stopping.")
+        return None
+
+    if not agents.validator.validate_tool(code, tool_name):
+        print(f"[-] Validation failed for {tool_name}. Stopping.")
+        # Otherwise every retry would get the same rejected code back from the cache
+        agents.builder.forget_build(capability)
+        return None
+
+    return install_tool(agents, step, code)
+
+def install_tool(agents: Agents, step, code):
+    """Write validated code for `step`'s tool and register it. Returns the entry, or None on failure.
+
+    The entry (inputs, outputs, purity, cache_ttl) is derived from this code, so a rebuilt tool
+    never keeps its old metadata; workflows and memoized results of the old code are dropped.
+    """
+    from registry.backends import atomic_write
+    tool_name = step["tool_name"]
+    entry = agents.builder.create_registry_entry(step["description"], code, tool_name)
+    if not entry:
+        print(f"[-] Failed to create registry entry for {tool_name}. Stopping.")
+        return None
+    # Force the name from the plan if builder chose differently
+    entry.tool_name = tool_name
+
+    file_name = f"registry/tools/{entry.tool_name}.py"
+    try:
+        # The file is complete before it is renamed into place and only then registered,
+        # so other steps and requests never see a half-written tool
+        atomic_write(file_name, code)
+        entry.file_path = file_name
+        tool_module_cache.invalidate(file_name)
+        agents.registry.register_tool(entry)
+        agents.workflows.invalidate_tool(tool_name)
+        result_cache.invalidate_tool(tool_name)
+        print(f"[+] Tool '{tool_name}' registered successfully.")
+        return entry
+    except Exception as e:
+        print(f"[-] Error saving tool file: {e}")
+        return None
+
+def prefetch_tools(agents: Agents, plan, builds=None):
+    """Start building every new or missing tool in the plan. Returns build futures by tool name.
+
+    Tools already in `builds` (this run's builds, finished or not) are not built again, so a
+    later step that reuses a new tool doesn't overwrite the one built and validated for it.
+    """
+    builds = builds or {}
+    missing = [step for step in plan if step["tool_name"] not in builds
+               and (step.get("is_new") or not agents.registry.get_tool(step["tool_name"]))]
+    if missing:
+        print(f"[*] Building {len(missing)} tool(s) in the background: {', '.join(s['tool_name'] for s in missing)}")
+    return agents.tool_factory.prefetch(missing)
+
+def run_step(agents: Agents, user_request: str, step, context, params=None, step_log=None, blobs=None, builds=None):
+    """Build (if needed) and execute one plan step. Returns (success, output, context_updates).
+
+    `params` skips parameter binding on the first attempt. The params that succeeded and
+    how they were bound (local/llm/mixed/workflow/error_handler) are recorded in
+    `step_log` under the tool name. Large outputs are kept out of band in `blobs`. A tool
+    already being built in `builds` (see prefetch_tools) is awaited instead of built again.
+    """
+    with tracer.span(f"step {step['tool_name']}", kind="step", tool=step["tool_name"]) as span:
+        success, output, updates = attempt_step(agents, user_request, step, context, params, step_log, blobs, builds)
+        span.set(success=success)
+        return success, output, updates
+
+def attempt_step(agents: Agents, user_request: str, step, context, params, step_log, blobs, builds):
+    span = current_span()
+    tool_name = step["tool_name"]
+    print(f"\n[*] Step: {step['description']} (Tool: {tool_name})")
+    updates = {}
+
+    # Use current registry for existing tools or newly built ones
+    entry = agents.registry.get_tool(tool_name)
+    if builds and tool_name in builds:
+        # The registry has the latest version if a step of this run has rebuilt the tool since
+        entry = builds[tool_name].result() and agents.registry.get_tool(tool_name)
+    elif step.get("is_new") or not entry:
+        entry = build_step_tool(agents, step)
+
+    if not entry:
+        print(f"[-] Tool {tool_name} not available. Stopping.")
+        return False, None, updates
+
+    max_retries = 2
+    attempt = 0
+    binding = "workflow" if params is not None else None
+    # (error_msg, error_type, analysis) of the last recovery, judged by the next attempt
+    recovery = None
+
+    while attempt < max_retries:
+        try:
+            if params is None:
+                params, binding = agents.executor.bind_parameters(user_request, entry, context)
+                print(f"[*] Parameters for {tool_name} bound: {binding}")
+            if blobs:
+                params = blobs.bind_refs(params)
+            output = agents.executor.execute_tool(entry, params, blobs)
+            failed = isinstance(output, dict) and output.get("error")
+            if recovery:
+                agents.error_handler.record_outcome(*recovery, succeeded=not failed)
+                recovery = None
+
+            if not failed:
+                span.set(attempts=attempt + 1, binding=binding)
+                if step_log is not None:
+                    step_log[tool_name] = {"params": params, "binding": binding, "attempts": attempt + 1}
+                return True, output, updates
+
+            error_msg = output["error"]
+            print(f"[-] Step '{tool_name}' failed: {error_msg}")
+
+            # ANALYZE ERROR
+            analysis = agents.error_handler.analyze_error(tool_name, error_msg, params, context, output.get("error_type"))
+            print(f"[*] Error analysis: {analysis['action']} - {analysis['reason']}")
+            span.set(attempts=attempt + 1, error_action=analysis["action"], error_source=analysis.get("source"))
+            recovery = (error_msg, output.get("error_type"), analysis)
+
+            if analysis["action"] == "retry_with_params":
+                params = analysis.get("suggested_params", params)
+                binding = "error_handler"
+                print(f"[*] Retrying with new params: {params}")
+            elif analysis["action"] == "request_user_input":
+                info_name = analysis.get("missing_info_name", "missing input")
+                with agents.input_lock:
+                    instructions = agents.user_inquiry.generate_instructions(info_name, tool_name)
+                    user_val = agents.user_inquiry.ask_user(info_name, instructions)
+
+                # Store in context and retry
+                context[info_name] = user_val
+                updates[info_name] = user_val
+                params = None
+                print(f"[+] Information received. Retrying step...")
+            elif analysis["action"] == "rebuild_tool":
+                print(f"[*] Rebuilding tool to fix code issue...")
+                # The original build is broken; don't hand it out again if the tool is ever rebuilt from scratch
+                agents.builder.forget_build(build_capability(step))
+                # Force rebuild
+                # A cached rebuild would hand back the same broken code
+                code = agents.builder.build_tool(f"REBUILD REQUIRED: The tool '{tool_name}' failed with {error_msg}. Context: {step['description']}", use_cache=False)
+                if not agents.validator.validate_tool(code, tool_name):
+                    print("[-] Rebuild validation failed.")
+                    agents.error_handler.record_outcome(*recovery, succeeded=False)
+                    return False, None, updates
+                rebuilt = install_tool(agents, step, code)
+                if not rebuilt:
+                    agents.error_handler.record_outcome(*recovery, succeeded=False)
+                    return False, None, updates
+                entry = rebuilt
+                params = None
+                print(f"[+] Tool '{tool_name}' rebuilt.")
+            else:
+                print(f"[-] Aborting step '{tool_name}'.")
+                agents.error_handler.forget(analysis)
+                return False, None, updates
+            attempt += 1
+        except UserInputRequired as e:
+            print(f"[-] Step '{tool_name}' needs user input: {e.missing_info}. Parking request.")
+            if step_log is not None:
+                step_log[tool_name] = {"status": "input_required", "missing_info": e.missing_info, "instructions": e.instructions}
+            return False, None, updates
+        except Exception as e:
+            print(f"[-] Execution Error during step '{tool_name}': {e}")
+            return False, None, updates
+
+    return False, None, updates
+
+def tool_files(agents: Agents, tool_names):
+    files = {}
+    for name in tool_names:
+        entry = agents.registry.get_tool(name)
+        files[name] = entry.file_path if entry else None
+    return files
+
+def output_schemas(agents: Agents, plan):
+    """Declared outputs of each plan step's tool, for local summary templates."""
+    schemas = {}
+    for step in plan:
+        entry = agents.registry.get_tool(step["tool_name"])
+        if entry:
+            schemas[step["tool_name"]] = entry.outputs
+    return schemas
+
+def match_workflow(agents: Agents, user_request: str):
+    """A saved workflow and its slot values for this request, or (None, None)."""
+    workflow, slots = agents.workflows.match(user_request)
+    if not workflow:
+        return None, None
+    if not agents.workflows.is_valid(workflow, tool_files(agents, [s["tool_name"] for s in workflow["steps"]])):
+        print("[*] Compiled workflow uses a changed tool; discarding it.")
+        agents.workflows.remove(workflow["id"])
+        return None, None
+    if slots is None:
+        slots = agents.executor.fill_slots(user_request, workflow)
+    if slots is None:
+        return None, None
+    print(f"[+] Replaying compiled workflow '{workflow['template']}' with {slots}")
+    return workflow, slots
+
+def run_query(agents: Agents, user_request: str, journal=None, inputs=None):
+    """Plan (or replay) and execute a request. Returns a dict with status, summary and per-step records.
+
+    Progress is checkpointed to a RunJournal (a resumed one if given). `inputs` are answers
+    to missing-information questions known up front; steps see them in their context. With
+    AGENTRIX_TRACE=1 the request's spans are written to AGENTRIX_TRACE_DIR and summarized.
+    """
+    journal = journal or RunJournal.create(user_request)
+    for name, value in (inputs or {}).items():
+        journal.add_input(name, value)
+    with tracer.span("request", kind="request", request=user_request, run_id=journal.run_id) as root:
+        try:
+            result = plan_and_run(agents, user_request, journal)
+        except BaseException:
+            journal.close()
+            raise
+        root.set(status=result["status"])
+    # Finished runs have nothing left to resume
+    journal.close(remove=result["status"] == "ok" and os.getenv("AGENTRIX_JOURNAL_KEEP", "0") != "1")
+    if journal.run_id and result["status"] != "ok":
+        print(f"[*] Run {journal.run_id} can be resumed with: python main.py --resume {journal.run_id}")
+    result["run_id"] = journal.run_id
+    tracer.report(root)
+    return result
+
+def resume_run(agents: Agents, run_id: str, inputs=None):
+    """Continue a journaled run, skipping steps that already succeeded. None if there is no such run."""
+    journal = RunJournal.open(run_id)
+    if journal is None:
+        print(f"[-] No journal for run '{run_id}' in {runs_dir()}.")
+        return None
+    print(f"[*] Resuming run {run_id}: {journal.request} ({len(journal.completed)} step(s) already done)")
+    return run_query(agents, journal.request, journal, inputs)
+
+def resumed_workflow(agents: Agents, journal):
+    """The workflow a resumed run was replaying, if it still exists."""
+    if not journal.workflow_id:
+        return None, None
+    workflow = next((w for w in agents.workflows.list_workflows() if w["id"] == journal.workflow_id), None)
+    return workflow, journal.slots
+
+def journaled_plan(steps, journal):
+    """Pass streamed steps through, marking the plan complete in the journal once the stream ends."""
+    yield from steps
+    journal.plan_done()
+
+def settle_plan(agents: Agents, user_request: str, status: str):
+    """Evict a plan from the LLM response cache unless its run succeeded or only waits for input."""
+    # Replayed and journaled plans never loaded the Orchestrator
+    if "orchestrator" in agents.__dict__:
+        agents.orchestrator.settle_plan(user_request, accepted=status in ("ok", "input_required"))
+
+def plan_and_run(agents: Agents, user_request: str, journal):
+    """Execute a replayed workflow, or a plan streamed from the Orchestrator.
+
+    Streamed steps start running (or their tools start building) as soon as each one is
+    complete in the LLM response, while the rest of the plan is still being generated.
+    Steps the journal already has as completed are not run again.
+    """
+    with tracer.span("plan", kind="plan") as span:
+        if journal.resumed:
+            workflow, slots = resumed_workflow(agents, journal)
+        else:
+            workflow, slots = match_workflow(agents, user_request)
+            if workflow:
+                journal.workflow(workflow["id"], slots)
+        span.set(workflow=workflow["id"] if workflow else None)
+
+    # User answers given before the run stopped
+    context = dict(journal.inputs)
+    step_log = {}
+    blobs = BlobStore()
+    builds = {}
+    plan = []
+    indices = {}
+
+    def on_step(step):
+        indices[id(step)] = len(plan)
+        journal.plan_step(len(plan), step)
+        plan.append(step)
+        if workflow and len(plan) == len(workflow["steps"]):
+            journal.plan_done()
+        # Replayed workflows only use tools that already exist
+        if not workflow and not journal.completed_step(indices[id(step)], step["tool_name"]):
+            builds.update(prefetch_tools(agents, [step], builds))
+
+    def runner(step, step_context):
+        index = indices[id(step)]
+        done = journal.completed_step(index, step["tool_name"])
+        if done:
+            print(f"\n[+] Step '{step['tool_name']}' already completed in run {journal.run_id}; skipping.")
+            if done.get("log"):
+                step_log[step["tool_name"]] = done["log"]
+            return True, done["output"], {}
+        params = agents.workflows.bind_params(step, slots, step_context) if workflow else None
+        success, output, updates = run_step(agents, user_request, step, step_context, params=params,
+                                            step_log=step_log, blobs=blobs, builds=builds)
+        journal.step(index, step["tool_name"], success, output, updates, step_log.get(step["tool_name"]))
+        return success, output, updates
+
+    try:
+        if workflow or journal.plan_complete:
+            steps = list(workflow["steps"] if workflow else journal.plan)
+        else:
+            if journal.plan:
+                # The run stopped before the plan was complete; plan again and match steps by position
+                journal.replan()
+            steps = journaled_plan(agents.orchestrator.stream_plan(user_request), journal)
+        try:
+            success = agents.scheduler.run(steps, runner, context, on_step=on_step)
+        except Exception as e:
+            if not plan:
+                print(f"[-] Orchestration failed: {e}")
+                settle_plan(agents, user_request, "orchestration_failed")
+                journal.finish("orchestration_failed")
+                return {"status": "orchestration_failed", "error": str(e), "summary": None, "steps": {}}
+            success = False
+        current_span().set(steps=len(plan))
+        result = finish_query(agents, user_request, plan, workflow, context, step_log, success)
+        settle_plan(agents, user_request, result["status"])
+        journal.finish(result["status"])
+        return result
+    finally:
+        blobs.close()
+
+def finish_query(agents: Agents, user_request: str, plan, workflow, context, step_log, success: bool):
+    # An empty plan would replay as a success that did nothing
+    if success and not workflow and plan:
+        step_params = {name: record["params"] for name, record in step_log.items()}
+        compiled = agents.workflows.compile(user_request, plan, step_params, context, tool_files(agents, step_params))
+        agents.workflows.save(compiled)
+        print(f"[+] Saved compiled workflow '{compiled['template']}'.")
+
+    if success:
+        status = "ok"
+    elif any(record.get("status") == "input_required" for record in step_log.values()):
+        status = "input_required"
+    else:
+        status = "failed"
+
+    # Final Summary
+    summary = None
+    # Tool outputs only; answers the user typed in (possibly API keys) never reach the summarizer or its cache
+    plan_tools = {step["tool_name"] for step in plan}
+    outputs = {name: value for name, value in context.items() if name in plan_tools}
+    if outputs and status != "input_required":
+        print("\n[FINAL RESPONSE]")
+        parts = []
+        schemas = output_schemas(agents, plan)
+        for chunk in agents.executor.stream_summary(user_request, outputs, schemas):
+            parts.append(chunk)
+            print(chunk, end="", flush=True)
+        summary = "".join(parts)
+        print("\n")
+    print(f"[*] Tool module cache: {tool_module_cache.stats()}")
+    print(f"[*] Tool result cache: {result_cache.stats()}")
+    if get_response_cache():
+        print(f"[*] LLM response cache: {get_response_cache().stats()}")
+    print(f"[*] LLM scheduler: {llm_scheduler.stats()}")
+    print(f"[*] Summary cache: {summary_cache.stats()}")
+    return {"status": status, "summary": summary, "steps": step_log, "workflow": workflow["id"] if workflow else None}
+
 def main():
-    orchestrator = Orchestrator()
-    builder = ToolBuilder()
-    validator = ToolValidator()
-    registry = RegistryManager()
-    executor = ExecutionAgent()
-    error_handler = ErrorHandlerAgent()
-    user_inquiry = UserInquiryAgent()
+    import argparse
+    parser = argparse.ArgumentParser(description="Agentrix: Multi-Agent Orchestrator")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue a run that failed or was interrupted")
+    args = parser.parse_args()
 
     print("=== Agentrix: Multi-Agent Orchestrator ===")
+    if args.resume:
+        resume_run(Agents(), args.resume)
+        return
+
     user_request = input("Enter your query: ")
-    
+
     if not user_request.strip():
         print("Empty query. Exiting.")
         return
-    
-    result = orchestrator.process_request(user_request)
-    
-    if result.get("status") == "plan_generated":
-        plan = result["plan"]
-        context = {}
-        
-        for step in plan:
-            tool_name = step["tool_name"]
-            print(f"\n[*] Step: {step['description']} (Tool: {tool_name})")
-            
-            # Use current registry for existing tools or newly built ones
-            entry = registry.get_tool(tool_name)
-            
-            if step["is_new"] or not entry:
-                print(f"[*] Building new tool: {tool_name}")
-                code = builder.build_tool(f"Capability: {step['description']} (Tool Name: {tool_name})")
-                
-                if not code:
-                    print(f"[-] Failed to generate code for {tool_name}. Stopping.")
-                    break
-                
-                if validator.validate_tool(code):
-                    entry = builder.create_registry_entry(step["description"], code)
-                    # Force the name from the plan if builder chose differently
-                    entry.tool_name = tool_name
-                    
-                    file_name = f"registry/tools/{entry.tool_name}.py"
-                    try:
-                        with open(file_name, "w", encoding="utf-8") as f:
-                            f.write(code)
-                        entry.file_path = file_name
-                        registry.register_tool(entry)
-                        print(f"[+] Tool '{tool_name}' registered successfully.")
-                    except Exception as e:
-                        print(f"[-] Error saving tool file: {e}")
-                        break
-                else:
-                    print(f"[-] Validation failed for {tool_name}. Stopping.")
-                    break
-            
-            # Execute step
-            if entry:
-                max_retries = 2
-                attempt = 0
-                success = False
-                
-                while attempt < max_retries and not success:
-                    try:
-                        params = executor.extract_parameters(user_request, entry, context)
-                        output = executor.execute_tool(entry, params)
-                        
-                        if isinstance(output, dict) and output.get("error"):
-                            error_msg = output["error"]
-                            print(f"[-] Step '{tool_name}' failed: {error_msg}")
-                            
-                            # ANALYZE ERROR
-                            analysis = error_handler.analyze_error(tool_name, error_msg, params, context)
-                            print(f"[*] Error analysis: {analysis['action']} - {analysis['reason']}")
-                            
-                            if analysis["action"] == "retry_with_params":
-                                params = analysis.get("suggested_params", params)
-                                print(f"[*] Retrying with new params: {params}")
-                                attempt += 1
-                                continue
-                            elif analysis["action"] == "request_user_input":
-                                info_name = analysis.get("missing_info_name", "missing input")
-                                instructions = user_inquiry.generate_instructions(info_name, tool_name)
-                                user_val = user_inquiry.ask_user(info_name, instructions)
-                                
-                                # Store in context and retry
-                                context[info_name] = user_val
-                                print(f"[+] Information received. Retrying step...")
-                                attempt += 1
-                                continue
-                            elif analysis["action"] == "rebuild_tool":
-                                print(f"[*] Rebuilding tool to fix code issue...")
-                                # Force rebuild
-                                code = builder.build_tool(f"REBUILD REQUIRED: The tool '{tool_name}' failed with {error_msg}. Context: {step['description']}")
-                                if validator.validate_tool(code):
-                                    with open(f"registry/tools/{tool_name}.py", "w", encoding="utf-8") as f:
-                                        f.write(code)
-                                    print(f"[+] Tool '{tool_name}' rebuilt.")
-                                    attempt += 1
-                                    continue
-                                else:
-                                    print("[-] Rebuild validation failed.")
-                                    break
-                            else:
-                                print(f"[-] Aborting step '{tool_name}'.")
-                                break
-                        else:
-                            context[tool_name] = output
-                            success = True
-                    except Exception as e:
-                        print(f"[-] Execution Error during step '{tool_name}': {e}")
-                        break
-                
-                if not success:
-                    break
-            else:
-                print(f"[-] Tool {tool_name} not available. Stopping.")
-                break
-        
-        # Final Summary
-        if context:
-            summary = executor.summarize_result(user_request, context)
-            print(f"\n[FINAL RESPONSE]\n{summary}\n")
-    else:
-        print(f"[-] Orchestration failed: {result.get('message')}")
+
+    run_query(Agents(), user_request)
 
 if __name__ == "__main__":
     main()
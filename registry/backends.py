@@ -0,0 +1,236 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+from .schema import ToolRegistryEntry
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """Exclusive inter-process lock held on a sidecar lock file."""
+    with open(lock_path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path: str, data: str):
+    """Write to a temp file in the same directory, then rename over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class RegistryBackend:
+    """Storage interface behind RegistryManager. Lookups go through an in-memory index."""
+
+    def get(self, tool_name: str) -> Optional[ToolRegistryEntry]:
+        raise NotImplementedError
+
+    def all(self) -> List[ToolRegistryEntry]:
+        raise NotImplementedError
+
+    def put_many(self, entries: Iterable[ToolRegistryEntry]):
+        raise NotImplementedError
+
+    def put(self, entry: ToolRegistryEntry):
+        self.put_many([entry])
+
+    def import_json(self, json_path: str) -> int:
+        with open(json_path, "r", encoding="utf-8") as f:
+            entries = [ToolRegistryEntry(**t) for t in json.load(f)]
+        self.put_many(entries)
+        return len(entries)
+
+
+class JsonFileBackend(RegistryBackend):
+    """The original tool_registry.json format, indexed and reloaded only when the file changes."""
+
+    def __init__(self, registry_file: str):
+        self.registry_file = registry_file
+        self.lock_file = registry_file + ".lock"
+        self._lock = threading.RLock()
+        self._index: Dict[str, ToolRegistryEntry] = {}
+        self._stamp = None
+        if not os.path.exists(self.registry_file):
+            with file_lock(self.lock_file):
+                if not os.path.exists(self.registry_file):
+                    atomic_write(self.registry_file, "[]")
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.registry_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _refresh(self, force: bool = False):
+        stamp = self._file_stamp()
+        if not force and stamp == self._stamp:
+            return
+        index = {}
+        if stamp is not None:
+            with open(self.registry_file, "r", encoding="utf-8") as f:
+                for t in json.load(f):
+                    index[t["tool_name"]] = ToolRegistryEntry(**t)
+        self._index = index
+        self._stamp = stamp
+
+    def get(self, tool_name: str) -> Optional[ToolRegistryEntry]:
+        with self._lock:
+            self._refresh()
+            return self._index.get(tool_name)
+
+    def all(self) -> List[ToolRegistryEntry]:
+        with self._lock:
+            self._refresh()
+            return list(self._index.values())
+
+    def put_many(self, entries: Iterable[ToolRegistryEntry]):
+        with self._lock, file_lock(self.lock_file):
+            # Another process may have written since our last read
+            self._refresh()
+            for entry in entries:
+                self._index.pop(entry.tool_name, None)
+                self._index[entry.tool_name] = entry
+            atomic_write(self.registry_file, json.dumps([t.model_dump() for t in self._index.values()], indent=2))
+            self._stamp = self._file_stamp()
+
+
+class SqliteBackend(RegistryBackend):
+    """SQLite store with O(1) upserts. The index pulls in only rows newer than the last version seen."""
+
+    def __init__(self, db_file: str, legacy_json: Optional[str] = None):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._index: Dict[str, ToolRegistryEntry] = {}
+        self._version = 0
+        self._data_version = None
+        self._conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tools ("
+            "tool_name TEXT PRIMARY KEY, data TEXT NOT NULL, version INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tools_version ON tools(version)")
+        if legacy_json and os.path.exists(legacy_json):
+            self._import_legacy(legacy_json)
+
+    def _import_legacy(self, json_path: str):
+        # Only the first process to open an empty database imports the old JSON registry
+        with open(json_path, "r", encoding="utf-8") as f:
+            entries = [ToolRegistryEntry(**t) for t in json.load(f)]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0] or not entries:
+                    self._conn.execute("ROLLBACK")
+                    return
+                self._insert(entries)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        print(f"[+] Imported {len(entries)} tools from {json_path} into {self.db_file}.")
+
+    def _insert(self, entries: List[ToolRegistryEntry]):
+        version = self._conn.execute("SELECT COALESCE(MAX(version), 0) FROM tools").fetchone()[0]
+        for entry in entries:
+            version += 1
+            self._conn.execute(
+                "INSERT INTO tools (tool_name, data, version) VALUES (?, ?, ?) "
+                "ON CONFLICT(tool_name) DO UPDATE SET data = excluded.data, version = excluded.version",
+                (entry.tool_name, json.dumps(entry.model_dump()), version),
+            )
+
+    def _refresh(self):
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        rows = self._conn.execute(
+            "SELECT tool_name, data, version FROM tools WHERE version > ? ORDER BY version", (self._version,)
+        ).fetchall()
+        for name, data, version in rows:
+            self._index.pop(name, None)
+            self._index[name] = ToolRegistryEntry(**json.loads(data))
+            self._version = max(self._version, version)
+        self._data_version = data_version
+
+    def get(self, tool_name: str) -> Optional[ToolRegistryEntry]:
+        with self._lock:
+            self._refresh()
+            return self._index.get(tool_name)
+
+    def all(self) -> List[ToolRegistryEntry]:
+        with self._lock:
+            self._refresh()
+            return list(self._index.values())
+
+    def put_many(self, entries: Iterable[ToolRegistryEntry]):
+        entries = list(entries)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert(entries)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._refresh()
+            for entry in entries:
+                self._index.pop(entry.tool_name, None)
+                self._index[entry.tool_name] = entry
+
+    def close(self):
+        self._conn.close()
+
+
+def open_backend(registry_file: str) -> RegistryBackend:
+    """Pick a backend from the file extension: .db/.sqlite/.sqlite3 use SQLite, anything else JSON."""
+    root, ext = os.path.splitext(registry_file)
+    if ext.lower() in (".db", ".sqlite", ".sqlite3"):
+        return SqliteBackend(registry_file, legacy_json=root + ".json")
+    return JsonFileBackend(registry_file)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print("Usage: python -m registry.backends <tool_registry.json> <tool_registry.db>")
+        sys.exit(1)
+    count = open_backend(sys.argv[2]).import_json(sys.argv[1])
+    print(f"[+] Imported {count} tools into {sys.argv[2]}.")
@@ -0,0 +1,126 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+from .schema import ToolRegistryEntry
+
+_STOPWORDS = {
+    "a", "an", "and", "the", "of", "to", "in", "on", "for", "with", "from", "by", "is", "it",
+    "this", "that", "be", "as", "at", "or", "my", "me", "i", "you", "please", "str", "int",
+    "float", "bool", "dict", "list", "any", "optional",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    # Split snake_case and camelCase so "get_weather" and "getWeather" both yield "get", "weather"
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def entry_text(entry: ToolRegistryEntry) -> str:
+    return " ".join([
+        entry.tool_name, entry.tool_name,  # name terms count double
+        entry.description,
+        " ".join(f"{k} {v}" for k, v in entry.inputs.items()),
+        " ".join(f"{k} {v}" for k, v in entry.outputs.items()),
+    ])
+
+
+def _version(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ToolIndex:
+    """Incremental in-memory BM25 index over registry entries.
+
+    Adding or replacing a tool only touches that tool's postings; nothing is rebuilt.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Counter] = {}
+        self._entries: Dict[str, ToolRegistryEntry] = {}
+        # Hash of each entry's indexed text, so a reloaded but unchanged entry isn't re-tokenized
+        self._versions: Dict[str, str] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, entry: ToolRegistryEntry):
+        with self._lock:
+            self.remove(entry.tool_name)
+            text = entry_text(entry)
+            terms = Counter(tokenize(text))
+            self._docs[entry.tool_name] = terms
+            self._entries[entry.tool_name] = entry
+            self._versions[entry.tool_name] = _version(text)
+            self._lengths[entry.tool_name] = sum(terms.values())
+            self._total_length += self._lengths[entry.tool_name]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[entry.tool_name] = tf
+
+    def remove(self, tool_name: str):
+        with self._lock:
+            terms = self._docs.pop(tool_name, None)
+            self._entries.pop(tool_name, None)
+            self._versions.pop(tool_name, None)
+            if terms is None:
+                return
+            self._total_length -= self._lengths.pop(tool_name)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is not None:
+                    posting.pop(tool_name, None)
+                    if not posting:
+                        del self._postings[term]
+
+    def sync(self, entries: List[ToolRegistryEntry]):
+        """Make the index match `entries`: index new or changed tools and drop ones no longer listed.
+
+        Entries are compared by the content that is indexed, not by identity, since a store that
+        reloads its file after another process wrote it hands back new objects for every tool.
+        """
+        with self._lock:
+            names = set()
+            for entry in entries:
+                names.add(entry.tool_name)
+                if self._versions.get(entry.tool_name) != _version(entry_text(entry)):
+                    self.add(entry)
+                else:
+                    # Same text; keep the latest object for its other fields (file_path, purity)
+                    self._entries[entry.tool_name] = entry
+            for name in [name for name in self._docs if name not in names]:
+                self.remove(name)
+
+    def search(self, query: str, k: int) -> List[Tuple[ToolRegistryEntry, float]]:
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            avg_length = self._total_length / n
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for name, tf in posting.items():
+                    length = self._lengths[name]
+                    norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                    scores[name] = scores.get(name, 0.0) + idf * norm
+            ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+            return [(self._entries[name], score) for name, score in ranked]
@@ -1,41 +1,42 @@
-import json
 import os
 from typing import List, Optional
 from .schema import ToolRegistryEntry
+from .backends import RegistryBackend, open_backend
+from .index import ToolIndex
 
-class RegistryManager:
-    def __init__(self, registry_file: str = "registry/tool_registry.json"):
-        self.registry_file = registry_file
-        self._ensure_registry_exists()
+DEFAULT_REGISTRY_FILE = "registry/tool_registry.json"
 
-    def _ensure_registry_exists(self):
-        if not os.path.exists(self.registry_file):
-            with open(self.registry_file, 'w') as f:
-                json.dump([], f)
+class RegistryManager:
+    def __init__(self, registry_file: Optional[str] = None, backend: Optional[RegistryBackend] = None):
+        self.registry_file = registry_file or os.getenv("AGENTRIX_REGISTRY", DEFAULT_REGISTRY_FILE)
+        self.backend = backend or open_backend(self.registry_file)
+        self._index: Optional[ToolIndex] = None
 
     def register_tool(self, tool_entry: ToolRegistryEntry):
-        registry = self.list_tools()
-        # Update or Add logic
-        registry = [t for t in registry if t.tool_name != tool_entry.tool_name]
-        registry.append(tool_entry)
-        
-        with open(self.registry_file, 'w') as f:
-            json.dump([t.model_dump() for t in registry], f, indent=2)
+        self.backend.put(tool_entry)
+        if self._index is not None:
+            self._index.add(tool_entry)
 
     def list_tools(self) -> List[ToolRegistryEntry]:
-        if not os.path.exists(self.registry_file):
-            return []
-        with open(self.registry_file, 'r') as f:
-            data = json.load(f)
-            return [ToolRegistryEntry(**t) for t in data]
+        return self.backend.all()
 
     def get_tool(self, tool_name: str) -> Optional[ToolRegistryEntry]:
-        tools = self.list_tools()
-        for t in tools:
-            if t.tool_name == tool_name:
-                # Add check: Does the file actually exist?
-                if t.file_path and os.path.exists(t.file_path):
-                    return t
-                else:
-                    return None
+        t = self.backend.get(tool_name)
+        # Add check: Does the file actually exist?
+        if t and t.file_path and os.path.exists(t.file_path):
+            return t
         return None
+
+    def import_json(self, json_path: str) -> int:
+        return self.backend.import_json(json_path)
+
+    def search(self, query: str, top_k: int) -> List[ToolRegistryEntry]:
+        """The `top_k` tools most relevant to `query`, or every tool if the registry is that small."""
+        tools = self.list_tools()
+        if len(tools) <= top_k:
+            return tools
+        if self._index is None:
+            self._index = ToolIndex()
+        # Picks up tools registered by other processes without re-indexing the rest
+        self._index.sync(tools)
+        return [entry for entry, _ in self._index.search(query, top_k)]
@@ -8,6 +8,8 @@ class ToolRegistryEntry(BaseModel):
     outputs: Dict[str, Any] = Field(..., description="Mapping of output fields to their types/details")
     usage_example: str = Field(..., description="Example usage of the tool")
     file_path: Optional[str] = Field(None, description="Path to the tool's implementation file")
+    pure: bool = Field(False, description="True if the tool has no side effects and equal inputs give equal results, so results may be cached")
+    cache_ttl: Optional[int] = Field(None, description="Seconds a cached result of a pure tool stays valid; None keeps it until the tool changes")
 
 class ToolGapUpdate(BaseModel):
     missing_capabilities: list[str] = Field(..., description="List of capabilities not supported by current tools")
@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from .backends import atomic_write, file_lock
+
+DEFAULT_WORKFLOW_FILE = "registry/workflows.json"
+
+
+def file_hash(file_path: str) -> Optional[str]:
+    try:
+        with open(file_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def normalize_request(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().rstrip(".!?")
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+# Words that start another clause; a slot value containing one (that its example did not) means the
+# request asks for more than the workflow does
+CLAUSE_WORDS = {"and", "then", "also", "plus", "after", "afterwards", "before", "but", "or", "while", "when", "if"}
+ACTION_VERBS = {"email", "mail", "send", "text", "message", "call", "notify", "share", "post", "tweet", "open", "launch",
+                "play", "save", "write", "delete", "remove", "download", "upload", "print", "copy", "move", "rename",
+                "search", "tell", "show", "schedule", "remind", "book", "buy", "order", "create", "convert",
+                "translate", "summarize", "compare", "calculate", "compute"}
+# Slot values without an example (older workflows) may be this many words long
+DEFAULT_SLOT_WORDS = 4
+_SLOT_PATTERNS = {"int": r"[-+]?\d+", "float": r"[-+]?\d+(?:\.\d+)?"}
+
+
+def _word_pattern(values) -> str:
+    """Alternation of `values`, longest first, that only matches whole words."""
+    alternation = "|".join(re.escape(v) for v in sorted(values, key=len, reverse=True))
+    return rf"(?<!\w)(?:{alternation})(?!\w)"
+
+
+def _find_in_output(value: Any, output: Any, path: List[Any] = None, depth: int = 0):
+    """Path to the first field in a step output that equals `value`, or None."""
+    path = path or []
+    if value is None or value == "":
+        return None
+    if output == value and not isinstance(value, bool):
+        return path
+    if depth >= 3:
+        return None
+    if isinstance(output, dict):
+        items = output.items()
+    elif isinstance(output, list):
+        items = enumerate(output[:50])
+    else:
+        return None
+    for k, v in items:
+        found = _find_in_output(value, v, path + [k], depth + 1)
+        if found is not None:
+            return found
+    return None
+
+
+def _resolve_path(output: Any, path: List[Any]):
+    for k in path:
+        output = output[k]
+    return output
+
+
+class WorkflowStore:
+    """Successful plans saved with their parameter bindings, replayed for requests of the same shape.
+
+    Each step records, per parameter, whether the value came from the user request
+    (a named slot in the request template), from an earlier step's output, or was a constant.
+    """
+
+    def __init__(self, workflow_file: str = None):
+        self.workflow_file = workflow_file or os.getenv("AGENTRIX_WORKFLOWS", DEFAULT_WORKFLOW_FILE)
+        self.lock_file = self.workflow_file + ".lock"
+        self._lock = threading.RLock()
+        self._workflows: Dict[str, Dict[str, Any]] = {}
+        self._stamp = None
+
+    # -- persistence -----------------------------------------------------
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.workflow_file)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            self._workflows, self._stamp = {}, None
+            return
+        if stamp == self._stamp:
+            return
+        with open(self.workflow_file, "r", encoding="utf-8") as f:
+            self._workflows = {w["id"]: w for w in json.load(f)}
+        self._stamp = stamp
+
+    def _update(self, mutate):
+        with self._lock, file_lock(self.lock_file):
+            self._refresh()
+            mutate(self._workflows)
+            atomic_write(self.workflow_file, json.dumps(list(self._workflows.values()), indent=2))
+            self._stamp = None
+
+    def list_workflows(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return list(self._workflows.values())
+
+    # -- compiling -------------------------------------------------------
+
+    def compile(self, user_request: str, plan: List[Dict[str, Any]], step_params: Dict[str, Dict[str, Any]],
+                context: Dict[str, Any], tool_files: Dict[str, str]) -> Dict[str, Any]:
+        """Turn a successful run into a workflow. `step_params` maps tool_name to the params it ran with.
+
+        Raises ValueError for an empty plan, which would replay as a success that did nothing.
+        """
+        if not plan:
+            raise ValueError("Refusing to compile a workflow from an empty plan")
+        request = normalize_request(user_request)
+        slots: Dict[str, str] = {}
+        steps = []
+        plan_tools = {s["tool_name"] for s in plan}
+        for i, step in enumerate(plan):
+            tool_name = step["tool_name"]
+            bindings = {}
+            earlier = [s["tool_name"] for s in plan[:i]]
+            for param, value in step_params.get(tool_name, {}).items():
+                bindings[param] = self._bind(param, value, request, earlier, plan_tools, context, slots)
+            steps.append({
+                "tool_name": tool_name,
+                "description": step.get("description", ""),
+                "is_new": False,
+                "depends_on": step.get("depends_on"),
+                "tool_hash": file_hash(tool_files.get(tool_name, "")),
+                "bindings": bindings,
+            })
+
+        template = request
+        if slots:
+            # One pass, longest values first, so a slot value never matches inside an inserted placeholder
+            by_value = {v.lower(): name for name, v in slots.items()}
+            pattern = _word_pattern(slots.values())
+            used = set()
+
+            def placeholder(m):
+                name = by_value[m.group(0).lower()]
+                if name in used:
+                    return m.group(0)
+                used.add(name)
+                return "{" + name + "}"
+            template = re.sub(pattern, placeholder, request, flags=re.IGNORECASE)
+        return {
+            "id": hashlib.sha256(template.lower().encode("utf-8")).hexdigest()[:16],
+            "template": template,
+            "slots": sorted(slots),
+            "slot_examples": slots,
+            "example_request": request,
+            "steps": steps,
+            "created_at": time.time(),
+        }
+
+    def _bind(self, param: str, value: Any, request: str, earlier: List[str], plan_tools: set,
+              context: Dict[str, Any], slots: Dict[str, str]):
+        # Values the user typed in (API keys etc.) are never written to the store
+        for key, context_value in context.items():
+            if key not in plan_tools and value == context_value and isinstance(value, str):
+                return {"source": "context", "key": key}
+        for tool_name in reversed(earlier):
+            path = _find_in_output(value, context.get(tool_name))
+            if path is not None and context.get(tool_name) is not None:
+                return {"source": "output", "step": tool_name, "path": path}
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            text = str(value).strip()
+            # Numbers of any length are slots ("add 5 and 7"); a one-letter string is too likely a coincidence
+            numeric = isinstance(value, (int, float)) or re.fullmatch(_SLOT_PATTERNS["float"], text)
+            if (numeric or len(text) >= 2) and re.search(_word_pattern([text]), request, re.IGNORECASE):
+                for name, slot_value in slots.items():
+                    if slot_value.lower() == text.lower():
+                        return {"source": "request", "slot": name, "type": type(value).__name__}
+                name = re.sub(r"\W+", "_", param).strip("_") or "slot"
+                if name[0].isdigit():
+                    name = "slot_" + name
+                while name in slots:
+                    name += "_"
+                slots[name] = text
+                return {"source": "request", "slot": name, "type": type(value).__name__}
+        return {"source": "constant", "value": value}
+
+    def save(self, workflow: Dict[str, Any]):
+        if not workflow["steps"]:
+            raise ValueError("Refusing to save a workflow without steps")
+
+        def mutate(workflows):
+            workflows[workflow["id"]] = workflow
+        self._update(mutate)
+
+    # -- matching --------------------------------------------------------
+
+    def _slot_types(self, workflow: Dict[str, Any]) -> Dict[str, str]:
+        return {b["slot"]: b.get("type", "str") for step in workflow["steps"]
+                for b in step["bindings"].values() if b["source"] == "request"}
+
+    def _template_regex(self, template: str, slot_types: Dict[str, str] = None):
+        parts = re.split(r"\{(\w+)\}", template)
+        pattern = ""
+        for i, part in enumerate(parts):
+            if i % 2:
+                pattern += f"(?P<{part}>{_SLOT_PATTERNS.get((slot_types or {}).get(part), '.+?')})"
+            else:
+                pattern += r"\s+".join(re.escape(w) for w in part.split(" ")) if part.strip() else re.escape(part)
+        return re.compile(f"^{pattern}$", re.IGNORECASE)
+
+    def _slot_ok(self, value: str, example: Optional[str]) -> bool:
+        """False if `value` looks like it swallowed another clause of the request."""
+        words = re.findall(r"[\w'-]+", value.lower())
+        known = _tokens(example) if example else set()
+        # "paris today" for an example of "London" is a city plus another qualifier, not a longer city
+        limit = len(example.split()) if example else DEFAULT_SLOT_WORDS
+        if not words or len(words) > limit:
+            return False
+        if re.search(r"[,;&]", value) and not (example and re.search(r"[,;&]", example)):
+            return False
+        return not any(w in CLAUSE_WORDS or w in ACTION_VERBS for w in set(words) - known)
+
+    def _replays_request_values(self, workflow: Dict[str, Any]) -> bool:
+        """True if a step reuses, as a constant, a value that was typed in the saved request."""
+        example = workflow.get("example_request", "")
+        for step in workflow["steps"]:
+            for binding in step["bindings"].values():
+                value = binding.get("value")
+                if binding["source"] == "constant" and isinstance(value, (str, int, float)) \
+                        and not isinstance(value, bool) and str(value).strip() \
+                        and re.search(_word_pattern([str(value).strip()]), example, re.IGNORECASE):
+                    return True
+        return False
+
+    def _adds_clauses(self, workflow: Dict[str, Any], request: str) -> bool:
+        # Words the saved request didn't have that start another clause or ask for another action
+        extra = _tokens(request) - _tokens(workflow.get("example_request", workflow["template"]))
+        return bool(extra & (CLAUSE_WORDS | ACTION_VERBS))
+
+    def match(self, user_request: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """Return (workflow, slots) on an exact template match, (workflow, None) for a close candidate
+        that needs slot filling, or (None, None).
+
+        A template match whose slot values swallow extra clauses ("London and email it to Bob"),
+        have more words than the saved example or have the wrong type is partial: the request is planned from scratch, so no part of it
+        is silently dropped.
+        """
+        request = normalize_request(user_request)
+        candidate, best = None, 0.0
+        for workflow in self.list_workflows():
+            m = self._template_regex(workflow["template"], self._slot_types(workflow)).match(request)
+            if m:
+                examples = workflow.get("slot_examples") or {}
+                if all(self._slot_ok(v, examples.get(k)) for k, v in m.groupdict().items()):
+                    return workflow, m.groupdict()
+                continue
+            # Slot filling can only change slots: a workflow without any, or one that hard-coded values from its
+            # request, would replay the old request's values for a new one ("add 5 and 8" answering 12)
+            if not workflow["slots"] or self._replays_request_values(workflow) or self._adds_clauses(workflow, request):
+                continue
+            literal = _tokens(re.sub(r"\{\w+\}", " ", workflow["template"]))
+            if literal:
+                score = len(literal & _tokens(request)) / len(literal | _tokens(request))
+                if score > best:
+                    candidate, best = workflow, score
+        if candidate and best >= 0.6:
+            return candidate, None
+        return None, None
+
+    def is_valid(self, workflow: Dict[str, Any], tool_files: Dict[str, Optional[str]]) -> bool:
+        """A workflow is stale once any of its tools is missing or its code changed."""
+        for step in workflow["steps"]:
+            path = tool_files.get(step["tool_name"])
+            if not path or file_hash(path) != step["tool_hash"]:
+                return False
+        return True
+
+    def bind_params(self, step: Dict[str, Any], slots: Dict[str, str], context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Params for a replayed step, or None if a binding can't be resolved from slots/context."""
+        params = {}
+        for param, binding in step["bindings"].items():
+            source = binding["source"]
+            if source == "request":
+                value = slots.get(binding["slot"])
+                if value is None:
+                    return None
+                try:
+                    value = {"int": int, "float": float}.get(binding.get("type"), str)(value)
+                except ValueError:
+                    return None
+                params[param] = value
+            elif source == "context":
+                if binding["key"] not in context:
+                    return None
+                params[param] = context[binding["key"]]
+            elif source == "output":
+                try:
+                    params[param] = _resolve_path(context[binding["step"]], binding["path"])
+                except (KeyError, IndexError, TypeError):
+                    return None
+            else:
+                params[param] = binding["value"]
+        return params
+
+    # -- invalidation ----------------------------------------------------
+
+    def remove(self, workflow_id: str):
+        def mutate(workflows):
+            workflows.pop(workflow_id, None)
+        self._update(mutate)
+
+    def invalidate_tool(self, tool_name: str):
+        """Drop every workflow that uses `tool_name` (called when a tool is rebuilt or re-registered)."""
+        def mutate(workflows):
+            for wid in [wid for wid, w in workflows.items() if any(s["tool_name"] == tool_name for s in w["steps"])]:
+                del workflows[wid]
+        with self._lock:
+            self._refresh()
+            if not any(s["tool_name"] == tool_name for w in self._workflows.values() for s in w["steps"]):
+                return
+        self._update(mutate)
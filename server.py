@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from main import Agents, run_query, resume_run
+from agents.module_cache import tool_module_cache
+from agents.result_cache import result_cache
+from agents.llm_scheduler import llm_scheduler
+
+ROUTES = [
+    ("GET", re.compile(r"^/health$"), "health"),
+    ("POST", re.compile(r"^/sessions$"), "create_session"),
+    ("DELETE", re.compile(r"^/sessions/(?P<session>[\w-]+)$"), "delete_session"),
+    ("POST", re.compile(r"^/sessions/(?P<session>[\w-]+)/queries$"), "submit_query"),
+    ("GET", re.compile(r"^/sessions/(?P<session>[\w-]+)/queries/(?P<query>[\w-]+)$"), "get_query"),
+    ("POST", re.compile(r"^/sessions/(?P<session>[\w-]+)/queries/(?P<query>[\w-]+)/input$"), "provide_input"),
+]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Query:
+    def __init__(self, query_id: str, text: str):
+        self.query_id = query_id
+        self.text = text
+        self.status = "running"
+        self.result: Optional[Dict[str, Any]] = None
+        self.future: Optional[Future] = None
+        self.submitted = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {"query_id": self.query_id, "query": self.text, "status": self.status}
+        if self.result is not None:
+            record.update(self.result, status=self.status)
+            missing = next((dict(r, tool_name=name) for name, r in (self.result.get("steps") or {}).items()
+                            if isinstance(r, dict) and r.get("status") == "input_required"), None)
+            if missing:
+                record["input_required"] = {"name": missing["missing_info"], "instructions": missing["instructions"],
+                                            "tool_name": missing["tool_name"]}
+        return record
+
+
+class Session:
+    """Answers given in this session (reused by its later queries) and its queries.
+
+    Each query still runs with its own context; only the answers are shared.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.inputs: Dict[str, Any] = {}
+        self.queries: Dict[str, Query] = {}
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+
+class AgentrixService:
+    """Shared warm state for every session: one Agents (registry, tool module cache, LLM
+    clients and connection pool) and a bounded pool of query workers.
+    """
+
+    def __init__(self, workers: int = None, session_ttl: float = None):
+        self.agents = Agents(interactive=False)
+        self.workers = workers or int(os.getenv("AGENTRIX_SERVER_WORKERS", "8"))
+        self.session_ttl = session_ttl or float(os.getenv("AGENTRIX_SESSION_TTL", "3600"))
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="query")
+        self.sessions: Dict[str, Session] = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.completed = 0
+
+    # -- sessions --------------------------------------------------------
+
+    def _expire(self):
+        cutoff = time.time() - self.session_ttl
+        with self.lock:
+            for session_id in [s for s, session in self.sessions.items()
+                               if session.last_used < cutoff and not any(q.status == "running" for q in session.queries.values())]:
+                del self.sessions[session_id]
+
+    def session(self, session_id: str) -> Session:
+        with self.lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, f"Unknown session '{session_id}'")
+        session.last_used = time.time()
+        return session
+
+    def query(self, session: Session, query_id: str) -> Query:
+        query = session.queries.get(query_id)
+        if query is None:
+            raise HTTPError(404, f"Unknown query '{query_id}'")
+        return query
+
+    # -- queries ---------------------------------------------------------
+
+    def _start(self, session: Session, query: Query, run):
+        query.future = self.pool.submit(self._run, session, query, run)
+
+    def _run(self, session: Session, query: Query, run):
+        try:
+            result = run()
+            if result is None:
+                result = {"status": "failed", "error": "Run journal not found", "summary": None, "steps": {}}
+        except Exception as e:
+            result = {"status": "error", "error": str(e), "summary": None, "steps": {}}
+        with session.lock:
+            query.result = result
+            query.status = result["status"]
+        with self.lock:
+            self.completed += 1
+        return query
+
+    def _respond(self, query: Query, wait: bool) -> Tuple[int, Dict[str, Any]]:
+        if wait:
+            query.future.result()
+            return 200, query.to_dict()
+        return 202, query.to_dict()
+
+    # -- handlers (body -> (status, payload)) ----------------------------
+
+    def health(self, body, **_):
+        self._expire()
+        with self.lock:
+            sessions = len(self.sessions)
+            running = sum(1 for s in self.sessions.values() for q in s.queries.values() if q.status == "running")
+        return 200, {"status": "ok", "uptime_s": round(time.time() - self.started, 1), "sessions": sessions,
+                     "running": running, "completed": self.completed, "workers": self.workers,
+                     "tool_module_cache": tool_module_cache.stats(), "tool_result_cache": result_cache.stats(),
+                     "llm_scheduler": llm_scheduler.stats()}
+
+    def create_session(self, body, **_):
+        self._expire()
+        session = Session(uuid.uuid4().hex[:12])
+        # Answers known up front, e.g. API keys
+        session.inputs.update(body.get("inputs") or {})
+        with self.lock:
+            self.sessions[session.session_id] = session
+        return 201, {"session_id": session.session_id}
+
+    def delete_session(self, body, session):
+        with self.lock:
+            if self.sessions.pop(session, None) is None:
+                raise HTTPError(404, f"Unknown session '{session}'")
+        return 200, {"session_id": session, "deleted": True}
+
+    def submit_query(self, body, session):
+        session = self.session(session)
+        text = (body.get("query") or "").strip()
+        if not text:
+            raise HTTPError(400, "Missing 'query'")
+        query = Query(uuid.uuid4().hex[:12], text)
+        with session.lock:
+            session.queries[query.query_id] = query
+            inputs = dict(session.inputs)
+        self._start(session, query, lambda: run_query(self.agents, text, inputs=inputs))
+        return self._respond(query, body.get("wait", False))
+
+    def get_query(self, body, session, query):
+        session = self.session(session)
+        return 200, self.query(session, query).to_dict()
+
+    def provide_input(self, body, session, query):
+        """Answer the question a query stopped on, then continue it (from its journal if it has one)."""
+        session = self.session(session)
+        query = self.query(session, query)
+        values = body.get("values") or ({body["name"]: body.get("value")} if body.get("name") else {})
+        if not values:
+            raise HTTPError(400, "Provide 'name' and 'value', or 'values'")
+        with session.lock:
+            if query.status == "running":
+                raise HTTPError(409, "Query is still running")
+            query.status = "running"
+            session.inputs.update(values)
+            inputs = dict(session.inputs)
+            run_id = (query.result or {}).get("run_id")
+        if run_id:
+            self._start(session, query, lambda: resume_run(self.agents, run_id, inputs))
+        else:
+            self._start(session, query, lambda: run_query(self.agents, query.text, inputs=inputs))
+        return self._respond(query, body.get("wait", False))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+        if "tool_factory" in self.agents.__dict__:
+            self.agents.tool_factory.shutdown()
+
+
+def make_handler(service: AgentrixService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self, method: str):
+            path = self.path.split("?", 1)[0].rstrip("/") or "/"
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                except ValueError:
+                    raise HTTPError(400, "Body must be JSON")
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "Body must be a JSON object")
+                for route_method, pattern, name in ROUTES:
+                    match = pattern.match(path)
+                    if match and route_method == method:
+                        status, payload = getattr(service, name)(body, **match.groupdict())
+                        break
+                else:
+                    allowed = any(pattern.match(path) for _, pattern, _ in ROUTES)
+                    raise HTTPError(405 if allowed else 404, f"{method} {path} not supported")
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            self._send(status, payload)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Agentrix pipeline over a local HTTP/JSON API.")
+    parser.add_argument("--host", default=os.getenv("AGENTRIX_SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("AGENTRIX_SERVER_PORT", "8080")))
+    parser.add_argument("-w", "--workers", type=int, help="queries run at once (default AGENTRIX_SERVER_WORKERS or 8)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="suppress per-step pipeline output")
+    args = parser.parse_args()
+
+    if args.quiet:
+        sys.stdout = open(os.devnull, "w")
+    service = AgentrixService(workers=args.workers)
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    httpd.daemon_threads = True
+    print(f"[+] Agentrix service listening on http://{args.host}:{httpd.server_address[1]}", file=sys.stderr, flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()